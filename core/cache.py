@@ -0,0 +1,298 @@
+"""
+Ikki qavatli kesh.
+
+- TwoTierCache - Django kesh backendi: jarayon ichidagi LRU (hajmi baytlarda
+  cheklangan, yozuvlari LOCAL_TIMEOUT soniyada eskiradi) umumiy backend
+  (Redis yoki lokal ishlash uchun fayl keshi, settings.CACHES['shared'])
+  oldida turadi. O'qish avval lokal qavatdan, topilmasa umumiy keshdan;
+  yozish / o'chirish ikkalasiga. Boshqa jarayonlardagi lokal nusxalar ko'pi
+  bilan LOCAL_TIMEOUT soniya eski bo'lishi mumkin.
+- get_or_compute() - qiymatni hisoblash funksiyasi bilan olish:
+  * single-flight: kesh bo'sh bo'lsa qiymatni faqat qulfni olgan bitta
+    jarayon hisoblaydi, qolganlari tayyor bo'lishini kutadi;
+  * ehtimoliy oldindan yangilash (XFetch): muddat tugashiga yaqinlashgan sari
+    bitta so'rov qiymatni oldinroq qayta hisoblaydi, qolganlar eski qiymatni
+    oladi - muddat tugagan paytda hamma birdan bazaga tushmaydi;
+  * teglar: yozuv teglar versiyasi bilan saqlanadi, invalidate_tags()
+    versiyani oshiradi - masalan 'author:5' tegli barcha yozuvlar eskiradi;
+  * hisoblash doim asosiy bazadan o'qiydi (replika orqada qolgan bo'lishi
+    mumkin - invalidatsiyadan oldingi qiymat yangi versiya bilan saqlanib
+    qolardi).
+"""
+import math
+import pickle
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache as default_cache, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from core.db_router import read_from_primary
+from core.instrumentation import record_cache
+
+MISSING = object()
+
+LOCK_TIMEOUT = 10
+LOCK_POLL_INTERVAL = 0.05
+
+
+class LocalLRU:
+    """Jarayon ichidagi LRU: qiymatlar pickle qilingan holda, jami hajmi max_bytes gacha"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data = OrderedDict()  # key -> (expires_at, blob)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return MISSING
+            expires_at, blob = item
+            if expires_at <= time.monotonic():
+                self._pop(key)
+                return MISSING
+            self._data.move_to_end(key)
+        return pickle.loads(blob)
+
+    def set(self, key, value, ttl):
+        blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._pop(key)
+            # Juda katta qiymat butun keshni siqib chiqarmasin
+            if ttl <= 0 or len(blob) > self.max_bytes // 4:
+                return
+            self._data[key] = (time.monotonic() + ttl, blob)
+            self.size += len(blob)
+            while self.size > self.max_bytes:
+                _, (_, old) = self._data.popitem(last=False)
+                self.size -= len(old)
+
+    def delete(self, key):
+        with self._lock:
+            return self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    def _pop(self, key):
+        item = self._data.pop(key, None)
+        if item is None:
+            return False
+        self.size -= len(item[1])
+        return True
+
+
+class TwoTierCache(BaseCache):
+    """
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.TwoTierCache',
+            'OPTIONS': {'SHARED': 'shared', 'LOCAL_MAX_BYTES': 32 * 2**20, 'LOCAL_TIMEOUT': 5},
+        },
+        'shared': {...},
+    }
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = options.get('SHARED', 'shared')
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.local = LocalLRU(options.get('LOCAL_MAX_BYTES', 32 * 2 ** 20))
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    def _local_ttl(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return self.local_timeout
+        return min(self.local_timeout, timeout - time.time())
+
+    def get(self, key, default=None, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        value = self.local.get(local_key)
+        if value is not MISSING:
+            record_cache(1, 0)
+            return value
+        value = self.shared.get(key, MISSING, version=version)
+        if value is MISSING:
+            record_cache(0, 1)
+            return default
+        record_cache(1, 0)
+        self.local.set(local_key, value, self.local_timeout)
+        return value
+
+    def get_many(self, keys, version=None):
+        found, missing = {}, []
+        for key in keys:
+            value = self.local.get(self.make_and_validate_key(key, version=version))
+            if value is MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            shared = self.shared.get_many(missing, version=version)
+            for key, value in shared.items():
+                self.local.set(self.make_key(key, version=version), value, self.local_timeout)
+            found.update(shared)
+        record_cache(len(found), len(keys) - len(found))
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        self.shared.set(key, value, timeout, version=version)
+        self.local.set(self.make_and_validate_key(key, version=version), value, self._local_ttl(timeout))
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        failed = self.shared.set_many(data, timeout, version=version)
+        ttl = self._local_ttl(timeout)
+        for key, value in data.items():
+            if key not in failed:
+                self.local.set(self.make_and_validate_key(key, version=version), value, ttl)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        # Qulflar uchun - faqat umumiy backend atomar
+        timeout = self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        local_key = self.make_and_validate_key(key, version=version)
+        if not self.shared.add(key, value, timeout, version=version):
+            return False
+        self.local.delete(local_key)
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        self.local.delete(self.make_and_validate_key(key, version=version))
+        return self.shared.touch(key, timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self.local.delete(self.make_and_validate_key(key, version=version))
+        return self.shared.incr(key, delta, version=version)
+
+    def delete(self, key, version=None):
+        self.local.delete(self.make_and_validate_key(key, version=version))
+        return self.shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self.local.delete(self.make_and_validate_key(key, version=version))
+        self.shared.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        if self.local.get(self.make_and_validate_key(key, version=version)) is not MISSING:
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+
+# ============================================================================
+# HISOBLANADIGAN QIYMATLAR
+# ============================================================================
+
+def _tag_key(tag):
+    return f"tag:{tag}"
+
+
+def tag_versions(tags, cache=default_cache):
+    """{tag: versiya}; yo'q teglar hozirgi vaqtdan boshlanadi (eski versiyalar bilan to'qnashmaydi)"""
+    keys = {_tag_key(tag): tag for tag in tags}
+    if not keys:
+        return {}
+    versions = cache.get_many(keys)
+    for key in keys.keys() - versions.keys():
+        cache.add(key, time.time_ns(), None)
+        versions[key] = cache.get(key)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def invalidate_tags(*tags, cache=default_cache):
+    """Shu teglar bilan saqlangan barcha yozuvlarni eskirtirish"""
+    for tag in tags:
+        try:
+            cache.incr(_tag_key(tag))
+        except ValueError:
+            cache.add(_tag_key(tag), time.time_ns(), None)
+
+
+def _fresh(entry, cache):
+    """Yozuv teglari hali eskirmaganmi"""
+    if not entry['tags']:
+        return True
+    return tag_versions(entry['tags'], cache) == entry['tags']
+
+
+def _should_refresh(entry, beta):
+    # XFetch: delta * beta * -ln(rand) muddatdan oldin ehtimoliy yangilash
+    return time.time() - entry['delta'] * beta * math.log(random.random() or 1e-12) >= entry['expires']
+
+
+def _compute(key, compute, timeout, tags, cache):
+    versions = {} if callable(tags) else tag_versions(tags, cache)
+    started = time.monotonic()
+    with read_from_primary():
+        value = compute()
+    delta = time.monotonic() - started
+    if callable(tags):
+        versions = tag_versions(tags(value), cache)
+    entry = {
+        'value': value,
+        'delta': delta,
+        'expires': time.time() + timeout,
+        'tags': versions,
+    }
+    cache.set(key, entry, timeout)
+    return value
+
+
+def get_or_compute(key, compute, timeout, tags=(), beta=1.0, cache=default_cache):
+    """
+    Keshdagi qiymat yoki compute() natijasi (None ham keshlanadi).
+
+    tags - teglar ro'yxati yoki qiymatdan teglarni qaytaruvchi funksiya.
+    Ro'yxat berilsa teglar versiyasi hisoblashdan OLDIN olinadi: hisoblash
+    paytida invalidate_tags() chaqirilsa, natija keyingi o'qishda eskirgan
+    hisoblanadi. Funksiya berilsa versiyalar hisoblashdan keyin olinadi.
+    """
+    entry = cache.get(key)
+    if entry is not None and _fresh(entry, cache):
+        if not _should_refresh(entry, beta):
+            return entry['value']
+        stale = entry
+    else:
+        stale = None
+
+    lock_key = f"{key}:lock"
+    if cache.add(lock_key, 1, LOCK_TIMEOUT):
+        try:
+            return _compute(key, compute, timeout, tags, cache)
+        finally:
+            cache.delete(lock_key)
+
+    # Boshqa jarayon hisoblayapti: eski qiymat bo'lsa - shuni, bo'lmasa kutamiz
+    if stale is not None:
+        return stale['value']
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None and _fresh(entry, cache):
+            return entry['value']
+        if not cache.has_key(lock_key):
+            break
+    return _compute(key, compute, timeout, tags, cache)
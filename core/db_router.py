@@ -0,0 +1,200 @@
+"""
+O'qish replikalari uchun database router.
+
+Replikaga faqat ReplicaRoutingMiddleware belgilagan so'rovlar (REPLICA_READ_PATHS
+dagi GET / HEAD) ichidagi o'qishlar boradi; qolgan hamma narsa - yozishlar,
+tranzaksiyalar, admin, buyruqlar - default bazada.
+
+- Sticky primary: so'rov davomida yozish bo'lsa, shu mijoz (telegram_id yoki
+  admin foydalanuvchi) REPLICA_STICKY_SECONDS davomida o'qishlarni ham asosiy
+  bazadan oladi - o'zi yozgan ma'lumotni darhol ko'radi. Belgi keshda turadi,
+  shuning uchun bir nechta jarayon orasida umumiy kesh kerak.
+- Lag: PostgreSQL replikasining orqada qolishi LAG_CHECK_INTERVAL da bir marta
+  o'lchanadi; REPLICA_MAX_LAG dan ko'p orqada qolgan yoki javob bermayotgan
+  replika tanlanmaydi, hech biri yaroqsiz bo'lsa - default.
+- Keshni to'ldirish (core.cache.get_or_compute) read_from_primary() ichida:
+  invalidatsiyadan keyin orqada qolgan replikadan o'qilgan eski qator yangi
+  teg versiyalari bilan keshga yozilib qolmasligi uchun.
+"""
+import json
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+
+LAG_CHECK_INTERVAL = 5
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_state = ContextVar('db_routing_state', default=None)
+# alias -> (tekshirilgan vaqt, lag soniyalarda yoki None - ishlamayapti)
+_lag_cache = {}
+
+
+class RoutingState:
+    __slots__ = ('replica', 'wrote', 'client_keys')
+
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+        self.client_keys = []
+
+
+def replica_lag(alias):
+    """Replika necha soniya orqada (None - ulanib bo'lmadi)"""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT CASE"
+                " WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+                " ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())"
+                " END"
+            )
+            lag = cursor.fetchone()[0]
+    except DatabaseError:
+        return None
+    return float(lag or 0)
+
+
+def healthy_replicas():
+    now = time.monotonic()
+    healthy = []
+    for alias in settings.DATABASE_REPLICAS:
+        checked_at, lag = _lag_cache.get(alias, (None, None))
+        if checked_at is None or now - checked_at > LAG_CHECK_INTERVAL:
+            lag = replica_lag(alias)
+            _lag_cache[alias] = (now, lag)
+        if lag is not None and lag <= settings.REPLICA_MAX_LAG:
+            healthy.append(alias)
+    return healthy
+
+
+def choose_replica():
+    """Yaroqli replikalardan tasodifiy biri yoki None"""
+    replicas = healthy_replicas()
+    return random.choice(replicas) if replicas else None
+
+
+def _pin_key(client_key):
+    return f"db:pin:{client_key}"
+
+
+def pin_primary(client_keys):
+    """Mijozlar o'qishlarini REPLICA_STICKY_SECONDS davomida asosiy bazaga bog'lash"""
+    if client_keys:
+        cache.set_many({_pin_key(key): 1 for key in client_keys}, settings.REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(client_keys):
+    return bool(client_keys) and bool(cache.get_many([_pin_key(key) for key in client_keys]))
+
+
+@contextmanager
+def read_from_replica():
+    """So'rovdan tashqarida (buyruq, vazifa) o'qishlarni replikaga yo'naltirish"""
+    state = RoutingState()
+    state.replica = choose_replica()
+    token = _state.set(state)
+    try:
+        yield state.replica
+    finally:
+        _state.reset(token)
+
+
+@contextmanager
+def read_from_primary():
+    """Blok ichidagi o'qishlar replika tanlangan so'rovda ham default bazadan"""
+    state = _state.get()
+    if state is None or state.replica is None:
+        yield
+        return
+    replica, state.replica = state.replica, None
+    try:
+        yield
+    finally:
+        state.replica = replica
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.replica is None or state.wrote:
+            return None
+        # Ochiq tranzaksiya ichida o'z yozganlarimizni ko'rishimiz kerak
+        if connections['default'].in_atomic_block:
+            return None
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replikalar default ning nusxasi - obyektlar bitta bazaga tegishli
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """REPLICA_READ_PATHS dagi o'qish so'rovlarini replikaga, yozgan mijozni asosiy bazaga"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+            if state.wrote:
+                pin_primary(state.client_keys)
+            return response
+        finally:
+            _state.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        if state is None:
+            return None
+        state.client_keys = self.client_keys(request, view_kwargs)
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method in SAFE_METHODS
+            and request.path.startswith(tuple(settings.REPLICA_READ_PATHS))
+            and not is_pinned(state.client_keys)
+        ):
+            state.replica = choose_replica()
+        return None
+
+    def client_keys(self, request, view_kwargs):
+        keys = []
+        telegram_id = view_kwargs.get('telegram_id')
+        if telegram_id is None and request.method not in SAFE_METHODS:
+            telegram_id = self._body_telegram_id(request)
+        if telegram_id is not None:
+            keys.append(f"tg:{telegram_id}")
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            keys.append(f"user:{user.pk}")
+        return keys
+
+    def _body_telegram_id(self, request):
+        if request.content_type != 'application/json':
+            return request.POST.get('telegram_id')
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        return data.get('telegram_id') if isinstance(data, dict) else None
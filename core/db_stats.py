@@ -0,0 +1,65 @@
+"""
+Katta jadvallar uchun qatorlar sonini taxminiy baholash.
+
+PostgreSQL da pg_class.reltuples (ANALYZE / autovacuum yangilaydi) va
+EXPLAIN natijasidagi "Plan Rows" to'liq COUNT(*) dan ancha arzon. Boshqa
+bazalarda (SQLite) funksiyalar None qaytaradi - chaqiruvchi aniq COUNT ga
+qaytadi.
+"""
+import json
+
+from django.conf import settings
+from django.db import DatabaseError, connections, router
+
+# Shu miqdordan katta jadvallar uchun taxminiy son ishlatiladi
+ESTIMATE_THRESHOLD = getattr(settings, 'ESTIMATED_COUNT_THRESHOLD', 100_000)
+
+
+def _is_postgres(connection):
+    return connection.vendor == 'postgresql'
+
+
+def table_estimate(model, using=None):
+    """Jadvaldagi qatorlar soni (pg_class.reltuples) yoki None"""
+    using = using or router.db_for_read(model)
+    connection = connections[using]
+    if not _is_postgres(connection):
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+                [connection.ops.quote_name(model._meta.db_table)],
+            )
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    # -1 - jadval hali ANALYZE qilinmagan
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+def query_estimate(queryset):
+    """So'rov qaytaradigan qatorlar soni (EXPLAIN "Plan Rows") yoki None"""
+    connection = connections[queryset.db]
+    if not _is_postgres(connection):
+        return None
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+    except DatabaseError:
+        return None
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def is_large(model, threshold=None):
+    """Jadval taxminan threshold dan katta bo'lsa - uning taxminiy hajmi, aks holda None"""
+    estimate = table_estimate(model)
+    if estimate is not None and estimate >= (threshold or ESTIMATE_THRESHOLD):
+        return estimate
+    return None
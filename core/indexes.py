@@ -0,0 +1,27 @@
+"""
+Prefiks qidiruv (istartswith) uchun indekslar.
+
+PostgreSQL da `name__istartswith='abc'` so'rovi
+`UPPER("name"::text) LIKE UPPER('abc%')` ga aylanadi. Oddiy B-tree indeks
+bunga yaramaydi: ifoda aynan shunday bo'lishi va (C bo'lmagan collation da)
+text_pattern_ops operator klassi bilan qurilishi kerak. Boshqa bazalarda
+(SQLite) operator klassi tashlab yuboriladi - indeks oddiy ifoda indeksi
+bo'lib qoladi.
+"""
+from django.db import models
+from django.db.models.functions import Cast, Upper
+
+
+class PatternOps(models.Func):
+    """Ifoda + text_pattern_ops (faqat PostgreSQL da)"""
+
+    template = '%(expressions)s'
+    constraint_validation_compatible = False
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template='%(expressions)s text_pattern_ops', **extra_context)
+
+
+def prefix_index(field, name):
+    """field__istartswith qidiruvi uchun ifoda indeksi"""
+    return models.Index(PatternOps(Upper(Cast(field, models.TextField()))), name=name)
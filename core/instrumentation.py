@@ -0,0 +1,238 @@
+"""
+So'rov bo'yicha o'lchovlar: SQL so'rovlar soni va vaqti, kesh hit / miss,
+view va render vaqti.
+
+RequestTimingMiddleware (WSGI va ASGI da bir xil ishlaydi) ularni
+`Server-Timing` sarlavhasiga yozadi va REQUEST_SLOW_MS dan sekin so'rovlar
+uchun eng sekin REQUEST_SLOW_TOP_QUERIES ta SQL bilan JSON yozuvni
+'core.instrumentation' loggeriga chiqaradi.
+
+SQL har bir ulanishga connection_created da bir marta qo'shiladigan
+execute_wrapper orqali o'lchanadi; holat ContextVar da turadi, shuning
+uchun ASGI da sync_to_async thread laridagi so'rovlar ham shu so'rovga
+yoziladi. Boshqa modullar add_query_listener() bilan har bir SQL ning
+davomiyligini (monitoring.slow_queries), add_request_observer() bilan esa
+tugagan so'rov o'lchovlarini (monitoring.metrics) olishi mumkin.
+REQUEST_TIMING o'chiq va kuzatuvchi yo'q bo'lsa middleware umuman
+yuklanmaydi (MiddlewareNotUsed) va wrapper ham qo'shilmaydi.
+"""
+import heapq
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+_state = ContextVar('request_metrics', default=None)
+# Har bir SQL dan keyin chaqiriladi: listener(connection, sql, params, many, duration)
+_query_listeners = []
+# Har bir so'rov oxirida chaqiriladi: observer(request, response, state)
+_request_observers = []
+
+
+class RequestMetrics:
+    __slots__ = (
+        'started', 'queries', 'db_time', 'slowest', 'cache_hits', 'cache_misses',
+        'view_started', 'view_time', 'render_started', 'render_time', 'timings',
+    )
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.slowest = []  # heap: (soniya, sql)
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.view_started = None
+        self.view_time = 0.0
+        self.render_started = None
+        self.render_time = 0.0
+        self.timings = {}
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+
+def current():
+    """Joriy so'rov o'lchovlari yoki None"""
+    return _state.get()
+
+
+def record_query(sql, duration):
+    state = _state.get()
+    if state is None:
+        return
+    state.queries += 1
+    state.db_time += duration
+    item = (duration, sql)
+    if len(state.slowest) < settings.REQUEST_SLOW_TOP_QUERIES:
+        heapq.heappush(state.slowest, item)
+    elif duration > state.slowest[0][0]:
+        heapq.heapreplace(state.slowest, item)
+
+
+def record_cache(hits, misses):
+    state = _state.get()
+    if state is not None:
+        state.cache_hits += hits
+        state.cache_misses += misses
+
+
+@contextmanager
+def timed(name):
+    """Kod bo'lagi vaqtini Server-Timing ga qo'shish: with timed('serializer'): ..."""
+    state = _state.get()
+    if state is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        state.timings[name] = state.timings.get(name, 0.0) + time.perf_counter() - started
+
+
+def add_query_listener(listener):
+    if listener not in _query_listeners:
+        _query_listeners.append(listener)
+    install_query_wrapper()
+
+
+def add_request_observer(observer):
+    """Middleware yuklanishidan oldin (AppConfig.ready) chaqirilishi kerak"""
+    if observer not in _request_observers:
+        _request_observers.append(observer)
+
+
+def query_wrapper(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        record_query(sql, duration)
+        for listener in _query_listeners:
+            listener(context['connection'], sql, params, many, duration)
+
+
+def _install_wrapper(sender, connection, **kwargs):
+    if query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_wrapper)
+
+
+def install_query_wrapper():
+    connection_created.connect(_install_wrapper, dispatch_uid='core.instrumentation')
+    for connection in connections.all(initialized_only=True):
+        _install_wrapper(None, connection)
+
+
+def _ms(seconds):
+    return f"{seconds * 1000:.1f}"
+
+
+def server_timing(state):
+    parts = [
+        f'db;dur={_ms(state.db_time)};desc="{state.queries} queries"',
+        f'cache;desc="hit={state.cache_hits} miss={state.cache_misses}"',
+        f'view;dur={_ms(state.view_time)}',
+    ]
+    if state.render_time:
+        parts.append(f'render;dur={_ms(state.render_time)}')
+    parts.extend(f'{name};dur={_ms(value)}' for name, value in state.timings.items())
+    parts.append(f'total;dur={_ms(state.total_time)}')
+    return ', '.join(parts)
+
+
+def slow_request_record(request, response, state):
+    match = request.resolver_match
+    return {
+        'method': request.method,
+        'path': request.path,
+        'url_name': match.view_name if match else None,
+        'status': response.status_code,
+        'total_ms': round(state.total_time * 1000, 1),
+        'db_ms': round(state.db_time * 1000, 1),
+        'queries': state.queries,
+        'view_ms': round(state.view_time * 1000, 1),
+        'render_ms': round(state.render_time * 1000, 1),
+        'cache_hits': state.cache_hits,
+        'cache_misses': state.cache_misses,
+        'timings_ms': {name: round(value * 1000, 1) for name, value in state.timings.items()},
+        'slowest_queries': [
+            {'ms': round(duration * 1000, 1), 'sql': sql[:2000]}
+            for duration, sql in sorted(state.slowest, reverse=True)
+        ],
+    }
+
+
+class RequestTimingMiddleware:
+    """MIDDLEWARE ro'yxatining boshida turishi kerak - qolganlarining so'rovlari ham o'lchansin"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING and not _request_observers:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        install_query_wrapper()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state = RequestMetrics()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(request, response, state)
+
+    async def __acall__(self, request):
+        state = RequestMetrics()
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(request, response, state)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        if state is not None:
+            state.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        state = _state.get()
+        if state is not None and state.view_started is not None:
+            state.view_time = time.perf_counter() - state.view_started
+            state.render_started = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: self._rendered(state))
+        return response
+
+    def _rendered(self, state):
+        state.render_time = time.perf_counter() - state.render_started
+
+    def finish(self, request, response, state):
+        if state.view_started is not None and state.render_started is None:
+            state.view_time = time.perf_counter() - state.view_started
+        for observer in _request_observers:
+            observer(request, response, state)
+        if not settings.REQUEST_TIMING:
+            return response
+        response.headers['Server-Timing'] = server_timing(state)
+        if state.total_time * 1000 >= settings.REQUEST_SLOW_MS:
+            logger.warning(json.dumps(slow_request_record(request, response, state), ensure_ascii=False))
+        return response
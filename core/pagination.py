@@ -0,0 +1,140 @@
+"""
+Katta jadvallar uchun taxminiy sonli sahifalash (admin va DRF).
+
+Oddiy Paginator har bir sahifada SELECT COUNT(*) bajaradi. Bu yerda:
+- filtrsiz so'rov - pg_class.reltuples;
+- baho threshold dan kichik bo'lsa (yoki baza PostgreSQL emas) - aniq COUNT;
+- filtrlangan va qidiruv so'rovlari - har doim aniq COUNT: icontains va
+  list filtrlari uchun EXPLAIN bahosi bir necha tartibga adashishi mumkin.
+
+Admin shablonlari (templates/admin) taxminiy sonlar oldiga "≈" qo'yadi.
+"""
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import InvalidPage, Paginator
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+from .db_stats import ESTIMATE_THRESHOLD, table_estimate
+
+
+def _is_filtered(queryset):
+    query = queryset.query
+    return bool(query.where) or query.distinct or query.low_mark or query.high_mark is not None
+
+
+def estimated_count(queryset, threshold=None):
+    """(count, is_estimated) - filtrlangan so'rov har doim aniq sanaladi"""
+    if not _is_filtered(queryset):
+        estimate = table_estimate(queryset.model, using=queryset.db)
+        if estimate is not None and estimate >= (threshold or ESTIMATE_THRESHOLD):
+            return estimate, True
+    return queryset.count(), False
+
+
+class EstimatedCountPaginator(Paginator):
+    """Katta natijalar uchun COUNT(*) o'rniga planner bahosi"""
+
+    threshold = None
+
+    def __init__(self, *args, threshold=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if threshold is not None:
+            self.threshold = threshold
+        self.is_estimated = False
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, 'query'):
+            return super().count
+        count, self.is_estimated = estimated_count(self.object_list, self.threshold)
+        return count
+
+
+class EstimatedPageNumberPagination(PageNumberPagination):
+    """DRF uchun: javobda count_is_estimated belgisi ham qaytadi"""
+
+    django_paginator_class = EstimatedCountPaginator
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.page.paginator.count,
+            'count_is_estimated': self.page.paginator.is_estimated,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count_is_estimated'] = {'type': 'boolean'}
+        return response_schema
+
+
+class EstimatedChangeList(ChangeList):
+    """
+    ChangeList.get_results bilan bir xil, faqat "jami N ta" soni ham
+    estimated_count orqali olinadi. result_count_is_estimated va
+    full_result_count_is_estimated shablonda "≈" belgisi uchun.
+    """
+
+    def get_results(self, request):
+        paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        result_count = paginator.count
+
+        if self.model_admin.show_full_result_count:
+            full_result_count, full_result_count_is_estimated = estimated_count(
+                self.root_queryset, self.model_admin.estimated_count_threshold,
+            )
+        else:
+            full_result_count, full_result_count_is_estimated = None, False
+        can_show_all = result_count <= self.list_max_show_all
+        multi_page = result_count > self.list_per_page
+
+        if (self.show_all and can_show_all) or not multi_page:
+            result_list = self.queryset._clone()
+        else:
+            try:
+                result_list = paginator.page(self.page_num).object_list
+            except InvalidPage:
+                raise IncorrectLookupParameters
+
+        self.result_count = result_count
+        self.result_count_is_estimated = paginator.is_estimated
+        self.full_result_count_is_estimated = full_result_count_is_estimated
+        self.show_full_result_count = self.model_admin.show_full_result_count
+        self.show_admin_actions = not self.show_full_result_count or bool(full_result_count)
+        self.full_result_count = full_result_count
+        self.result_list = result_list
+        self.can_show_all = can_show_all
+        self.multi_page = multi_page
+        self.paginator = paginator
+
+
+class EstimatedCountAdminMixin:
+    """
+    ModelAdmin uchun taxminiy sonli sahifalash.
+
+    estimated_count_threshold - shu sondan katta natijalar taxminiy sanaladi
+    (None - settings.ESTIMATED_COUNT_THRESHOLD). show_full_result_count
+    odatdagidek har bir admin klassida sozlanadi: False bo'lsa filtrlangan
+    sahifada "jami N ta" umuman hisoblanmaydi.
+    """
+
+    paginator = EstimatedCountPaginator
+    estimated_count_threshold = None
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        return self.paginator(
+            queryset,
+            per_page,
+            orphans,
+            allow_empty_first_page,
+            threshold=self.estimated_count_threshold,
+        )
+
+    def get_changelist(self, request, **kwargs):
+        return EstimatedChangeList
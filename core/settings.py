@@ -1,3 +1,4 @@
+import copy
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -41,6 +42,7 @@ INSTALLED_APPS = [
 
     'tg_bot',
     'web_app',
+    'monitoring',
 
     'rest_framework',
     'rest_framework.authtoken',
@@ -50,6 +52,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # So'rov o'lchovlari (Server-Timing) - hamma narsani o'lchashi uchun birinchi
+    'core.instrumentation.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
 
@@ -59,8 +63,11 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.db_router.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Admin dagi ProfilingRule lar bo'yicha view ni profillaydi - oxirida turishi kerak
+    'monitoring.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -93,9 +100,76 @@ DATABASES = {
         'PASSWORD': os.getenv("DB_PASSWORD"),
         'HOST': os.getenv("DB_HOST"),
         'PORT': os.getenv("DB_PORT"),
+        # Ulanish so'rovlar orasida qayta ishlatiladi; eskirgan ulanish ishlatishdan oldin tekshiriladi
+        'CONN_MAX_AGE': int(os.getenv("DB_CONN_MAX_AGE", 60)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# PostgreSQL (psycopg 3): Django ning ichki ulanishlar puli. Pul ishlatilganda
+# CONN_MAX_AGE 0 bo'lishi shart - ulanishlar umrini pulning o'zi boshqaradi,
+# Django har bir ulanishni puldan berishdan oldin tekshiradi (check_connection).
+# ASGI da ham (har bir so'rov alohida thread da) ulanishlar puldan olinadi.
+# Pul har bir jarayonda alohida: jarayonlar soni * DB_POOL_MAX_SIZE <= max_connections.
+DB_POOL = os.getenv("DB_POOL", "true").lower() in ("1", "true", "yes")
+
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql' and DB_POOL:
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+            'max_size': int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+            # Puldan bo'sh ulanish kutish (soniya)
+            'timeout': float(os.getenv("DB_POOL_TIMEOUT", 10)),
+            'max_idle': float(os.getenv("DB_POOL_MAX_IDLE", 10 * 60)),
+            'max_lifetime': float(os.getenv("DB_POOL_MAX_LIFETIME", 60 * 60)),
+        },
+    }
+
+# O'qish replikalari: DB_REPLICAS="10.0.0.2:5432,10.0.0.3" (host[:port][/name]).
+# Har biri default sozlamalaridan nusxa oladi; core.db_router ularga faqat
+# REPLICA_READ_PATHS dagi GET so'rovlarini yo'naltiradi.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(filter(None, os.getenv("DB_REPLICAS", "").split(',')), start=1):
+    address, _, name = replica.strip().partition('/')
+    host, _, port = address.partition(':')
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **copy.deepcopy(DATABASES['default']),
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'NAME': name or DATABASES['default']['NAME'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+
+
+# Kesh: jarayon ichidagi LRU (core.cache.TwoTierCache) umumiy kesh oldida.
+# Umumiy kesh - REDIS_URL berilsa Redis, aks holda lokal ishlash uchun fayl keshi
+# (bitta serverdagi barcha jarayonlar uchun umumiy).
+REDIS_URL = os.getenv("REDIS_URL")
+
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.TwoTierCache',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_MAX_BYTES': int(os.getenv("CACHE_LOCAL_MAX_BYTES", 32 * 1024 * 1024)),
+            # Boshqa jarayonda o'zgargan qiymat lokal nusxada shuncha soniyagacha eski qolishi mumkin
+            'LOCAL_TIMEOUT': int(os.getenv("CACHE_LOCAL_TIMEOUT", 5)),
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'var' / 'cache',
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -222,7 +296,7 @@ REST_FRAMEWORK = {
     ],
 
     # Пагинация
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.EstimatedPageNumberPagination',
     'PAGE_SIZE': 20,
 
     # Парсеры
@@ -281,6 +355,12 @@ LOGGING = {
             'handlers': ['console', 'file'],
             'level': 'DEBUG',
         },
+        # Sekin so'rovlar (JSON)
+        'core.instrumentation': {
+            'handlers': ['console', 'file'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
     },
     'root': {
         'handlers': ['console'],
@@ -307,4 +387,70 @@ FILE_UPLOAD_MAX_MEMORY_SIZE = 104857600  # 100MB
 ALLOWED_IMAGE_EXTENSIONS = ['jpg', 'jpeg', 'png', 'gif', 'webp']
 
 # Rasm o'lchamlari
-IMAGE_MAX_SIZE = 5 * 1024 * 1024  # 5MB
\ No newline at end of file
+IMAGE_MAX_SIZE = 5 * 1024 * 1024  # 5MB
+
+# ============================================================================
+# SAVAT / ZAXIRA
+# ============================================================================
+
+# Savatdagi kitob necha soniya band qilinadi
+STOCK_RESERVATION_TTL = int(os.getenv("STOCK_RESERVATION_TTL", 15 * 60))
+
+
+# ============================================================================
+# KATTA JADVALLAR
+# ============================================================================
+
+# Shundan katta jadvallarda (PostgreSQL) COUNT(*) o'rniga taxminiy son ishlatiladi
+ESTIMATED_COUNT_THRESHOLD = int(os.getenv("ESTIMATED_COUNT_THRESHOLD", 100_000))
+
+
+# ============================================================================
+# O'QISH REPLIKALARI
+# ============================================================================
+
+# Replikaga yuboriladigan faqat o'qish API lari (GET / HEAD)
+REPLICA_READ_PATHS = [
+    '/web_app/api/books/',
+    '/web_app/api/reports/',
+    '/tg_bot/api/check-user/',
+    '/tg_bot/api/user/',
+]
+
+# Foydalanuvchi o'zi yozgandan keyin shuncha soniya uning o'qishlari asosiy bazadan
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 10))
+
+# Shundan ko'p orqada qolgan replika ishlatilmaydi (soniya)
+REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", 5))
+
+
+# ============================================================================
+# SO'ROV O'LCHOVLARI
+# ============================================================================
+
+# SQL / kesh / view vaqtlari Server-Timing sarlavhasida (o'chiq bo'lsa - qo'shimcha xarajat yo'q)
+REQUEST_TIMING = os.getenv("REQUEST_TIMING", "false").lower() in ("1", "true", "yes")
+
+# Shundan sekin so'rovlar logga yoziladi (ms)
+REQUEST_SLOW_MS = int(os.getenv("REQUEST_SLOW_MS", 500))
+
+# Sekin so'rov yozuvidagi eng sekin SQL lar soni
+REQUEST_SLOW_TOP_QUERIES = 5
+
+# Shundan sekin SQL lar EXPLAIN rejasi bilan monitoring.SlowQuery ga yoziladi (ms, 0 - o'chiq)
+SLOW_QUERY_MS = int(os.getenv("SLOW_QUERY_MS", 200))
+
+# Sekin so'rovlarning qancha ulushi yoziladi (0..1)
+SLOW_QUERY_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_SAMPLE_RATE", 1.0))
+
+# Prometheus /metrics (ko'p jarayonli rejim: PROMETHEUS_MULTIPROC_DIR - monitoring.metrics ga qarang)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# Berilsa /metrics faqat "Authorization: Bearer <token>" bilan ochiladi
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Admin dagi ProfilingRule lar bo'yicha so'rovlarni profillash
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# Profil fayllari (collapsed stacks, speedscope JSON, .prof)
+PROFILING_DIR = os.getenv("PROFILING_DIR", BASE_DIR / 'var' / 'profiles')
@@ -0,0 +1,267 @@
+import json
+import pickle
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgresWrapper
+from django.db.models.sql import Query
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from . import cache as two_tier, db_router, instrumentation
+from .cache import LocalLRU, get_or_compute, invalidate_tags
+from .indexes import prefix_index
+
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.TwoTierCache',
+        'OPTIONS': {'SHARED': 'shared', 'LOCAL_MAX_BYTES': 2 ** 20, 'LOCAL_TIMEOUT': 5},
+    },
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'core-tests'},
+}
+
+
+class LocalLRUTests(SimpleTestCase):
+
+    def test_evicts_least_recently_used(self):
+        value_size = len(pickle.dumps('x' * 50, pickle.HIGHEST_PROTOCOL))
+        lru = LocalLRU(max_bytes=value_size * 4)
+        for key in 'abcd':
+            lru.set(key, 'x' * 50, 60)
+        lru.get('a')
+        lru.set('e', 'x' * 50, 60)
+        self.assertLessEqual(lru.size, lru.max_bytes)
+        self.assertIs(lru.get('b'), two_tier.MISSING)
+        self.assertEqual(lru.get('a'), 'x' * 50)
+
+    def test_expired_and_oversized_values_are_not_served(self):
+        lru = LocalLRU(max_bytes=400)
+        lru.set('big', 'x' * 200, 60)
+        self.assertIs(lru.get('big'), two_tier.MISSING)
+        lru.set('key', 1, 60)
+        with mock.patch.object(two_tier.time, 'monotonic', return_value=two_tier.time.monotonic() + 61):
+            self.assertIs(lru.get('key'), two_tier.MISSING)
+        self.assertEqual(lru.size, 0)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class TwoTierCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_writes_and_deletes_both_tiers(self):
+        cache.set('key', 'value', 60)
+        self.assertEqual(cache.shared.get('key'), 'value')
+        self.assertEqual(cache.local.get(cache.make_key('key')), 'value')
+
+        cache.delete('key')
+        self.assertIsNone(cache.shared.get('key'))
+        self.assertIsNone(cache.get('key'))
+
+    def test_local_tier_is_filled_from_shared(self):
+        cache.shared.set('key', 'shared', 60)
+        self.assertEqual(cache.get('key'), 'shared')
+        # Boshqa jarayon o'zgartirgan qiymat LOCAL_TIMEOUT gacha eski ko'rinadi
+        cache.shared.set('key', 'changed', 60)
+        self.assertEqual(cache.get('key'), 'shared')
+        self.assertEqual(cache.get_many(['key', 'missing']), {'key': 'shared'})
+
+    def test_add_only_uses_shared_tier(self):
+        self.assertTrue(cache.add('lock', 1, 60))
+        self.assertFalse(cache.add('lock', 2, 60))
+        self.assertEqual(cache.get('lock'), 1)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class GetOrComputeTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def test_value_is_cached(self):
+        self.assertEqual(get_or_compute('key', self.compute, 60, beta=0), 1)
+        self.assertEqual(get_or_compute('key', self.compute, 60, beta=0), 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_none_is_cached(self):
+        compute = mock.Mock(return_value=None)
+        self.assertIsNone(get_or_compute('key', compute, 60, beta=0))
+        self.assertIsNone(get_or_compute('key', compute, 60, beta=0))
+        compute.assert_called_once()
+
+    def test_invalidate_tags(self):
+        get_or_compute('a', self.compute, 60, tags=['author:1'], beta=0)
+        get_or_compute('b', self.compute, 60, tags=['author:2'], beta=0)
+        invalidate_tags('author:1')
+        self.assertEqual(get_or_compute('a', self.compute, 60, tags=['author:1'], beta=0), 3)
+        self.assertEqual(get_or_compute('b', self.compute, 60, tags=['author:2'], beta=0), 2)
+
+    def test_callable_tags_come_from_value(self):
+        tags = mock.Mock(side_effect=lambda value: [f'item:{value}'])
+        get_or_compute('key', self.compute, 60, tags=tags, beta=0)
+        tags.assert_called_once_with(1)
+        invalidate_tags('item:1')
+        self.assertEqual(get_or_compute('key', self.compute, 60, tags=tags, beta=0), 2)
+
+    def test_invalidation_during_compute_is_not_lost(self):
+        def compute():
+            invalidate_tags('author:1')
+            return self.compute()
+
+        get_or_compute('key', compute, 60, tags=['author:1'], beta=0)
+        self.assertEqual(get_or_compute('key', self.compute, 60, tags=['author:1'], beta=0), 2)
+
+    def test_stale_value_while_another_process_refreshes(self):
+        get_or_compute('key', self.compute, 60, beta=0)
+        cache.add('key:lock', 1, 60)
+        # Katta beta - XFetch darhol yangilashni talab qiladi, lekin qulf band
+        self.assertEqual(get_or_compute('key', self.compute, 60, beta=10 ** 9), 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_waits_for_lock_then_computes(self):
+        cache.add('key:lock', 1, 60)
+        with mock.patch.object(two_tier, 'LOCK_TIMEOUT', 0.2), mock.patch.object(two_tier, 'LOCK_POLL_INTERVAL', 0.01):
+            self.assertEqual(get_or_compute('key', self.compute, 60, beta=0), 1)
+        self.assertEqual(self.calls, 1)
+
+
+@override_settings(CACHES=TEST_CACHES, DATABASE_REPLICAS=['replica'], REPLICA_MAX_LAG=5)
+class ReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        db_router._lag_cache.clear()
+        self.router = db_router.ReplicaRouter()
+        lag = mock.patch.object(db_router, 'replica_lag', return_value=0.0)
+        self.replica_lag = lag.start()
+        self.addCleanup(lag.stop)
+
+    def test_reads_go_to_replica_until_write(self):
+        with db_router.read_from_replica() as replica:
+            self.assertEqual(replica, 'replica')
+            self.assertEqual(self.router.db_for_read(None), 'replica')
+            self.assertEqual(self.router.db_for_write(None), 'default')
+            self.assertIsNone(self.router.db_for_read(None))
+        self.assertIsNone(self.router.db_for_read(None))
+
+    def test_lagging_or_broken_replica_is_skipped(self):
+        for lag in (10.0, None):
+            with self.subTest(lag=lag):
+                db_router._lag_cache.clear()
+                self.replica_lag.return_value = lag
+                with db_router.read_from_replica() as replica:
+                    self.assertIsNone(replica)
+                    self.assertIsNone(self.router.db_for_read(None))
+
+    def middleware_read(self, path, method='get', **view_kwargs):
+        seen = []
+
+        def view(request):
+            seen.append(self.router.db_for_read(None))
+            return HttpResponse()
+
+        middleware = db_router.ReplicaRoutingMiddleware(view)
+        request = getattr(RequestFactory(), method)(path)
+
+        def get_response(request):
+            middleware.process_view(request, view, (), view_kwargs)
+            return view(request)
+
+        middleware.get_response = get_response
+        middleware(request)
+        return seen[0]
+
+    def test_middleware_routes_read_paths_only(self):
+        self.assertEqual(self.middleware_read('/web_app/api/books/'), 'replica')
+        self.assertIsNone(self.middleware_read('/admin/'))
+        self.assertIsNone(self.middleware_read('/web_app/api/books/', method='post'))
+
+    def test_writer_is_pinned_to_primary(self):
+        db_router.pin_primary(['tg:5'])
+        self.assertIsNone(self.middleware_read('/tg_bot/api/user/5/', telegram_id=5))
+        self.assertEqual(self.middleware_read('/tg_bot/api/user/6/', telegram_id=6), 'replica')
+
+    def test_cache_fill_reads_from_primary(self):
+        with db_router.read_from_replica():
+            routed = get_or_compute('key', lambda: self.router.db_for_read(None), 60, beta=0)
+            self.assertIsNone(routed)
+            self.assertEqual(self.router.db_for_read(None), 'replica')
+
+
+class PrefixIndexTests(SimpleTestCase):
+
+    def compile(self, connection):
+        query = Query(User, alias_cols=False)
+        expression = prefix_index('username', 'username_prefix_idx').expressions[0].resolve_expression(query)
+        return query.get_compiler(connection=connection).compile(expression)
+
+    def test_postgresql_uses_pattern_ops(self):
+        postgres = PostgresWrapper({**connection.settings_dict, 'ENGINE': 'django.db.backends.postgresql'}, 'pg')
+        self.assertEqual(self.compile(postgres), ('UPPER(("username")::text) text_pattern_ops', []))
+
+    def test_other_backends_get_plain_expression(self):
+        sql, _ = self.compile(connection)
+        self.assertIn('UPPER(', sql)
+        self.assertNotIn('text_pattern_ops', sql)
+
+
+@override_settings(REQUEST_TIMING=True, REQUEST_SLOW_MS=60_000, REQUEST_SLOW_TOP_QUERIES=2)
+class RequestTimingTests(TestCase):
+
+    def run_middleware(self, view):
+        middleware = instrumentation.RequestTimingMiddleware(view)
+        request = RequestFactory().get('/web_app/api/books/')
+        request.resolver_match = None
+        return middleware(request)
+
+    def test_server_timing_header(self):
+        def view(request):
+            User.objects.count()
+            instrumentation.record_cache(hits=1, misses=2)
+            with instrumentation.timed('serializer'):
+                pass
+            return HttpResponse()
+
+        response = self.run_middleware(view)
+        timing = response.headers['Server-Timing']
+        self.assertRegex(timing, r'^db;dur=[\d.]+;desc="1 queries", cache;desc="hit=1 miss=2", view;dur=')
+        self.assertRegex(timing, r'serializer;dur=[\d.]+, total;dur=[\d.]+$')
+        self.assertIsNone(instrumentation.current())
+
+    @override_settings(REQUEST_SLOW_MS=0)
+    def test_slow_request_is_logged_with_slowest_queries(self):
+        def view(request):
+            for sql, duration in (('SELECT 1', 0.01), ('SELECT 2', 0.03), ('SELECT 3', 0.02)):
+                instrumentation.record_query(sql, duration)
+            return HttpResponse(status=201)
+
+        with self.assertLogs('core.instrumentation', 'WARNING') as logs:
+            self.run_middleware(view)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(
+            {key: record[key] for key in ('method', 'path', 'url_name', 'status', 'queries', 'db_ms')},
+            {'method': 'GET', 'path': '/web_app/api/books/', 'url_name': None, 'status': 201,
+             'queries': 3, 'db_ms': 60.0},
+        )
+        self.assertEqual(record['slowest_queries'], [{'ms': 30.0, 'sql': 'SELECT 2'}, {'ms': 20.0, 'sql': 'SELECT 3'}])
+
+    @override_settings(REQUEST_TIMING=False)
+    def test_disabled_without_observers(self):
+        with mock.patch.object(instrumentation, '_request_observers', []):
+            with self.assertRaises(MiddlewareNotUsed):
+                instrumentation.RequestTimingMiddleware(lambda request: HttpResponse())
+
+        observer = mock.Mock()
+        with mock.patch.object(instrumentation, '_request_observers', [observer]):
+            response = self.run_middleware(lambda request: HttpResponse())
+        self.assertNotIn('Server-Timing', response.headers)
+        observer.assert_called_once()
@@ -38,8 +38,17 @@ urlpatterns = [
 
     # tg_bot_app
     path('tg_bot/', include('tg_bot.urls')),
+
+    # web_app
+    path('web_app/', include('web_app.urls')),
 ]
 
+if settings.METRICS_ENABLED:
+    from monitoring.metrics import metrics_view
+
+    # Prometheus scrape
+    urlpatterns.append(path('metrics', metrics_view, name='metrics'))
+
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
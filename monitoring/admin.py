@@ -0,0 +1,155 @@
+import json
+
+from django.contrib import admin
+from django.contrib.admin.utils import unquote
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
+
+from . import profiling
+from .models import Profile, ProfilingRule, SlowQuery
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    """Sekin so'rovlar - faqat ko'rish (yig'uvchi: monitoring.slow_queries)"""
+    list_display = [
+        'short_sql', 'database', 'calls', 'avg_display', 'p50_ms', 'p95_ms', 'max_ms',
+        'plan_captured_at', 'last_seen',
+    ]
+    list_filter = ['database']
+    search_fields = ['sql', 'fingerprint']
+    fields = [
+        'fingerprint', 'database', 'sql', 'example', 'calls', 'avg_display',
+        'p50_ms', 'p95_ms', 'max_ms', 'plan_display', 'plan_captured_at',
+        'first_seen', 'last_seen',
+    ]
+    readonly_fields = fields
+    actions = ['delete_selected']
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_queryset(self, request):
+        # Rejalar katta bo'lishi mumkin - ro'yxatda kerak emas
+        return super().get_queryset(request).defer('plan', 'samples', 'example')
+
+    def short_sql(self, obj):
+        return obj.sql if len(obj.sql) <= 120 else f"{obj.sql[:120]}…"
+
+    short_sql.short_description = 'SQL'
+
+    def avg_display(self, obj):
+        return f"{obj.avg_ms:.1f}"
+
+    avg_display.short_description = "O'rtacha (ms)"
+
+    def plan_display(self, obj):
+        if obj.plan is None:
+            return '—'
+        return format_html(
+            '<pre style="max-height: 600px; overflow: auto; font-size: 12px;">{}</pre>',
+            json.dumps(obj.plan, indent=2, ensure_ascii=False),
+        )
+
+    plan_display.short_description = 'EXPLAIN'
+
+
+@admin.register(ProfilingRule)
+class ProfilingRuleAdmin(admin.ModelAdmin):
+    """Profillash qoidalari - saqlangandan keyin ~bir necha soniyada barcha jarayonlarda amalda"""
+    list_display = [
+        'name', 'pattern', 'mode', 'sample_rate', 'profiles_display', 'expires_at', 'is_active',
+    ]
+    list_editable = ['is_active']
+    list_filter = ['is_active', 'mode']
+    readonly_fields = ['profiles_taken', 'created_at', 'updated_at']
+    actions = ['reset_counters']
+
+    def profiles_display(self, obj):
+        return f"{obj.profiles_taken} / {obj.max_profiles}"
+
+    profiles_display.short_description = 'Profillar'
+
+    def reset_counters(self, request, queryset):
+        updated = queryset.update(profiles_taken=0)
+        profiling.invalidate_rules()
+        self.message_user(request, f'{updated} ta qoida hisoblagichi nolga tushirildi.')
+
+    reset_counters.short_description = '🔄 Profillar hisoblagichini nolga tushirish'
+
+
+@admin.register(Profile)
+class ProfileAdmin(admin.ModelAdmin):
+    """Olingan profillar - faqat ko'rish va fayllarni yuklab olish"""
+    list_display = [
+        'created_at', 'view_name', 'method', 'status_code', 'mode', 'duration_display',
+        'samples', 'downloads',
+    ]
+    list_filter = ['mode', 'rule']
+    search_fields = ['path', 'view_name']
+    fields = [
+        'rule', 'method', 'path', 'view_name', 'status_code', 'mode', 'duration_display',
+        'samples', 'downloads', 'summary_display', 'created_at',
+    ]
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('summary')
+
+    def get_urls(self):
+        info = self.opts.app_label, self.opts.model_name
+        urls = [
+            path(
+                '<path:object_id>/download/<str:kind>/',
+                self.admin_site.admin_view(self.download_view),
+                name='%s_%s_download' % info,
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def download_view(self, request, object_id, kind):
+        obj = self.get_object(request, unquote(object_id))
+        if obj is None or kind not in profiling.FILE_KINDS:
+            raise Http404
+        if not self.has_view_permission(request, obj):
+            raise PermissionDenied
+        file_path = profiling.files(obj).get(kind)
+        if file_path is None:
+            raise Http404
+        _, content_type = profiling.FILE_KINDS[kind]
+        return FileResponse(open(file_path, 'rb'), as_attachment=True, filename=file_path.name, content_type=content_type)
+
+    def delete_queryset(self, request, queryset):
+        # Fayllar ham o'chsin
+        for obj in queryset:
+            obj.delete()
+
+    def duration_display(self, obj):
+        return f"{obj.duration_ms:.1f} ms"
+
+    duration_display.short_description = 'Vaqt'
+
+    def downloads(self, obj):
+        info = self.opts.app_label, self.opts.model_name
+        links = [
+            (reverse('admin:%s_%s_download' % info, args=[obj.pk, kind]), kind)
+            for kind in profiling.files(obj)
+        ]
+        if not links:
+            return '—'
+        return format_html_join(' · ', '<a href="{}">{}</a>', links)
+
+    downloads.short_description = 'Fayllar'
+
+    def summary_display(self, obj):
+        return format_html(
+            '<pre style="max-height: 600px; overflow: auto; font-size: 12px;">{}</pre>',
+            obj.summary or '—',
+        )
+
+    summary_display.short_description = 'Qisqacha'
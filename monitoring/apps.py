@@ -0,0 +1,17 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+    verbose_name = "Monitoring"
+
+    def ready(self):
+        from django.conf import settings
+
+        if settings.SLOW_QUERY_MS:
+            from . import slow_queries
+            slow_queries.install()
+        if settings.METRICS_ENABLED:
+            from . import metrics
+            metrics.install()
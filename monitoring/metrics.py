@@ -0,0 +1,144 @@
+"""
+Prometheus metrikalari: GET /metrics.
+
+- http_request_duration_seconds{view, method, status} - so'rov vaqti
+  (view - URL nomi: check_telegram_user, telegram_user_detail, admin:... );
+- http_request_db_queries{view} - bitta so'rovdagi SQL lar soni,
+  http_request_db_seconds_total{view} - SQL vaqti;
+- cache_requests_total{result} - kesh hit / miss (hit ratio shulardan);
+- http_requests_throttled_total{view} - 429 bilan rad etilganlar;
+- background_queue_depth / background_queue_lag_seconds{queue} - fon
+  jarayonlarini kutayotgan ishlar soni va eng eskisining kechikishi
+  (scrape paytida bazadan hisoblanadi).
+
+So'rov metrikalari core.instrumentation kuzatuvchisi orqali yoziladi.
+Bir nechta worker jarayoni bo'lsa (gunicorn / uvicorn) PROMETHEUS_MULTIPROC_DIR
+bo'sh katalogga qo'yiladi: har bir jarayon qiymatlarini shu katalogdagi mmap
+fayllarga yozadi va bitta scrape butun serverni ko'rsatadi. Katalog har
+ishga tushishda tozalanishi, gunicorn konfigida esa
+`from monitoring.metrics import child_exit` bo'lishi kerak.
+"""
+import os
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+from core.instrumentation import add_request_observer
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    "So'rov vaqti",
+    ['view', 'method', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUEST_DB_QUERIES = Histogram(
+    'http_request_db_queries',
+    "Bitta so'rovdagi SQL lar soni",
+    ['view'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200),
+)
+REQUEST_DB_SECONDS = Counter('http_request_db_seconds', 'SQL vaqti', ['view'])
+CACHE_REQUESTS = Counter('cache_requests', "Kesh so'rovlari", ['result'])
+THROTTLED_REQUESTS = Counter('http_requests_throttled', "429 bilan rad etilgan so'rovlar", ['view'])
+
+
+def _view_name(request):
+    match = request.resolver_match
+    return match.view_name if match else 'unmatched'
+
+
+def observe_request(request, response, state):
+    view = _view_name(request)
+    status = f"{response.status_code // 100}xx"
+    REQUEST_LATENCY.labels(view, request.method, status).observe(state.total_time)
+    REQUEST_DB_QUERIES.labels(view).observe(state.queries)
+    if state.db_time:
+        REQUEST_DB_SECONDS.labels(view).inc(state.db_time)
+    if state.cache_hits:
+        CACHE_REQUESTS.labels('hit').inc(state.cache_hits)
+    if state.cache_misses:
+        CACHE_REQUESTS.labels('miss').inc(state.cache_misses)
+    if response.status_code == 429:
+        THROTTLED_REQUESTS.labels(view).inc()
+
+
+class QueueCollector:
+    """Fon navbatlari: run_pricing_jobs, run_price_schedules, expire_reservations"""
+
+    def collect(self):
+        from django.db.models import Case, Count, F, Min, Q, When
+        from django.db.models.functions import Coalesce
+        from django.utils import timezone
+
+        from web_app.models import PriceSchedule, PricingJob, StockReservation
+
+        now = timezone.now()
+        queues = {
+            'pricing_jobs': PricingJob.objects.filter(
+                Q(status='queued') & (Q(starts_at__isnull=True) | Q(starts_at__lte=now))
+                | Q(status='active', ends_at__lte=now)
+            ).aggregate(
+                depth=Count('id'),
+                oldest=Min(Case(
+                    When(status='active', then=F('ends_at')),
+                    default=Coalesce('starts_at', 'created_at'),
+                )),
+            ),
+            'price_schedules': PriceSchedule.objects.filter(
+                Q(status='pending', starts_at__lte=now) | Q(status='active', ends_at__lte=now)
+            ).aggregate(
+                depth=Count('id'),
+                oldest=Min(Case(When(status='active', then=F('ends_at')), default=F('starts_at'))),
+            ),
+            'stock_reservations': StockReservation.objects.filter(
+                status='active', expires_at__lte=now,
+            ).aggregate(depth=Count('id'), oldest=Min('expires_at')),
+        }
+
+        depth = GaugeMetricFamily('background_queue_depth', "Bajarilishi kerak bo'lgan ishlar", labels=['queue'])
+        lag = GaugeMetricFamily('background_queue_lag_seconds', 'Eng eski ishning kechikishi', labels=['queue'])
+        for name, row in queues.items():
+            depth.add_metric([name], row['depth'])
+            lag.add_metric([name], (now - row['oldest']).total_seconds() if row['oldest'] else 0)
+        yield depth
+        yield lag
+
+
+_queue_registry = CollectorRegistry()
+_queue_registry.register(QueueCollector())
+
+
+def _process_registry():
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        return HttpResponse(status=403)
+    output = generate_latest(_process_registry()) + generate_latest(_queue_registry)
+    return HttpResponse(output, content_type=CONTENT_TYPE_LATEST)
+
+
+def child_exit(server, worker):
+    """gunicorn hook: to'xtagan worker ning mmap fayllarini yopish"""
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def install():
+    add_request_observer(observe_request)
@@ -0,0 +1,127 @@
+import re
+
+from django.core.exceptions import ValidationError
+from django.db import models
+
+
+class SlowQuery(models.Model):
+    """Sekin SQL so'rovlar - normallashtirilgan ko'rinishi (fingerprint) bo'yicha jamlangan"""
+
+    fingerprint = models.CharField(max_length=40, unique=True, verbose_name="Fingerprint")
+    sql = models.TextField(verbose_name="SQL (normallashtirilgan)")
+    example = models.TextField(blank=True, verbose_name="Oxirgi SQL")
+    database = models.CharField(max_length=64, verbose_name="Baza")
+
+    calls = models.PositiveBigIntegerField(default=0, verbose_name="Sekin chaqiruvlar")
+    total_ms = models.FloatField(default=0, verbose_name="Jami vaqt (ms)")
+    max_ms = models.FloatField(default=0, verbose_name="Eng sekin (ms)")
+    p50_ms = models.FloatField(default=0, verbose_name="p50 (ms)")
+    p95_ms = models.FloatField(default=0, verbose_name="p95 (ms)")
+    # Oxirgi chaqiruvlar davomiyligi (p50 / p95 shular bo'yicha)
+    samples = models.JSONField(default=list, blank=True)
+
+    plan = models.JSONField(null=True, blank=True, verbose_name="EXPLAIN")
+    plan_captured_at = models.DateTimeField(null=True, blank=True, verbose_name="EXPLAIN olingan")
+
+    first_seen = models.DateTimeField(auto_now_add=True, verbose_name="Birinchi marta")
+    last_seen = models.DateTimeField(verbose_name="Oxirgi marta")
+
+    class Meta:
+        verbose_name = "Sekin so'rov"
+        verbose_name_plural = "Sekin so'rovlar"
+        ordering = ['-p95_ms']
+        indexes = [
+            models.Index(fields=['-last_seen']),
+        ]
+
+    def __str__(self):
+        return self.sql[:80]
+
+    @property
+    def avg_ms(self):
+        return self.total_ms / self.calls if self.calls else 0
+
+
+class ProfilingRule(models.Model):
+    """Qaysi so'rovlar profillanadi - ishlab turgan serverda yoqib / o'chirib qo'yiladi"""
+
+    MODE_CHOICES = [
+        ('sampling', 'Sampling (stek namunalari)'),
+        ('cprofile', 'cProfile (barcha chaqiruvlar)'),
+    ]
+
+    name = models.CharField(max_length=255, verbose_name="Nomi")
+    pattern = models.CharField(
+        max_length=255,
+        verbose_name="URL nomi / yo'li (regex)",
+        help_text="Masalan: ^telegram_user_detail$ yoki ^/admin/web_app/book/",
+    )
+    mode = models.CharField(max_length=20, choices=MODE_CHOICES, default='sampling', verbose_name="Usul")
+    sample_rate = models.FloatField(default=1.0, verbose_name="So'rovlar ulushi (0..1)")
+    interval_ms = models.PositiveIntegerField(default=5, verbose_name="Namuna oralig'i (ms)")
+    max_profiles = models.PositiveIntegerField(default=20, verbose_name="Ko'pi bilan profillar")
+    profiles_taken = models.PositiveIntegerField(default=0, verbose_name="Olingan profillar")
+    expires_at = models.DateTimeField(null=True, blank=True, verbose_name="Tugash vaqti")
+    is_active = models.BooleanField(default=True, verbose_name="Faol")
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Yangilangan")
+
+    class Meta:
+        verbose_name = "Profillash qoidasi"
+        verbose_name_plural = "Profillash qoidalari"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return self.name
+
+    def clean(self):
+        try:
+            re.compile(self.pattern)
+        except re.error as exc:
+            raise ValidationError({'pattern': f"Noto'g'ri regex: {exc}"})
+        if not 0 < self.sample_rate <= 1:
+            raise ValidationError({'sample_rate': "Ulush 0 dan katta va 1 dan oshmasligi kerak"})
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+
+        from .profiling import invalidate_rules
+        invalidate_rules()
+
+
+class Profile(models.Model):
+    """Bitta profillangan so'rov; fayllari PROFILING_DIR da"""
+
+    rule = models.ForeignKey(
+        ProfilingRule,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='profiles',
+        verbose_name="Qoida",
+    )
+    method = models.CharField(max_length=10, verbose_name="Metod")
+    path = models.CharField(max_length=500, verbose_name="Yo'l")
+    view_name = models.CharField(max_length=255, blank=True, verbose_name="URL nomi")
+    status_code = models.PositiveSmallIntegerField(verbose_name="Javob kodi")
+    mode = models.CharField(max_length=20, choices=ProfilingRule.MODE_CHOICES, verbose_name="Usul")
+    duration_ms = models.FloatField(verbose_name="Vaqt (ms)")
+    samples = models.PositiveIntegerField(default=0, verbose_name="Namunalar")
+    # Kengaytmasiz fayl nomi: <nom>.collapsed / .speedscope.json yoki <nom>.prof
+    file_name = models.CharField(max_length=255, verbose_name="Fayl")
+    summary = models.TextField(blank=True, verbose_name="Qisqacha")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan")
+
+    class Meta:
+        verbose_name = "Profil"
+        verbose_name_plural = "Profillar"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.view_name or self.path} ({self.duration_ms:.0f} ms)"
+
+    def delete(self, *args, **kwargs):
+        from .profiling import delete_files
+        delete_files(self)
+        return super().delete(*args, **kwargs)
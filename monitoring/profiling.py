@@ -0,0 +1,350 @@
+"""
+Ishlab turgan serverda so'rovlarni profillash (qayta deploy qilmasdan).
+
+Admin da ProfilingRule yaratiladi: URL nomi yoki yo'li bo'yicha regex, mos
+so'rovlarning qancha ulushi, usul va nechta profil olinadi. MIDDLEWARE
+oxiridagi ProfilingMiddleware mos so'rovning view ini - admin / DRF
+javobini render qilish bilan birga - profiler ichida chaqiradi:
+- sampling: alohida thread har interval_ms da view thread ining stekini
+  (sys._current_frames) yozib oladi, view kodiga deyarli ta'sir qilmaydi;
+  natija - collapsed stacks (flamegraph.pl) va speedscope JSON;
+- cprofile: barcha chaqiruvlar (sekinroq, lekin aniq) - .prof fayl
+  (pstats / snakeviz).
+Fayllar PROFILING_DIR ga yoziladi, Profile yozuvlari admin da ko'rinadi.
+Profillashdan oldin qoidadan bitta o'rin atomar UPDATE bilan band qilinadi -
+bir nechta worker bir vaqtda max_profiles dan ortiq profil olmaydi. View
+xato bilan tugasa (Http404, PermissionDenied, ...) ham profil saqlanadi.
+Qoidalar core.cache da turadi: faol qoida bo'lmasa so'rovga bitta lokal
+kesh o'qishi qo'shiladi, xolos. Middleware PROFILING_ENABLED bilan yoqiladi.
+"""
+import cProfile
+import io
+import json
+import logging
+import pstats
+import random
+import re
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import BadRequest, MiddlewareNotUsed, PermissionDenied, SuspiciousOperation
+from django.db.models import F, Q
+from django.http import Http404
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from core.cache import get_or_compute, invalidate_tags
+
+logger = logging.getLogger(__name__)
+
+RULES_KEY = 'profiling:rules'
+RULES_TAG = 'profiling_rules'
+RULES_CACHE_TIMEOUT = 30
+MAX_DEPTH = 128
+SUMMARY_LINES = 40
+
+# tur -> (kengaytma, content type)
+FILE_KINDS = {
+    'collapsed': ('.collapsed', 'text/plain'),
+    'speedscope': ('.speedscope.json', 'application/json'),
+    'prof': ('.prof', 'application/octet-stream'),
+}
+
+
+def invalidate_rules():
+    invalidate_tags(RULES_TAG)
+
+
+def _load_rules():
+    from .models import ProfilingRule
+
+    return list(
+        ProfilingRule.objects
+        .filter(is_active=True, profiles_taken__lt=F('max_profiles'))
+        .filter(Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now()))
+        .values('pk', 'pattern', 'mode', 'sample_rate', 'interval_ms', 'expires_at')
+    )
+
+
+def active_rules():
+    rules = get_or_compute(RULES_KEY, _load_rules, RULES_CACHE_TIMEOUT, tags=[RULES_TAG])
+    if not rules:
+        return rules
+    now = timezone.now()
+    return [rule for rule in rules if rule['expires_at'] is None or rule['expires_at'] > now]
+
+
+def claim_slot(rule):
+    """Qoidadan bitta profil o'rnini band qilish; o'rin qolmagan bo'lsa False"""
+    from .models import ProfilingRule
+
+    claimed = ProfilingRule.objects.filter(pk=rule['pk'], profiles_taken__lt=F('max_profiles')).update(
+        profiles_taken=F('profiles_taken') + 1,
+    )
+    invalidate_rules()
+    return bool(claimed)
+
+
+def match_rule(request, rules):
+    """So'rovga mos (va ulush bo'yicha tanlangan) qoida yoki None"""
+    match = request.resolver_match
+    view_name = match.view_name if match else ''
+    for rule in rules:
+        try:
+            matched = re.search(rule['pattern'], view_name) or re.search(rule['pattern'], request.path)
+        except re.error:
+            continue
+        if matched and random.random() < rule['sample_rate']:
+            return rule
+    return None
+
+
+# ============================================================================
+# SAMPLING
+# ============================================================================
+
+def _path_prefixes():
+    paths = sysconfig.get_paths()
+    prefixes = {str(settings.BASE_DIR), paths['purelib'], paths['platlib'], paths['stdlib']}
+    return sorted(prefixes, key=len, reverse=True)
+
+
+class StackSampler:
+    """Boshqa thread stekini interval soniyada bir yozib oluvchi profiler"""
+
+    def __init__(self, thread_id, interval, root_code=None):
+        self.thread_id = thread_id
+        self.interval = interval
+        # Stek shu funksiyadan yuqorisi (server, middleware) tashlab yoziladi
+        self.root_code = root_code
+        self.stacks = Counter()
+        self._names = {}
+        self._prefixes = _path_prefixes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profiling-sampler', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    @property
+    def samples(self):
+        return sum(self.stacks.values())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[self._stack(frame)] += 1
+
+    def _stack(self, frame):
+        stack = []
+        while frame is not None and len(stack) < MAX_DEPTH:
+            code = frame.f_code
+            if code is self.root_code:
+                break
+            stack.append(self._name(code))
+            frame = frame.f_back
+        return tuple(reversed(stack))
+
+    def _name(self, code):
+        name = self._names.get(code)
+        if name is None:
+            filename = code.co_filename
+            for prefix in self._prefixes:
+                if filename.startswith(prefix):
+                    filename = filename[len(prefix):].lstrip('/\\')
+                    break
+            qualname = getattr(code, 'co_qualname', code.co_name)
+            name = self._names[code] = f"{qualname} ({filename}:{code.co_firstlineno})"
+        return name
+
+
+def collapsed(stacks):
+    """flamegraph.pl formati: "a;b;c <soni>" """
+    return ''.join(f"{';'.join(stack)} {count}\n" for stack, count in stacks.most_common() if stack)
+
+
+def speedscope(stacks, interval, name):
+    frames, index = [], {}
+    samples, weights = [], []
+    for stack, count in stacks.items():
+        ids = []
+        for frame in stack:
+            if frame not in index:
+                index[frame] = len(frames)
+                frames.append({'name': frame})
+            ids.append(index[frame])
+        samples.append(ids)
+        weights.append(count * interval)
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'monitoring.profiling',
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled',
+            'name': name,
+            'unit': 'seconds',
+            'startValue': 0,
+            'endValue': sum(weights),
+            'samples': samples,
+            'weights': weights,
+        }],
+    }
+
+
+def sampling_summary(stacks):
+    """Eng ko'p namunada turgan funksiyalar: o'zi (self) va ichidagilar bilan (total)"""
+    total = sum(stacks.values()) or 1
+    own, inclusive = Counter(), Counter()
+    for stack, count in stacks.items():
+        if not stack:
+            continue
+        own[stack[-1]] += count
+        for frame in set(stack):
+            inclusive[frame] += count
+    lines = [f"{'self':>6} {'total':>6}  funksiya"]
+    for frame, count in own.most_common(SUMMARY_LINES):
+        lines.append(f"{count * 100 / total:5.1f}% {inclusive[frame] * 100 / total:5.1f}%  {frame}")
+    return '\n'.join(lines)
+
+
+def cprofile_summary(profiler):
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(SUMMARY_LINES)
+    return output.getvalue()
+
+
+# ============================================================================
+# FAYLLAR VA MIDDLEWARE
+# ============================================================================
+
+def profile_dir():
+    return Path(settings.PROFILING_DIR)
+
+
+def files(profile):
+    """{tur: yo'l} - diskda bor fayllar"""
+    found = {}
+    for kind, (extension, _) in FILE_KINDS.items():
+        path = profile_dir() / f"{profile.file_name}{extension}"
+        if path.exists():
+            found[kind] = path
+    return found
+
+
+def delete_files(profile):
+    for path in files(profile).values():
+        path.unlink(missing_ok=True)
+
+
+def _call_view(request, view_func, view_args, view_kwargs):
+    response = view_func(request, *view_args, **view_kwargs)
+    # Admin / DRF javoblari keyinroq render qilinadi - HTML / JSON yig'ish ham profilga tushsin
+    if callable(getattr(response, 'render', None)) and not response.is_rendered:
+        response = response.render()
+    return response
+
+
+def exception_status(exc):
+    """View dan chiqqan xato Django da qanday javobga aylanadi"""
+    if isinstance(exc, Http404):
+        return 404
+    if isinstance(exc, PermissionDenied):
+        return 403
+    if isinstance(exc, (BadRequest, SuspiciousOperation)):
+        return 400
+    return 500
+
+
+def save_profile(rule, request, status_code, duration, sampler=None, profiler=None):
+    from .models import Profile
+
+    match = request.resolver_match
+    view_name = match.view_name if match else ''
+    slug = re.sub(r'[^A-Za-z0-9_-]+', '_', view_name or request.path).strip('_')[:60]
+    file_name = f"{timezone.now():%Y%m%d-%H%M%S}-{slug}-{get_random_string(6)}"
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+
+    if sampler is not None:
+        (directory / f"{file_name}.collapsed").write_text(collapsed(sampler.stacks))
+        document = speedscope(sampler.stacks, sampler.interval, f"{request.method} {request.path}")
+        (directory / f"{file_name}.speedscope.json").write_text(json.dumps(document))
+        summary, samples = sampling_summary(sampler.stacks), sampler.samples
+    else:
+        profiler.dump_stats(directory / f"{file_name}.prof")
+        summary, samples = cprofile_summary(profiler), 0
+
+    Profile.objects.create(
+        rule_id=rule['pk'],
+        method=request.method,
+        path=request.path[:500],
+        view_name=view_name,
+        status_code=status_code,
+        mode=rule['mode'],
+        duration_ms=duration * 1000,
+        samples=samples,
+        file_name=file_name,
+        summary=summary,
+    )
+
+
+def profile_view(rule, request, view_func, view_args, view_kwargs):
+    sampler = profiler = None
+    status_code = 500
+    started = time.perf_counter()
+    try:
+        if rule['mode'] == 'cprofile':
+            profiler = cProfile.Profile()
+            response = profiler.runcall(_call_view, request, view_func, view_args, view_kwargs)
+        else:
+            interval = rule['interval_ms'] / 1000
+            sampler = StackSampler(threading.get_ident(), interval, root_code=_call_view.__code__)
+            with sampler:
+                response = _call_view(request, view_func, view_args, view_kwargs)
+        status_code = response.status_code
+        return response
+    except Exception as exc:
+        status_code = exception_status(exc)
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        try:
+            save_profile(rule, request, status_code, duration, sampler=sampler, profiler=profiler)
+        except Exception:
+            logger.exception("Profilni saqlab bo'lmadi: %s", request.path)
+
+
+class ProfilingMiddleware:
+    """MIDDLEWARE oxirida turadi - view ni o'zi profiler ichida chaqiradi"""
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if iscoroutinefunction(view_func):
+            return None
+        rules = active_rules()
+        if not rules:
+            return None
+        rule = match_rule(request, rules)
+        if rule is None or not claim_slot(rule):
+            return None
+        return profile_view(rule, request, view_func, view_args, view_kwargs)
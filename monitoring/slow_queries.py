@@ -0,0 +1,198 @@
+"""
+Sekin SQL so'rovlarni yig'ish va EXPLAIN rejalari.
+
+core.instrumentation dagi execute_wrapper har bir so'rovdan keyin _on_query
+ni chaqiradi: SLOW_QUERY_MS dan sekin so'rovlar (SLOW_QUERY_SAMPLE_RATE
+ulushi) cheklangan navbatga qo'yiladi - so'rovning o'zida bundan boshqa ish
+yo'q. Har bir jarayondagi fon thread navbatni qismlab oladi:
+- SQL ni normallashtiradi (qiymatlar, IN (...) ro'yxatlari olib tashlanadi)
+  va fingerprint bo'yicha guruhlaydi;
+- fingerprint uchun PLAN_INTERVAL da bir marta shu bazada
+  `EXPLAIN (ANALYZE off, FORMAT JSON)` oladi (so'rov bajarilmaydi);
+- SlowQuery yozuvidagi hisoblagichlar, p50 / p95 va rejani yangilaydi.
+Navbat to'lib qolsa yangi yozuvlar tashlab yuboriladi - so'rovlar kutmaydi.
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+import queue
+import random
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.utils import timezone
+
+from core.instrumentation import add_query_listener
+
+from .models import SlowQuery
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 1000
+BATCH_SIZE = 100
+# p50 / p95 shuncha oxirgi chaqiruv bo'yicha
+SAMPLE_SIZE = 200
+# Bitta fingerprint uchun EXPLAIN oralig'i (soniya)
+PLAN_INTERVAL = 10 * 60
+
+_queue = queue.Queue(maxsize=QUEUE_SIZE)
+_worker = None
+_worker_pid = None
+_worker_lock = threading.Lock()
+# fingerprint -> oxirgi EXPLAIN vaqti (time.monotonic)
+_explained = {}
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\?")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_VALUES = re.compile(r"\bVALUES\s*\(.*\)", re.IGNORECASE | re.DOTALL)
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(sql):
+    """Qiymatlarsiz SQL: bir xil so'rovlar bir xil matnga keladi"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _VALUES.sub('VALUES (...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    if not ordered:
+        return 0
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def _on_query(connection, sql, params, many, duration):
+    if duration * 1000 < settings.SLOW_QUERY_MS:
+        return
+    # EXPLAIN va SlowQuery yozuvlarining o'zi qayd qilinmaydi
+    if threading.current_thread() is _worker:
+        return
+    if random.random() >= settings.SLOW_QUERY_SAMPLE_RATE:
+        return
+    try:
+        _queue.put_nowait((connection.alias, sql, None if many else params, duration * 1000, timezone.now()))
+    except queue.Full:
+        return
+    _ensure_worker()
+
+
+def _ensure_worker():
+    global _worker, _worker_pid
+    if _worker is not None and _worker_pid == os.getpid() and _worker.is_alive():
+        return
+    with _worker_lock:
+        if _worker is not None and _worker_pid == os.getpid() and _worker.is_alive():
+            return
+        _worker = threading.Thread(target=_run, name='slow-query-explain', daemon=True)
+        _worker_pid = os.getpid()
+        _worker.start()
+
+
+def _run():
+    while True:
+        batch = [_queue.get()]
+        while len(batch) < BATCH_SIZE:
+            try:
+                batch.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            process(batch)
+        except Exception:
+            logger.exception("Sekin so'rovlarni saqlab bo'lmadi")
+        finally:
+            # Navbat bo'sh turganda ulanish band qilib turilmasin
+            connections.close_all()
+
+
+def process(batch):
+    """Navbatdagi (alias, sql, params, ms, vaqt) yozuvlarini fingerprint bo'yicha saqlash"""
+    groups = {}
+    for alias, sql, params, duration, seen_at in batch:
+        normalized = normalize(sql)
+        group = groups.setdefault(fingerprint(normalized), {'alias': alias, 'sql': normalized, 'durations': []})
+        group['durations'].append(duration)
+        group.update(example=sql, params=params, seen_at=seen_at)
+
+    for key, group in groups.items():
+        plan = None
+        now = time.monotonic()
+        if now - _explained.get(key, -PLAN_INTERVAL) >= PLAN_INTERVAL:
+            plan = explain(group['alias'], group['example'], group['params'])
+            if plan is not None:
+                _explained[key] = now
+        _store(key, group, plan)
+
+
+def explain(alias, sql, params):
+    """Rejani olish (faqat SELECT; params yo'q - executemany bo'lsa None)"""
+    if params is None or not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return None
+    connection = connections[alias]
+    if connection.vendor == 'postgresql':
+        prefix = 'EXPLAIN (ANALYZE off, FORMAT JSON)'
+    elif connection.vendor == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN'
+    else:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"{prefix} {sql}", params)
+            rows = cursor.fetchall()
+    except Exception:
+        logger.warning("EXPLAIN bajarilmadi: %s", sql[:200], exc_info=True)
+        return None
+    if connection.vendor == 'postgresql':
+        plan = rows[0][0]
+        return json.loads(plan) if isinstance(plan, str) else plan
+    return [list(row) for row in rows]
+
+
+def _store(key, group, plan):
+    durations = group['durations']
+    with transaction.atomic():
+        query = SlowQuery.objects.select_for_update().filter(fingerprint=key).first()
+        if query is None:
+            try:
+                with transaction.atomic():
+                    query = SlowQuery.objects.create(
+                        fingerprint=key,
+                        sql=group['sql'],
+                        database=group['alias'],
+                        last_seen=group['seen_at'],
+                    )
+            except IntegrityError:
+                # Boshqa jarayon bir vaqtda yaratdi
+                query = SlowQuery.objects.select_for_update().get(fingerprint=key)
+
+        query.calls += len(durations)
+        query.total_ms += sum(durations)
+        query.max_ms = max(query.max_ms, *durations)
+        query.samples = (query.samples + [round(value, 2) for value in durations])[-SAMPLE_SIZE:]
+        query.p50_ms = percentile(query.samples, 50)
+        query.p95_ms = percentile(query.samples, 95)
+        query.example = group['example']
+        query.last_seen = max(query.last_seen, group['seen_at'])
+        if plan is not None:
+            query.plan = plan
+            query.plan_captured_at = timezone.now()
+        query.save()
+
+
+def install():
+    add_query_listener(_on_query)
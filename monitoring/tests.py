@@ -0,0 +1,179 @@
+import queue
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.http import Http404, HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import resolve
+from django.utils import timezone
+
+from core import instrumentation
+from core.tests import TEST_CACHES
+
+from . import metrics, profiling, slow_queries
+from .models import Profile, ProfilingRule, SlowQuery
+
+
+@override_settings(CACHES=TEST_CACHES, PROFILING_ENABLED=True)
+class ProfilingTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings_override = override_settings(PROFILING_DIR=directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def create_rule(self, **fields):
+        fields.setdefault('mode', 'cprofile')
+        return ProfilingRule.objects.create(name='Test', pattern='^check_telegram_user$', **fields)
+
+    def test_slots_are_claimed_atomically(self):
+        rule = self.create_rule(max_profiles=2)
+        values = {'pk': rule.pk}
+        self.assertTrue(profiling.claim_slot(values))
+        self.assertTrue(profiling.claim_slot(values))
+        self.assertFalse(profiling.claim_slot(values))
+        rule.refresh_from_db()
+        self.assertEqual(rule.profiles_taken, 2)
+        self.assertEqual(profiling.active_rules(), [])
+
+    def test_middleware_stops_at_max_profiles(self):
+        rule = self.create_rule(max_profiles=1)
+        for _ in range(3):
+            self.client.get('/tg_bot/api/check-user/1/')
+        self.assertEqual(Profile.objects.filter(rule=rule).count(), 1)
+        rule.refresh_from_db()
+        self.assertEqual(rule.profiles_taken, 1)
+
+    def test_failing_view_is_saved(self):
+        rule = self.create_rule()
+        values = ProfilingRule.objects.values('pk', 'pattern', 'mode', 'sample_rate', 'interval_ms').get(pk=rule.pk)
+        request = RequestFactory().get('/missing/')
+        request.resolver_match = None
+
+        def view(request):
+            raise Http404
+
+        for mode in ('cprofile', 'sampling'):
+            with self.subTest(mode=mode), self.assertRaises(Http404):
+                profiling.profile_view({**values, 'mode': mode}, request, view, (), {})
+        self.assertEqual(list(Profile.objects.values_list('status_code', flat=True)), [404, 404])
+
+    def test_response_status_is_saved(self):
+        rule = self.create_rule(mode='sampling', interval_ms=1)
+        values = ProfilingRule.objects.values('pk', 'pattern', 'mode', 'sample_rate', 'interval_ms').get(pk=rule.pk)
+        request = RequestFactory().get('/created/')
+        request.resolver_match = None
+        response = profiling.profile_view(values, request, lambda request: HttpResponse(status=201), (), {})
+        self.assertEqual(response.status_code, 201)
+        profile = Profile.objects.get()
+        self.assertEqual(profile.status_code, 201)
+        self.assertIn('collapsed', profiling.files(profile))
+
+
+class SlowQueryTests(TestCase):
+
+    def setUp(self):
+        slow_queries._explained.clear()
+        self.addCleanup(slow_queries._explained.clear)
+
+    def test_normalize_groups_by_shape(self):
+        first = slow_queries.normalize("SELECT * FROM book WHERE title = 'O''tgan kunlar' AND id IN (1, 2, 3)")
+        second = slow_queries.normalize("SELECT *  FROM book\nWHERE title = %s AND id IN (%s, %s)")
+        self.assertEqual(first, 'SELECT * FROM book WHERE title = ? AND id IN (...)')
+        self.assertEqual(first, second)
+        self.assertEqual(slow_queries.normalize('INSERT INTO book (a, b) VALUES (%s, %s), (%s, %s)'),
+                         'INSERT INTO book (a, b) VALUES (...)')
+        self.assertEqual(slow_queries.fingerprint(first), slow_queries.fingerprint(second))
+        self.assertNotEqual(slow_queries.fingerprint(first), slow_queries.fingerprint('SELECT * FROM author'))
+
+    def batch(self, durations):
+        now = timezone.now()
+        return [
+            ('default', f'SELECT * FROM monitoring_slowquery WHERE id = {i}', (), float(duration), now)
+            for i, duration in enumerate(durations)
+        ]
+
+    def test_store_aggregates_calls_and_percentiles(self):
+        slow_queries.process(self.batch(range(1, 21)))
+        query = SlowQuery.objects.get()
+        self.assertEqual(query.sql, 'SELECT * FROM monitoring_slowquery WHERE id = ?')
+        self.assertEqual((query.calls, query.total_ms, query.max_ms), (20, 210, 20))
+        self.assertEqual((query.p50_ms, query.p95_ms), (10, 19))
+        self.assertIsNotNone(query.plan)
+        plan_captured_at = query.plan_captured_at
+
+        with mock.patch.object(slow_queries, 'SAMPLE_SIZE', 25):
+            slow_queries.process(self.batch([100] * 10))
+        query.refresh_from_db()
+        self.assertEqual((query.calls, query.max_ms, len(query.samples)), (30, 100, 25))
+        self.assertEqual((query.p50_ms, query.p95_ms), (18, 100))
+        # Reja PLAN_INTERVAL da bir marta olinadi
+        self.assertEqual(query.plan_captured_at, plan_captured_at)
+
+    @override_settings(SLOW_QUERY_MS=100, SLOW_QUERY_SAMPLE_RATE=1.0)
+    def test_only_slow_queries_are_queued(self):
+        with mock.patch.object(slow_queries, '_queue', queue.Queue()) as pending, \
+                mock.patch.object(slow_queries, '_ensure_worker') as ensure_worker:
+            slow_queries._on_query(connection, 'SELECT 1', (), False, 0.05)
+            slow_queries._on_query(connection, 'SELECT 2', (1,), False, 0.2)
+            slow_queries._on_query(connection, 'INSERT 3', [(1,), (2,)], True, 0.3)
+            with override_settings(SLOW_QUERY_SAMPLE_RATE=0):
+                slow_queries._on_query(connection, 'SELECT 4', (), False, 0.3)
+        queued = [pending.get_nowait() for _ in range(pending.qsize())]
+        self.assertEqual([(sql, params) for _, sql, params, _, _ in queued], [('SELECT 2', (1,)), ('INSERT 3', None)])
+        self.assertEqual(ensure_worker.call_count, 2)
+
+
+class MetricsTests(TestCase):
+
+    def sample(self, name, **labels):
+        return metrics.REGISTRY.get_sample_value(name, labels) or 0
+
+    def observe(self, path, status):
+        request = RequestFactory().get(path)
+        request.resolver_match = resolve(path) if path.startswith('/tg_bot/') else None
+        state = instrumentation.RequestMetrics()
+        state.queries, state.db_time, state.cache_hits, state.cache_misses = 3, 0.5, 2, 1
+        metrics.observe_request(request, HttpResponse(status=status), state)
+
+    def counters(self):
+        view = 'check_telegram_user'
+        return {
+            'latency': self.sample('http_request_duration_seconds_count', view=view, method='GET', status='4xx'),
+            'queries': self.sample('http_request_db_queries_sum', view=view),
+            'db': self.sample('http_request_db_seconds_total', view=view),
+            'hits': self.sample('cache_requests_total', result='hit'),
+            'throttled': self.sample('http_requests_throttled_total', view=view),
+            'unmatched': self.sample('http_request_duration_seconds_count', view='unmatched', method='GET', status='2xx'),
+        }
+
+    def test_observe_request_labels(self):
+        before = self.counters()
+        self.observe('/tg_bot/api/check-user/1/', 429)
+        self.observe('/missing/', 200)
+        after = self.counters()
+        self.assertEqual(
+            {key: after[key] - before[key] for key in after},
+            {'latency': 1, 'queries': 3, 'db': 0.5, 'hits': 4, 'throttled': 1, 'unmatched': 1},
+        )
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_view_checks_token(self):
+        factory = RequestFactory()
+        for headers in ({}, {'Authorization': 'Bearer wrong'}, {'Authorization': 'secret'}):
+            with self.subTest(headers=headers):
+                self.assertEqual(metrics.metrics_view(factory.get('/metrics', headers=headers)).status_code, 403)
+
+        response = metrics.metrics_view(factory.get('/metrics', headers={'Authorization': 'Bearer secret'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'background_queue_depth{queue="pricing_jobs"} 0.0', response.content)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_metrics_view_without_token(self):
+        self.assertEqual(metrics.metrics_view(RequestFactory().get('/metrics')).status_code, 200)
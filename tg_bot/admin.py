@@ -1,13 +1,22 @@
 # admin.py
 from django.contrib import admin
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils.html import format_html
+
+from core.exports import ExportActionsMixin
+from core.pagination import EstimatedCountAdminMixin
+
+from . import exports, stats, users
 from .models import TelegramUser, Feedback
 
 
 @admin.register(TelegramUser)
-class TelegramUserAdmin(admin.ModelAdmin):
+class TelegramUserAdmin(EstimatedCountAdminMixin, ExportActionsMixin, admin.ModelAdmin):
     """Администрирование пользователей Telegram"""
 
+    export_spec = exports.TELEGRAM_USERS
+
     list_display = [
         'telegram_id_display',
         'full_name',
@@ -55,7 +64,7 @@ class TelegramUserAdmin(admin.ModelAdmin):
 
     list_per_page = 25
     ordering = ['-created_at']
-    actions = ['activate_users', 'deactivate_users']
+    actions = ['activate_users', 'deactivate_users', 'export_as_csv', 'export_as_jsonl']
 
     @admin.display(description='Telegram ID', ordering='telegram_id')
     def telegram_id_display(self, obj):
@@ -79,9 +88,9 @@ class TelegramUserAdmin(admin.ModelAdmin):
             )
         return format_html('<span style="color: #999; font-style: italic;">username yo\'q</span>')
 
-    @admin.display(description='Fikrlar soni')
+    @admin.display(description='Fikrlar soni', ordering='_feedbacks_count')
     def feedbacks_count(self, obj):
-        count = obj.feedbacks.count()
+        count = obj._feedbacks_count
         if count > 0:
             return format_html(
                 '<span style="background: #4caf50; color: white; padding: 3px 10px; '
@@ -117,25 +126,31 @@ class TelegramUserAdmin(admin.ModelAdmin):
 
     @admin.action(description="✅ Tanlangan foydalanuvchilarni faollashtirish")
     def activate_users(self, request, queryset):
+        telegram_ids = list(queryset.values_list('telegram_id', flat=True))
         updated = queryset.update(is_active=True)
+        users.invalidate_users(telegram_ids)
+        stats.invalidate_user_stats()
         self.message_user(request, f'Faollashtirildi: {updated} foydalanuvchi', level='success')
 
     @admin.action(description="❌ Tanlangan foydalanuvchilarni o'chirish")
     def deactivate_users(self, request, queryset):
+        telegram_ids = list(queryset.values_list('telegram_id', flat=True))
         updated = queryset.update(is_active=False)
+        users.invalidate_users(telegram_ids)
+        stats.invalidate_user_stats()
         self.message_user(request, f"O'chirildi: {updated} foydalanuvchi", level='warning')
 
+    def get_queryset(self, request):
+        # JOIN + GROUP BY emas, bog'liq subquery: eksport amallari (values_list) uni umuman tanlamaydi
+        feedbacks = (
+            Feedback.objects.filter(user=OuterRef('pk')).order_by()
+            .values('user').annotate(count=Count('pk')).values('count')
+        )
+        return super().get_queryset(request).annotate(_feedbacks_count=Coalesce(Subquery(feedbacks), 0))
+
     def changelist_view(self, request, extra_context=None):
         extra_context = extra_context or {}
-        total = TelegramUser.objects.count()
-        active = TelegramUser.objects.filter(is_active=True).count()
-        inactive = TelegramUser.objects.filter(is_active=False).count()
-
-        extra_context['stats'] = {
-            'total': total,
-            'active': active,
-            'inactive': inactive
-        }
+        extra_context['stats'] = stats.user_stats()
         return super().changelist_view(request, extra_context=extra_context)
 
     class Media:
@@ -143,9 +158,11 @@ class TelegramUserAdmin(admin.ModelAdmin):
 
 
 @admin.register(Feedback)
-class FeedbackAdmin(admin.ModelAdmin):
+class FeedbackAdmin(EstimatedCountAdminMixin, ExportActionsMixin, admin.ModelAdmin):
     """Администрирование отзывов"""
 
+    export_spec = exports.FEEDBACK
+
     list_display = [
         'id_display',
         'user_display',
@@ -183,7 +200,9 @@ class FeedbackAdmin(admin.ModelAdmin):
     )
 
     list_per_page = 25
+    list_select_related = ['user']
     ordering = ['-created_at']
+    actions = ['export_as_csv', 'export_as_jsonl']
 
     @admin.display(description='ID', ordering='id')
     def id_display(self, obj):
@@ -238,11 +257,7 @@ class FeedbackAdmin(admin.ModelAdmin):
 
     def changelist_view(self, request, extra_context=None):
         extra_context = extra_context or {}
-        total = Feedback.objects.count()
-
-        extra_context['feedback_stats'] = {
-            'total': total,
-        }
+        extra_context['feedback_stats'] = stats.feedback_stats()
         return super().changelist_view(request, extra_context=extra_context)
 
     class Media:
@@ -0,0 +1,27 @@
+from core.exports import Column, ExportSpec
+
+from .models import Feedback, TelegramUser
+
+TELEGRAM_USERS = ExportSpec('telegram_users', [
+    Column('telegram_id', 'telegram_id'),
+    Column('full_name', 'full_name'),
+    Column('username', 'username'),
+    Column('phone_number', 'phone_number'),
+    Column('is_active', 'is_active'),
+    Column('created_at', 'created_at'),
+    Column('updated_at', 'updated_at'),
+])
+
+FEEDBACK = ExportSpec('feedback', [
+    Column('id', 'id'),
+    Column('telegram_id', 'user__telegram_id'),
+    Column('full_name', 'user__full_name'),
+    Column('username', 'user__username'),
+    Column('message', 'message'),
+    Column('created_at', 'created_at'),
+])
+
+EXPORTS = {
+    'users': (TELEGRAM_USERS, TelegramUser),
+    'feedback': (FEEDBACK, Feedback),
+}
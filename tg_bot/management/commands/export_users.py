@@ -0,0 +1,8 @@
+from core.exports import BaseExportCommand
+
+from tg_bot.exports import EXPORTS
+
+
+class Command(BaseExportCommand):
+    help = "Telegram foydalanuvchilari yoki fikr-mulohazalarni CSV / JSONL ga eksport qilish"
+    exports = EXPORTS
@@ -57,6 +57,23 @@ class TelegramUser(models.Model):
     def __str__(self):
         return f"{self.full_name} (@{self.username or self.telegram_id})"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+
+        from .stats import invalidate_user_stats
+        from .users import invalidate_users
+        invalidate_users([self.telegram_id])
+        invalidate_user_stats()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+
+        from .stats import invalidate_user_stats
+        from .users import invalidate_users
+        invalidate_users([self.telegram_id])
+        invalidate_user_stats()
+        return result
+
 
 class Feedback(models.Model):
     """Модель отзывов пользователей"""
@@ -83,4 +100,13 @@ class Feedback(models.Model):
         ordering = ['-created_at']
 
     def __str__(self):
-        return f"{self.user.full_name} - {self.created_at.strftime('%d.%m.%Y %H:%M')}"
\ No newline at end of file
+        return f"{self.user.full_name} - {self.created_at.strftime('%d.%m.%Y %H:%M')}"
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+
+        # feedbacks_count o'zgardi
+        from .stats import invalidate_feedback_stats
+        from .users import invalidate_users
+        invalidate_users([self.user.telegram_id])
+        invalidate_feedback_stats()
@@ -0,0 +1,60 @@
+"""
+TelegramUserAdmin / FeedbackAdmin sarlavhasidagi ko'rsatkichlar.
+
+Barcha sonlar bitta shartli aggregate bilan hisoblanadi va qisqa muddat
+keshlanadi (core.cache, 'tg_users' / 'tg_feedback' teglari). Juda katta jadvallarda (PostgreSQL) esa COUNT o'rniga
+statistika asosidagi taxminiy qiymatlar ishlatiladi.
+"""
+from django.db.models import Count, Q
+
+from core.cache import get_or_compute, invalidate_tags
+from core.db_stats import is_large, query_estimate
+
+from .models import Feedback, TelegramUser
+
+STATS_CACHE_TIMEOUT = 60
+USER_STATS_KEY = 'tg_bot:stats:users'
+FEEDBACK_STATS_KEY = 'tg_bot:stats:feedback'
+USERS_TAG = 'tg_users'
+FEEDBACK_TAG = 'tg_feedback'
+
+
+def _user_stats():
+    total = is_large(TelegramUser)
+    active = query_estimate(TelegramUser.objects.filter(is_active=True)) if total else None
+    if total and active is not None:
+        active = min(active, total)
+        stats = {'total': total, 'active': active, 'inactive': total - active, 'estimated': True}
+    else:
+        stats = TelegramUser.objects.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(is_active=True)),
+            inactive=Count('id', filter=Q(is_active=False)),
+        )
+        stats['estimated'] = False
+    return stats
+
+
+def user_stats():
+    """{'total', 'active', 'inactive', 'estimated'}"""
+    return get_or_compute(USER_STATS_KEY, _user_stats, STATS_CACHE_TIMEOUT, tags=[USERS_TAG])
+
+
+def _feedback_stats():
+    total = is_large(Feedback)
+    if total:
+        return {'total': total, 'estimated': True}
+    return {'total': Feedback.objects.count(), 'estimated': False}
+
+
+def feedback_stats():
+    """{'total', 'estimated'}"""
+    return get_or_compute(FEEDBACK_STATS_KEY, _feedback_stats, STATS_CACHE_TIMEOUT, tags=[FEEDBACK_TAG])
+
+
+def invalidate_user_stats():
+    invalidate_tags(USERS_TAG)
+
+
+def invalidate_feedback_stats():
+    invalidate_tags(FEEDBACK_TAG)
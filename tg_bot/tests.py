@@ -1,3 +1,164 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib import admin
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import db_stats
+from core.tests import TEST_CACHES
+
+from . import stats
+from .models import Feedback, TelegramUser
+
+
+@override_settings(CACHES=TEST_CACHES)
+class AdminTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.admin)
+
+    def assertChangelistQueriesConstant(self, model, page_sizes=(5, 25)):
+        """Changelist sahifasidagi SQL so'rovlar soni sahifa hajmiga bog'liq emas"""
+        model_admin = admin.site._registry[model]
+        url = reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+        expected = None
+        for size in page_sizes:
+            with mock.patch.object(model_admin, 'list_per_page', size):
+                # Birinchi so'rov keshlarni isitadi
+                self.client.get(url)
+                if expected is None:
+                    with CaptureQueriesContext(connection) as queries:
+                        response = self.client.get(url)
+                    expected = len(queries)
+                else:
+                    with self.assertNumQueries(expected):
+                        response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.context['cl'].result_list), size)
+
+
+class EstimatedChangeListTests(AdminTestCase):
+
+    def test_out_of_range_page_redirects(self):
+        TelegramUser.objects.bulk_create(
+            TelegramUser(telegram_id=i, full_name=f'User {i}', phone_number='+998901234567')
+            for i in range(1, 121)
+        )
+        response = self.client.get('/admin/tg_bot/telegramuser/', {'p': 999})
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('e=1', response['Location'])
+
+    def test_only_unfiltered_count_is_estimated(self):
+        TelegramUser.objects.bulk_create(
+            TelegramUser(telegram_id=i, full_name=f'User {i}', phone_number='+998901234567', is_active=i % 2)
+            for i in range(1, 11)
+        )
+        with mock.patch('core.pagination.table_estimate', return_value=500_000):
+            response = self.client.get('/admin/tg_bot/telegramuser/')
+            cl = response.context['cl']
+            self.assertEqual((cl.result_count, cl.result_count_is_estimated), (500_000, True))
+            self.assertContains(response, '≈500000')
+
+            response = self.client.get('/admin/tg_bot/telegramuser/', {'is_active__exact': '1', 'q': 'User'})
+            cl = response.context['cl']
+            self.assertEqual((cl.result_count, cl.result_count_is_estimated), (5, False))
+            self.assertEqual((cl.full_result_count, cl.full_result_count_is_estimated), (500_000, True))
+            self.assertContains(response, '≈500000 total')
+
+
+class ChangelistQueryTests(AdminTestCase):
+
+    def setUp(self):
+        super().setUp()
+        users = TelegramUser.objects.bulk_create(
+            TelegramUser(telegram_id=i, full_name=f'User {i}', phone_number='+998901234567')
+            for i in range(1, 31)
+        )
+        Feedback.objects.bulk_create(
+            Feedback(user=user, message=f'Fikr {i}') for user in users for i in range(user.telegram_id % 3)
+        )
+        Feedback.objects.bulk_create(Feedback(user=users[0], message=f'Fikr {i}') for i in range(30))
+
+    def test_telegram_user_changelist(self):
+        self.assertChangelistQueriesConstant(TelegramUser)
+
+    def test_feedback_changelist(self):
+        self.assertChangelistQueriesConstant(Feedback)
+
+
+class ExportTests(AdminTestCase):
+
+    def test_export_skips_changelist_annotations(self):
+        user = TelegramUser.objects.create(telegram_id=1, full_name='User', phone_number='+998901234567')
+        Feedback.objects.create(user=user, message='Rahmat')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/admin/tg_bot/telegramuser/?o=-5', {
+                'action': 'export_as_csv',
+                'select_across': '1',
+                'index': '0',
+                ACTION_CHECKBOX_NAME: [user.pk],
+            })
+            content = b''.join(response.streaming_content).decode()
+        self.assertIn('User', content)
+        export_sql = [query['sql'] for query in queries if 'tg_bot_telegramuser' in query['sql']][-1]
+        self.assertNotIn('tg_bot_feedback', export_sql)
+        self.assertNotIn('GROUP BY', export_sql)
+
+
+class StatsTests(AdminTestCase):
+
+    def setUp(self):
+        super().setUp()
+        TelegramUser.objects.bulk_create(
+            TelegramUser(telegram_id=i, full_name=f'User {i}', phone_number='+998901234567', is_active=i <= 3)
+            for i in range(1, 6)
+        )
+
+    def test_user_stats_cached_until_users_change(self):
+        expected = {'total': 5, 'active': 3, 'inactive': 2, 'estimated': False}
+        with self.assertNumQueries(1):
+            self.assertEqual(stats.user_stats(), expected)
+        with self.assertNumQueries(0):
+            self.assertEqual(stats.user_stats(), expected)
+
+        self.client.post('/admin/tg_bot/telegramuser/', {
+            'action': 'activate_users',
+            ACTION_CHECKBOX_NAME: list(TelegramUser.objects.values_list('pk', flat=True)),
+        })
+        self.assertEqual(stats.user_stats()['active'], 5)
+
+        TelegramUser.objects.create(telegram_id=6, full_name='User 6', phone_number='+998901234567')
+        self.assertEqual(stats.user_stats()['total'], 6)
+        TelegramUser.objects.get(telegram_id=6).delete()
+        self.assertEqual(stats.user_stats()['total'], 5)
+
+    def test_feedback_stats_cached_until_feedback_saved(self):
+        self.assertEqual(stats.feedback_stats(), {'total': 0, 'estimated': False})
+        Feedback.objects.create(user=TelegramUser.objects.get(telegram_id=1), message='Rahmat')
+        with self.assertNumQueries(1):
+            self.assertEqual(stats.feedback_stats(), {'total': 1, 'estimated': False})
+
+    def test_large_tables_use_estimates(self):
+        with mock.patch.object(stats, 'is_large', return_value=200_000), \
+                mock.patch.object(stats, 'query_estimate', return_value=250_000):
+            with self.assertNumQueries(0):
+                user_stats = stats.user_stats()
+                feedback_stats = stats.feedback_stats()
+        # Taxminiy faollar soni jami sondan oshmaydi
+        self.assertEqual(user_stats, {'total': 200_000, 'active': 200_000, 'inactive': 0, 'estimated': True})
+        self.assertEqual(feedback_stats, {'total': 200_000, 'estimated': True})
+
+    def test_estimates_fall_back_to_count(self):
+        # SQLite da statistikalar yo'q
+        self.assertIsNone(db_stats.table_estimate(TelegramUser))
+        self.assertIsNone(db_stats.query_estimate(TelegramUser.objects.all()))
+        with mock.patch.object(db_stats, 'table_estimate', return_value=500):
+            self.assertIsNone(db_stats.is_large(TelegramUser))
+            self.assertEqual(db_stats.is_large(TelegramUser, threshold=500), 500)
@@ -0,0 +1,65 @@
+"""
+Telegram foydalanuvchisi bo'yicha API javoblari keshi.
+
+Bot deyarli har bir xabarda check-user / user API larini chaqiradi. Javoblar
+core.cache da 'tg_user:<telegram_id>' tegi bilan saqlanadi va foydalanuvchi
+yoki uning fikr-mulohazasi saqlanganda eskiradi (yangi ro'yxatdan o'tgan
+foydalanuvchi uchun keshdagi "exists: False" ham).
+"""
+from core.cache import get_or_compute, invalidate_tags
+from core.instrumentation import timed
+
+from .models import TelegramUser
+
+USER_CACHE_TIMEOUT = 60 * 5
+
+
+def user_tag(telegram_id):
+    return f"tg_user:{telegram_id}"
+
+
+def _check_user(telegram_id):
+    user = TelegramUser.objects.filter(telegram_id=telegram_id).first()
+    if user is None:
+        return {'exists': False, 'telegram_id': int(telegram_id)}
+    return {
+        'exists': True,
+        'telegram_id': int(telegram_id),
+        'username': str(user.username) if user.username else '',
+        'full_name': str(user.full_name),
+        'phone_number': str(user.phone_number),
+    }
+
+
+def check_user(telegram_id):
+    """check-user javobi (dict)"""
+    return get_or_compute(
+        f"tg:check_user:{telegram_id}",
+        lambda: _check_user(telegram_id),
+        USER_CACHE_TIMEOUT,
+        tags=[user_tag(telegram_id)],
+    )
+
+
+def _user_detail(telegram_id):
+    from .serializers import TelegramUserDetailSerializer
+
+    user = TelegramUser.objects.filter(telegram_id=telegram_id).first()
+    if user is None:
+        return None
+    with timed('serializer'):
+        return TelegramUserDetailSerializer(user).data
+
+
+def user_detail(telegram_id):
+    """To'liq ma'lumot (dict) yoki None"""
+    return get_or_compute(
+        f"tg:user_detail:{telegram_id}",
+        lambda: _user_detail(telegram_id),
+        USER_CACHE_TIMEOUT,
+        tags=[user_tag(telegram_id)],
+    )
+
+
+def invalidate_users(telegram_ids):
+    invalidate_tags(*[user_tag(telegram_id) for telegram_id in set(telegram_ids)])
@@ -3,10 +3,10 @@ from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
+from . import users
 from .models import TelegramUser, Feedback
 from .serializers import (
     TelegramUserCreateSerializer,
-    TelegramUserDetailSerializer,
     FeedbackCreateSerializer,
     FeedbackResponseSerializer
 )
@@ -28,23 +28,7 @@ class CheckTelegramUserExistsView(APIView):
 
     def get(self, request, telegram_id):
         try:
-            user_exists = TelegramUser.objects.filter(telegram_id=telegram_id).exists()
-
-            if user_exists:
-                user = TelegramUser.objects.get(telegram_id=telegram_id)
-
-                return Response({
-                    'exists': True,
-                    'telegram_id': int(telegram_id),
-                    'username': str(user.username) if user.username else '',
-                    'full_name': str(user.full_name),
-                    'phone_number': str(user.phone_number)
-                }, status=status.HTTP_200_OK)
-            else:
-                return Response({
-                    'exists': False,
-                    'telegram_id': int(telegram_id)
-                }, status=status.HTTP_200_OK)
+            return Response(users.check_user(telegram_id), status=status.HTTP_200_OK)
 
         except Exception as e:
             return Response({
@@ -62,15 +46,13 @@ class TelegramUserDetailView(APIView):
 
     def get(self, request, telegram_id):
         try:
-            user = TelegramUser.objects.get(telegram_id=telegram_id)
-            serializer = TelegramUserDetailSerializer(user)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-
-        except TelegramUser.DoesNotExist:
-            return Response({
-                'error': 'Пользователь не найден',
-                'telegram_id': telegram_id
-            }, status=status.HTTP_404_NOT_FOUND)
+            data = users.user_detail(telegram_id)
+            if data is None:
+                return Response({
+                    'error': 'Пользователь не найден',
+                    'telegram_id': telegram_id
+                }, status=status.HTTP_404_NOT_FOUND)
+            return Response(data, status=status.HTTP_200_OK)
 
         except Exception as e:
             return Response({
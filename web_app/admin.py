@@ -1,12 +1,30 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.admin.utils import display_for_field, display_for_value, lookup_field, unquote
+from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
 from django.utils.html import format_html
-from django.db.models import Count, Q, Sum
-from django.urls import reverse
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.http import Http404, HttpResponseBadRequest, JsonResponse
+from django.shortcuts import redirect
+from django.template.loader import render_to_string
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.functional import cached_property
 from django.utils.safestring import mark_safe
+from core.exports import ExportActionsMixin
+from core.pagination import EstimatedCountAdminMixin
+
 from .models import (
     Author, Translator, Genre, Category, Publisher, PrintingHouse,
-    Book, BookImage, Collection, Order, OrderItem
+    Book, BookImage, Collection, Order, OrderItem, OrderStatusEvent, StockReservation, PricingJob, PriceSchedule,
+    DailyBookSales, DailyGenreSales, DailyCategorySales, DailyAuthorSales, DailyOrderStats,
 )
+from . import exports, importer, order_workflow, pricing, reservations
+from .catalog import evict_book_details
+from .stats import book_stats, invalidate_book_stats
+from .thumbnails import thumbnail_url
 
 
 # ============================================================================
@@ -49,25 +67,246 @@ class HasPhotoFilter(admin.SimpleListFilter):
             return queryset.filter(Q(photo__isnull=True) | Q(photo=''))
 
 
+# ============================================================================
+# MIXINS
+# ============================================================================
+
+def is_autocomplete(request):
+    """So'rov admin autocomplete_fields vidjetidan kelganmi"""
+    match = getattr(request, 'resolver_match', None)
+    return match is not None and match.url_name == 'autocomplete'
+
+
+class PrefixAutocompleteMixin:
+    """
+    autocomplete_fields vidjeti uchun qidiruv: search_fields bo'yicha icontains
+    o'rniga bitta ustun bo'yicha istartswith (core.indexes.prefix_index bilan
+    indekslangan). Oddiy ro'yxat sahifasidagi qidiruv o'zgarmaydi.
+    """
+    autocomplete_search_field = 'name'
+
+    def get_search_results(self, request, queryset, search_term):
+        if not is_autocomplete(request):
+            return super().get_search_results(request, queryset, search_term)
+        search_term = search_term.strip()
+        if search_term:
+            queryset = queryset.filter(**{f'{self.autocomplete_search_field}__istartswith': search_term})
+        return queryset, False
+
+
+class BookTotalsMixin:
+    """
+    Kitoblar soni, faol kitoblar, sotuv va ko'rishlar yig'indisi get_queryset
+    da bog'liq subquery lar bilan annotatsiya qilinadi: ro'yxat sahifasi
+    qatorlar soniga bog'liq bo'lmagan sondagi so'rov bilan chiqadi va ustunlar
+    bo'yicha saralash ishlaydi. JOIN + GROUP BY yo'q, shuning uchun eksport
+    amallari (values_list) oddiy jadval o'qishi bo'lib qoladi.
+    """
+    books_relation = 'books'
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if is_autocomplete(request):
+            # Autocomplete natijalarida faqat str(obj) kerak
+            return queryset
+        # Book tomonidan qaraganda bog'lanish nomi: author, genre, ..., collections
+        lookup = self.model._meta.get_field(self.books_relation).remote_field.name
+        books = Book.objects.filter(**{lookup: OuterRef('pk')}).order_by().values(lookup)
+        return queryset.annotate(
+            _books_count=Coalesce(Subquery(books.annotate(count=Count('pk')).values('count')), 0),
+            _active_books_count=Coalesce(
+                Subquery(books.filter(is_active=True).annotate(count=Count('pk')).values('count')), 0,
+            ),
+            _total_sales=Coalesce(Subquery(books.annotate(total=Sum('sales_count')).values('total')), 0),
+            _total_views=Coalesce(Subquery(books.annotate(total=Sum('views_count')).values('total')), 0),
+        )
+
+
+class LazyBookInlineAdminMixin:
+    """
+    LazyBookInline ning "Yana yuklash" endpointi:
+    <object_id>/books/?after=<id> -> {'html', 'count', 'next', 'url'}
+    """
+
+    def get_urls(self):
+        info = self.opts.app_label, self.opts.model_name
+        urls = [
+            path(
+                '<path:object_id>/books/',
+                self.admin_site.admin_view(self.books_page_view),
+                name='%s_%s_books' % info,
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def books_page_view(self, request, object_id):
+        obj = self.get_object(request, unquote(object_id))
+        if obj is None:
+            raise Http404
+        if not self.has_view_or_change_permission(request, obj):
+            raise PermissionDenied
+        inline = next(
+            (i for i in self.get_inline_instances(request, obj) if isinstance(i, LazyBookInline)),
+            None,
+        )
+        if inline is None:
+            raise PermissionDenied
+        try:
+            after = int(request.GET['after']) if request.GET.get('after') else None
+        except ValueError:
+            return HttpResponseBadRequest("after butun son bo'lishi kerak")
+        return JsonResponse(inline.page(request, obj, after))
+
+
+def _money(value):
+    return f"{value:,.0f} so'm" if value is not None else '—'
+
+
+# Statistika paneli qatorlari: kalit -> (nom, qiymat, qiymat stili)
+STAT_ROWS = {
+    'books': ("Kitoblar soni", lambda st: f"{st['books']} ta", ''),
+    'active': ("Faol kitoblar", lambda st: f"{st['active']} ta", ''),
+    'total_sales': ("Jami sotuvlar", lambda st: f"🔥 {st['total_sales']} ta", 'color: #4CAF50; font-weight: bold;'),
+    'total_views': ("Jami ko'rishlar", lambda st: f"👁 {st['total_views']} ta", 'color: #2196F3; font-weight: bold;'),
+    'total_stock': ("Omborda", lambda st: f"📦 {st['total_stock']} ta", ''),
+    'stock_value': ("Ombor qiymati", lambda st: _money(st['stock_value']), ''),
+    'avg_price': ("O'rtacha narx", lambda st: _money(st['avg_price']), 'color: #FF9800; font-weight: bold;'),
+    'price_range': (
+        "Narx oralig'i",
+        lambda st: f"{_money(st['min_price'])} – {_money(st['max_price'])}" if st['books'] else '—',
+        '',
+    ),
+    'discount_share': ("Chegirmada", lambda st: f"{st['discounted']} ta ({st['discount_share']}%)", ''),
+    'years': ("Nashr yillari", lambda st: f"{st['years']} xil yil", ''),
+}
+
+BOOK_STAT_ROWS = [
+    'books', 'active', 'total_sales', 'total_views', 'total_stock', 'stock_value',
+    'avg_price', 'price_range', 'discount_share',
+]
+
+
+def render_book_stats(obj, title, rows, panel_style, title_style, labels=None):
+    """Obyekt kitoblari statistikasi paneli (bitta keshlangan aggregate dan)"""
+    if not obj.pk:
+        return '—'
+    st = book_stats(obj)
+    labels = labels or {}
+    body = ''.join(
+        '<tr>'
+        f'<td style="padding: 8px;"><strong>{labels.get(key, STAT_ROWS[key][0])}:</strong></td>'
+        f'<td style="padding: 8px; text-align: right; {STAT_ROWS[key][2]}">{STAT_ROWS[key][1](st)}</td>'
+        '</tr>'
+        for key in rows
+    )
+    return mark_safe(
+        f'<div style="{panel_style}">'
+        f'<h3 style="margin-top: 0; {title_style}">{title}</h3>'
+        f'<table style="width: 100%;">{body}</table>'
+        '</div>'
+    )
+
+
 # ============================================================================
 # INLINE ADMINS
 # ============================================================================
 
-class BookInlineForAuthor(admin.TabularInline):
-    """Muallif sahifasida uning kitoblarini ko'rsatish"""
-    from .models import Book
+class LazyBookInlineFormSet(forms.BaseInlineFormSet):
+    """Formset bo'sh: kitoblar shablonda LazyBookInline.page() orqali chiqadi"""
+
+    def get_queryset(self):
+        return self.model._default_manager.none()
+
+    @cached_property
+    def first_page(self):
+        if self.instance.pk is None:
+            return {'html': '', 'count': 0, 'next': None, 'url': None}
+        return self.lazy_inline.page(self.request, self.instance)
+
+
+class LazyBookInline(admin.TabularInline):
+    """
+    Kitoblar uchun faqat o'qiladigan inline. Tahrirlash sahifasida birinchi
+    per_page ta kitob chiqadi, qolganlari "Yana yuklash" tugmasi bilan
+    LazyBookInlineAdminMixin endpointidan keyset sahifalash (id < oxirgi id)
+    orqali olinadi. Muqovalar kichik nusxa (thumbnails) sifatida ko'rsatiladi.
+    """
     model = Book
+    formset = LazyBookInlineFormSet
+    template = 'admin/web_app/edit_inline/lazy_books.html'
+    rows_template = 'admin/web_app/edit_inline/lazy_book_rows.html'
     extra = 0
+    max_num = 0
     can_delete = False
     show_change_link = True
-    fields = ['cover_preview', 'title', 'genre', 'price', 'sales_count', 'stock_quantity', 'is_active']
-    readonly_fields = ['cover_preview', 'sales_count']
+    per_page = 20
+
+    class Media:
+        js = ['admin/js/lazy_inline.js']
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def get_readonly_fields(self, request, obj=None):
+        return self.fields
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.lazy_inline = self
+        formset.request = request
+        return formset
+
+    def page(self, request, parent, after=None):
+        """{'html', 'count', 'next', 'url'} - parent kitoblarining bitta sahifasi"""
+        related = [
+            name for name in self.fields
+            if name in {f.name for f in self.model._meta.concrete_fields if f.many_to_one}
+        ]
+        queryset = self.get_queryset(request).filter(**{self.fk_name: parent}).select_related(*related)
+        if after is not None:
+            queryset = queryset.filter(pk__lt=after)
+        books = list(queryset.order_by('-pk')[:self.per_page + 1])
+        has_more = len(books) > self.per_page
+        books = books[:self.per_page]
+
+        opts = self.parent_model._meta
+        rows = [
+            {
+                'url': reverse(f'admin:{self.opts.app_label}_{self.opts.model_name}_change', args=[book.pk]),
+                'cells': [self._cell(name, book) for name in self.fields],
+            }
+            for book in books
+        ]
+        return {
+            'html': render_to_string(self.rows_template, {'rows': rows}),
+            'count': len(rows),
+            'next': books[-1].pk if has_more else None,
+            'url': reverse(f'admin:{opts.app_label}_{opts.model_name}_books', args=[parent.pk]),
+        }
+
+    def _cell(self, name, obj):
+        # AdminReadonlyField.contents dagidek
+        empty = self.get_empty_value_display()
+        try:
+            field, attr, value = lookup_field(name, obj, self)
+        except (AttributeError, ValueError, ObjectDoesNotExist):
+            return empty
+        if field is None:
+            return display_for_value(value, empty, getattr(attr, 'boolean', False))
+        return display_for_field(value, field, empty)
 
     def cover_preview(self, obj):
-        if obj.cover_image:
+        url = thumbnail_url(obj.cover_image)
+        if url:
             return format_html(
-                '<img src="{}" style="width: 40px; height: 50px; object-fit: cover; border-radius: 4px;" />',
-                obj.cover_image.url
+                '<img src="{}" loading="lazy" style="width: 40px; height: 50px; object-fit: cover; border-radius: 4px;" />',
+                url
             )
         return format_html(
             '<div style="width: 40px; height: 50px; background: #e0e0e0; border-radius: 4px; display: flex; align-items: center; justify-content: center; font-size: 10px; color: #999;">📖</div>')
@@ -75,78 +314,39 @@ class BookInlineForAuthor(admin.TabularInline):
     cover_preview.short_description = '📚'
 
 
-class BookInlineForTranslator(admin.TabularInline):
+class BookInlineForAuthor(LazyBookInline):
+    """Muallif sahifasida uning kitoblarini ko'rsatish"""
+    fk_name = 'author'
+    fields = ['cover_preview', 'title', 'genre', 'price', 'sales_count', 'stock_quantity', 'is_active']
+
+
+class BookInlineForTranslator(LazyBookInline):
     """Tarjimon sahifasida tarjima qilgan kitoblarini ko'rsatish"""
-    from .models import Book
-    model = Book
-    extra = 0
-    can_delete = False
-    show_change_link = True
     fk_name = 'translator'
     fields = ['cover_preview', 'title', 'author', 'genre', 'price', 'is_active']
-    readonly_fields = ['cover_preview']
-
-    def cover_preview(self, obj):
-        if obj.cover_image:
-            return format_html(
-                '<img src="{}" style="width: 40px; height: 50px; object-fit: cover; border-radius: 4px;" />',
-                obj.cover_image.url
-            )
-        return '—'
-
-    cover_preview.short_description = '📚'
 
 
-class BookInlineForGenre(admin.TabularInline):
+class BookInlineForGenre(LazyBookInline):
     """Janr sahifasida shu janrdagi kitoblarni ko'rsatish"""
-    from .models import Book
-    model = Book
-    extra = 0
-    can_delete = False
-    show_change_link = True
-    fields = ['title', 'author', 'price', 'sales_count', 'is_active']
-    readonly_fields = ['sales_count']
+    fk_name = 'genre'
+    fields = ['cover_preview', 'title', 'author', 'price', 'sales_count', 'is_active']
 
 
-class BookInlineForCategory(admin.TabularInline):
+class BookInlineForCategory(LazyBookInline):
     """Turkum sahifasida shu turkumdagi kitoblarni ko'rsatish"""
-    from .models import Book
-    model = Book
-    extra = 0
-    can_delete = False
-    show_change_link = True
-    fields = ['title', 'author', 'genre', 'price', 'sales_count']
-    readonly_fields = ['sales_count']
+    fk_name = 'category'
+    fields = ['cover_preview', 'title', 'author', 'genre', 'price', 'sales_count']
 
 
-class BookInlineForPublisher(admin.TabularInline):
+class BookInlineForPublisher(LazyBookInline):
     """Nashriyot sahifasida nashr qilgan kitoblarni ko'rsatish"""
-    from .models import Book
-    model = Book
-    extra = 0
-    can_delete = False
-    show_change_link = True
+    fk_name = 'publisher'
     fields = ['cover_preview', 'title', 'author', 'publication_year', 'price', 'stock_quantity']
-    readonly_fields = ['cover_preview']
-
-    def cover_preview(self, obj):
-        if obj.cover_image:
-            return format_html(
-                '<img src="{}" style="width: 40px; height: 50px; object-fit: cover; border-radius: 4px;" />',
-                obj.cover_image.url
-            )
-        return '—'
-
-    cover_preview.short_description = '📚'
 
 
-class BookInlineForPrintingHouse(admin.TabularInline):
+class BookInlineForPrintingHouse(LazyBookInline):
     """Bosmaxona sahifasida chop etgan kitoblarni ko'rsatish"""
-    from .models import Book
-    model = Book
-    extra = 0
-    can_delete = False
-    show_change_link = True
+    fk_name = 'printing_house'
     fields = ['title', 'author', 'publication_year', 'stock_quantity']
 
 
@@ -155,7 +355,7 @@ class BookInlineForPrintingHouse(admin.TabularInline):
 # ============================================================================
 
 @admin.register(Author)
-class AuthorAdmin(admin.ModelAdmin):
+class AuthorAdmin(PrefixAutocompleteMixin, LazyBookInlineAdminMixin, BookTotalsMixin, admin.ModelAdmin):
     list_display = [
         'photo_thumbnail',
         'name',
@@ -218,22 +418,23 @@ class AuthorAdmin(admin.ModelAdmin):
 
     def books_count(self, obj):
         """Kitoblari soni"""
-        count = obj.books.count()
+        count = obj._books_count
         if count == 0:
             return format_html('<span style="color: #999;">0</span>')
         return format_html(
-            '<a href="{}?author__id__exact={}" style="color: #2196F3; font-weight: bold;">📚 {} ta</a>',
-            reverse('admin:books_book_changelist'),
+            '<a href="{}?author__id__exact={}" title="Faol: {} ta" style="color: #2196F3; font-weight: bold;">📚 {} ta</a>',
+            reverse('admin:web_app_book_changelist'),
             obj.id,
+            obj._active_books_count,
             count
         )
 
     books_count.short_description = 'Kitoblari'
-    books_count.admin_order_field = 'books__count'
+    books_count.admin_order_field = '_books_count'
 
     def total_sales(self, obj):
         """Jami sotuvlar"""
-        total = sum(book.sales_count for book in obj.books.all())
+        total = obj._total_sales
         if total == 0:
             return format_html('<span style="color: #999;">0</span>')
         return format_html(
@@ -242,6 +443,7 @@ class AuthorAdmin(admin.ModelAdmin):
         )
 
     total_sales.short_description = 'Jami sotuvlar'
+    total_sales.admin_order_field = '_total_sales'
 
     def bio_status(self, obj):
         """Biografiya holati"""
@@ -254,56 +456,27 @@ class AuthorAdmin(admin.ModelAdmin):
     bio_status.short_description = 'Biografiya'
 
     def statistics(self, obj):
-        """To'liq statistika"""
-        books = obj.books.all()
-        total_sales = sum(book.sales_count for book in books)
-        total_views = sum(book.views_count for book in books)
-        active_books = books.filter(is_active=True).count()
-
-        html = f"""
-        <div style="background: #f5f5f5; padding: 15px; border-radius: 8px;">
-            <h3 style="margin-top: 0; color: #333;">📊 Muallifning statistikasi</h3>
-            <table style="width: 100%; border-collapse: collapse;">
-                <tr>
-                    <td style="padding: 8px; border-bottom: 1px solid #ddd;"><strong>Jami kitoblar:</strong></td>
-                    <td style="padding: 8px; border-bottom: 1px solid #ddd; text-align: right;">{books.count()} ta</td>
-                </tr>
-                <tr>
-                    <td style="padding: 8px; border-bottom: 1px solid #ddd;"><strong>Faol kitoblar:</strong></td>
-                    <td style="padding: 8px; border-bottom: 1px solid #ddd; text-align: right;">{active_books} ta</td>
-                </tr>
-                <tr>
-                    <td style="padding: 8px; border-bottom: 1px solid #ddd;"><strong>Jami sotuvlar:</strong></td>
-                    <td style="padding: 8px; border-bottom: 1px solid #ddd; text-align: right; color: #4CAF50; font-weight: bold;">{total_sales} ta</td>
-                </tr>
-                <tr>
-                    <td style="padding: 8px;"><strong>Jami ko'rishlar:</strong></td>
-                    <td style="padding: 8px; text-align: right; color: #2196F3; font-weight: bold;">{total_views} ta</td>
-                </tr>
-            </table>
-        </div>
-        """
-        return format_html(html)
+        return render_book_stats(
+            obj,
+            '📊 Muallifning statistikasi',
+            BOOK_STAT_ROWS,
+            panel_style='background: #f5f5f5; padding: 15px; border-radius: 8px;',
+            title_style='color: #333;',
+        )
 
     statistics.short_description = 'Statistika'
 
-    def get_queryset(self, request):
-        """Optimizatsiya uchun"""
-        queryset = super().get_queryset(request)
-        return queryset.prefetch_related('books')
-
     actions = ['export_authors']
 
     def export_authors(self, request, queryset):
-        """Mualliflarni eksport qilish"""
-        # Bu yerda CSV eksport qilish logikasi bo'lishi mumkin
-        self.message_user(request, f"{queryset.count()} ta muallif tanlandi")
+        """Mualliflarni CSV ga eksport qilish (oqim bilan)"""
+        return exports.AUTHORS.response(queryset, 'csv')
 
     export_authors.short_description = "📥 Tanlangan mualliflarni eksport qilish"
 
 
 @admin.register(Translator)
-class TranslatorAdmin(admin.ModelAdmin):
+class TranslatorAdmin(PrefixAutocompleteMixin, LazyBookInlineAdminMixin, BookTotalsMixin, admin.ModelAdmin):
     list_display = [
         'photo_thumbnail',
         'name',
@@ -362,17 +535,19 @@ class TranslatorAdmin(admin.ModelAdmin):
     photo_preview.short_description = 'Surat ko\'rinishi'
 
     def translations_count(self, obj):
-        count = obj.books.count()
+        count = obj._books_count
         if count == 0:
             return format_html('<span style="color: #999;">0</span>')
         return format_html(
-            '<a href="{}?translator__id__exact={}" style="color: #FF9800; font-weight: bold;">🌍 {} ta</a>',
-            reverse('admin:books_book_changelist'),
+            '<a href="{}?translator__id__exact={}" title="Faol: {} ta" style="color: #FF9800; font-weight: bold;">🌍 {} ta</a>',
+            reverse('admin:web_app_book_changelist'),
             obj.id,
+            obj._active_books_count,
             count
         )
 
     translations_count.short_description = 'Tarjimalari'
+    translations_count.admin_order_field = '_books_count'
 
     def bio_status(self, obj):
         if obj.bio and len(obj.bio.strip()) > 0:
@@ -382,31 +557,20 @@ class TranslatorAdmin(admin.ModelAdmin):
     bio_status.short_description = 'Biografiya'
 
     def statistics(self, obj):
-        books = obj.books.all()
-        total_sales = sum(book.sales_count for book in books)
-
-        html = f"""
-        <div style="background: #fff3e0; padding: 15px; border-radius: 8px; border-left: 4px solid #FF9800;">
-            <h3 style="margin-top: 0; color: #e65100;">🌍 Tarjimonning statistikasi</h3>
-            <table style="width: 100%;">
-                <tr>
-                    <td style="padding: 8px;"><strong>Tarjima qilgan kitoblar:</strong></td>
-                    <td style="padding: 8px; text-align: right;">{books.count()} ta</td>
-                </tr>
-                <tr>
-                    <td style="padding: 8px;"><strong>Jami sotuvlar:</strong></td>
-                    <td style="padding: 8px; text-align: right; color: #4CAF50; font-weight: bold;">{total_sales} ta</td>
-                </tr>
-            </table>
-        </div>
-        """
-        return format_html(html)
+        return render_book_stats(
+            obj,
+            '🌍 Tarjimonning statistikasi',
+            BOOK_STAT_ROWS,
+            panel_style='background: #fff3e0; padding: 15px; border-radius: 8px; border-left: 4px solid #FF9800;',
+            title_style='color: #e65100;',
+            labels={'books': 'Tarjima qilgan kitoblar'},
+        )
 
     statistics.short_description = 'Statistika'
 
 
 @admin.register(Genre)
-class GenreAdmin(admin.ModelAdmin):
+class GenreAdmin(PrefixAutocompleteMixin, LazyBookInlineAdminMixin, BookTotalsMixin, admin.ModelAdmin):
     list_display = [
         'image_thumbnail',
         'name_with_icon',
@@ -480,17 +644,19 @@ class GenreAdmin(admin.ModelAdmin):
     name_with_icon.admin_order_field = 'name'
 
     def books_count(self, obj):
-        count = obj.books.count()
+        count = obj._books_count
         if count == 0:
             return format_html('<span style="color: #999;">0</span>')
         return format_html(
-            '<a href="{}?genre__id__exact={}" style="background: #E3F2FD; color: #1976D2; padding: 4px 12px; border-radius: 12px; text-decoration: none; font-weight: bold;">📚 {} ta</a>',
-            reverse('admin:books_book_changelist'),
+            '<a href="{}?genre__id__exact={}" title="Faol: {} ta" style="background: #E3F2FD; color: #1976D2; padding: 4px 12px; border-radius: 12px; text-decoration: none; font-weight: bold;">📚 {} ta</a>',
+            reverse('admin:web_app_book_changelist'),
             obj.id,
+            obj._active_books_count,
             count
         )
 
     books_count.short_description = 'Kitoblar'
+    books_count.admin_order_field = '_books_count'
 
     def description_preview(self, obj):
         if obj.description:
@@ -501,36 +667,19 @@ class GenreAdmin(admin.ModelAdmin):
     description_preview.short_description = 'Tavsif'
 
     def statistics(self, obj):
-        books = obj.books.all()
-        total_sales = sum(book.sales_count for book in books)
-        avg_price = sum(book.price for book in books) / books.count() if books.count() > 0 else 0
-
-        html = f"""
-        <div style="background: #e3f2fd; padding: 15px; border-radius: 8px; border-left: 4px solid #2196F3;">
-            <h3 style="margin-top: 0; color: #1565c0;">📊 Janr statistikasi</h3>
-            <table style="width: 100%;">
-                <tr>
-                    <td style="padding: 8px;"><strong>Kitoblar soni:</strong></td>
-                    <td style="padding: 8px; text-align: right;">{books.count()} ta</td>
-                </tr>
-                <tr>
-                    <td style="padding: 8px;"><strong>Jami sotuvlar:</strong></td>
-                    <td style="padding: 8px; text-align: right; color: #4CAF50; font-weight: bold;">{total_sales} ta</td>
-                </tr>
-                <tr>
-                    <td style="padding: 8px;"><strong>O'rtacha narx:</strong></td>
-                    <td style="padding: 8px; text-align: right; color: #FF9800; font-weight: bold;">{avg_price:,.0f} so'm</td>
-                </tr>
-            </table>
-        </div>
-        """
-        return format_html(html)
+        return render_book_stats(
+            obj,
+            '📊 Janr statistikasi',
+            BOOK_STAT_ROWS,
+            panel_style='background: #e3f2fd; padding: 15px; border-radius: 8px; border-left: 4px solid #2196F3;',
+            title_style='color: #1565c0;',
+        )
 
     statistics.short_description = 'Statistika'
 
 
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(PrefixAutocompleteMixin, LazyBookInlineAdminMixin, BookTotalsMixin, admin.ModelAdmin):
     list_display = [
         'image_thumbnail',
         'name_with_badge',
@@ -593,17 +742,19 @@ class CategoryAdmin(admin.ModelAdmin):
     name_with_badge.admin_order_field = 'name'
 
     def books_count(self, obj):
-        count = obj.books.count()
+        count = obj._books_count
         if count == 0:
             return format_html('<span style="color: #999;">0 ta</span>')
         return format_html(
-            '<a href="{}?category__id__exact={}" style="background: #E8F5E9; color: #2E7D32; padding: 4px 12px; border-radius: 12px; text-decoration: none; font-weight: bold;">📚 {} ta</a>',
-            reverse('admin:books_book_changelist'),
+            '<a href="{}?category__id__exact={}" title="Faol: {} ta" style="background: #E8F5E9; color: #2E7D32; padding: 4px 12px; border-radius: 12px; text-decoration: none; font-weight: bold;">📚 {} ta</a>',
+            reverse('admin:web_app_book_changelist'),
             obj.id,
+            obj._active_books_count,
             count
         )
 
     books_count.short_description = 'Kitoblar'
+    books_count.admin_order_field = '_books_count'
 
     def description_preview(self, obj):
         if obj.description:
@@ -614,31 +765,19 @@ class CategoryAdmin(admin.ModelAdmin):
     description_preview.short_description = 'Tavsif'
 
     def statistics(self, obj):
-        books = obj.books.all()
-        total_sales = sum(book.sales_count for book in books)
-
-        html = f"""
-        <div style="background: #f3e5f5; padding: 15px; border-radius: 8px; border-left: 4px solid #9C27B0;">
-            <h3 style="margin-top: 0; color: #6a1b9a;">📊 Turkum statistikasi</h3>
-            <table style="width: 100%;">
-                <tr>
-                    <td style="padding: 8px;"><strong>Kitoblar:</strong></td>
-                    <td style="padding: 8px; text-align: right;">{books.count()} ta</td>
-                </tr>
-                <tr>
-                    <td style="padding: 8px;"><strong>Sotuvlar:</strong></td>
-                    <td style="padding: 8px; text-align: right; color: #4CAF50; font-weight: bold;">{total_sales} ta</td>
-                </tr>
-            </table>
-        </div>
-        """
-        return format_html(html)
+        return render_book_stats(
+            obj,
+            '📊 Turkum statistikasi',
+            BOOK_STAT_ROWS,
+            panel_style='background: #f3e5f5; padding: 15px; border-radius: 8px; border-left: 4px solid #9C27B0;',
+            title_style='color: #6a1b9a;',
+        )
 
     statistics.short_description = 'Statistika'
 
 
 @admin.register(Publisher)
-class PublisherAdmin(admin.ModelAdmin):
+class PublisherAdmin(PrefixAutocompleteMixin, LazyBookInlineAdminMixin, BookTotalsMixin, admin.ModelAdmin):
     list_display = [
         'logo_thumbnail',
         'name_styled',
@@ -701,17 +840,19 @@ class PublisherAdmin(admin.ModelAdmin):
     name_styled.admin_order_field = 'name'
 
     def books_count(self, obj):
-        count = obj.books.count()
+        count = obj._books_count
         if count == 0:
             return format_html('<span style="color: #999;">0 ta</span>')
         return format_html(
-            '<a href="{}?publisher__id__exact={}" style="background: #E0F2F1; color: #00796B; padding: 4px 12px; border-radius: 12px; text-decoration: none; font-weight: bold;">📚 {} ta</a>',
-            reverse('admin:books_book_changelist'),
+            '<a href="{}?publisher__id__exact={}" title="Faol: {} ta" style="background: #E0F2F1; color: #00796B; padding: 4px 12px; border-radius: 12px; text-decoration: none; font-weight: bold;">📚 {} ta</a>',
+            reverse('admin:web_app_book_changelist'),
             obj.id,
+            obj._active_books_count,
             count
         )
 
     books_count.short_description = 'Nashr kitoblari'
+    books_count.admin_order_field = '_books_count'
 
     def description_preview(self, obj):
         if obj.description:
@@ -722,36 +863,20 @@ class PublisherAdmin(admin.ModelAdmin):
     description_preview.short_description = 'Tavsif'
 
     def statistics(self, obj):
-        books = obj.books.all()
-        total_sales = sum(book.sales_count for book in books)
-        years = set(book.publication_year for book in books if book.publication_year)
-
-        html = f"""
-        <div style="background: #e0f2f1; padding: 15px; border-radius: 8px; border-left: 4px solid #009688;">
-            <h3 style="margin-top: 0; color: #00695c;">🏢 Nashriyot statistikasi</h3>
-            <table style="width: 100%;">
-                <tr>
-                    <td style="padding: 8px;"><strong>Nashr qilgan kitoblar:</strong></td>
-                    <td style="padding: 8px; text-align: right;">{books.count()} ta</td>
-                </tr>
-                <tr>
-                    <td style="padding: 8px;"><strong>Jami sotuvlar:</strong></td>
-                    <td style="padding: 8px; text-align: right; color: #4CAF50; font-weight: bold;">{total_sales} ta</td>
-                </tr>
-                <tr>
-                    <td style="padding: 8px;"><strong>Nashr yillari:</strong></td>
-                    <td style="padding: 8px; text-align: right;">{len(years)} xil yil</td>
-                </tr>
-            </table>
-        </div>
-        """
-        return format_html(html)
+        return render_book_stats(
+            obj,
+            '🏢 Nashriyot statistikasi',
+            BOOK_STAT_ROWS + ['years'],
+            panel_style='background: #e0f2f1; padding: 15px; border-radius: 8px; border-left: 4px solid #009688;',
+            title_style='color: #00695c;',
+            labels={'books': 'Nashr qilgan kitoblar'},
+        )
 
     statistics.short_description = 'Statistika'
 
 
 @admin.register(PrintingHouse)
-class PrintingHouseAdmin(admin.ModelAdmin):
+class PrintingHouseAdmin(PrefixAutocompleteMixin, LazyBookInlineAdminMixin, BookTotalsMixin, admin.ModelAdmin):
     list_display = [
         'name_with_icon',
         'books_count',
@@ -787,17 +912,19 @@ class PrintingHouseAdmin(admin.ModelAdmin):
     name_with_icon.admin_order_field = 'name'
 
     def books_count(self, obj):
-        count = obj.books.count()
+        count = obj._books_count
         if count == 0:
             return format_html('<span style="color: #999;">0 ta</span>')
         return format_html(
-            '<a href="{}?printing_house__id__exact={}" style="background: #FFF9C4; color: #F57F17; padding: 4px 12px; border-radius: 12px; text-decoration: none; font-weight: bold;">🖨 {} ta</a>',
-            reverse('admin:books_book_changelist'),
+            '<a href="{}?printing_house__id__exact={}" title="Faol: {} ta" style="background: #FFF9C4; color: #F57F17; padding: 4px 12px; border-radius: 12px; text-decoration: none; font-weight: bold;">🖨 {} ta</a>',
+            reverse('admin:web_app_book_changelist'),
             obj.id,
+            obj._active_books_count,
             count
         )
 
     books_count.short_description = 'Chop etilgan kitoblar'
+    books_count.admin_order_field = '_books_count'
 
     def address_preview(self, obj):
         if obj.address:
@@ -808,25 +935,14 @@ class PrintingHouseAdmin(admin.ModelAdmin):
     address_preview.short_description = 'Manzil'
 
     def statistics(self, obj):
-        books = obj.books.all()
-        years = set(book.publication_year for book in books if book.publication_year)
-
-        html = f"""
-        <div style="background: #fffde7; padding: 15px; border-radius: 8px; border-left: 4px solid #FBC02D;">
-            <h3 style="margin-top: 0; color: #f57f17;">🏭 Bosmaxona statistikasi</h3>
-            <table style="width: 100%;">
-                <tr>
-                    <td style="padding: 8px;"><strong>Chop etilgan kitoblar:</strong></td>
-                    <td style="padding: 8px; text-align: right;">{books.count()} ta</td>
-                </tr>
-                <tr>
-                    <td style="padding: 8px;"><strong>Chop yillari:</strong></td>
-                    <td style="padding: 8px; text-align: right;">{len(years)} xil yil</td>
-                </tr>
-            </table>
-        </div>
-        """
-        return format_html(html)
+        return render_book_stats(
+            obj,
+            '🏭 Bosmaxona statistikasi',
+            ['books', 'active', 'total_stock', 'years'],
+            panel_style='background: #fffde7; padding: 15px; border-radius: 8px; border-left: 4px solid #FBC02D;',
+            title_style='color: #f57f17;',
+            labels={'books': 'Chop etilgan kitoblar', 'years': 'Chop yillari'},
+        )
 
     statistics.short_description = 'Statistika'
 
@@ -840,6 +956,7 @@ class BookImageAdmin(admin.ModelAdmin):
     list_display = ['id', 'image_preview', 'description_preview', 'created_at']
     list_filter = ['created_at']
     search_fields = ['description']
+    ordering = ['-created_at']
     readonly_fields = ['image_large_preview', 'created_at']
 
     fieldsets = (
@@ -895,8 +1012,74 @@ class BookImageInline(admin.TabularInline):
     verbose_name_plural = "Qo'shimcha rasmlar"
 
 
+class PriceScheduleInline(admin.TabularInline):
+    """Kitobning rejalashtirilgan narx / chegirma o'zgarishlari"""
+    model = PriceSchedule
+    extra = 0
+    fields = ['price', 'discount_price', 'starts_at', 'ends_at', 'status']
+    readonly_fields = ['status']
+
+    def get_queryset(self, request):
+        # Tugagan va bekor qilinganlar "Narx jadvallari" bo'limida
+        return super().get_queryset(request).filter(status__in=['pending', 'active'])
+
+
+class CatalogImportForm(forms.Form):
+    file = forms.FileField(label="Fayl", help_text="CSV, XLSX yoki JSONL")
+
+    def clean_file(self):
+        upload = self.cleaned_data['file']
+        try:
+            self.cleaned_data['format'] = importer.detect_format(upload.name)
+        except ValueError as exc:
+            raise forms.ValidationError(str(exc))
+        return upload
+
+
+class PricingJobForm(forms.Form):
+    operation = forms.ChoiceField(label="Amal", choices=PricingJob.OPERATION_CHOICES)
+    value = forms.DecimalField(
+        label="Qiymat",
+        max_digits=10,
+        decimal_places=2,
+        initial=0,
+        help_text="Foiz yoki so'm. Narxni kamaytirish uchun manfiy qiymat kiriting.",
+    )
+    rounding = forms.ChoiceField(label="Yaxlitlash", choices=PricingJob.ROUNDING_CHOICES)
+    starts_at = forms.DateTimeField(
+        label="Boshlanish vaqti",
+        required=False,
+        widget=forms.DateTimeInput(attrs={'type': 'datetime-local'}),
+        help_text="Bo'sh bo'lsa - darhol",
+    )
+    ends_at = forms.DateTimeField(
+        label="Tugash vaqti",
+        required=False,
+        widget=forms.DateTimeInput(attrs={'type': 'datetime-local'}),
+        help_text="Faqat chegirmalar uchun: shu vaqtda chegirma olib tashlanadi",
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.errors:
+            return cleaned_data
+        try:
+            pricing.validate(
+                cleaned_data['operation'],
+                cleaned_data['value'],
+                ends_at=cleaned_data.get('ends_at'),
+                starts_at=cleaned_data.get('starts_at'),
+            )
+        except pricing.PricingError as exc:
+            raise forms.ValidationError(str(exc))
+        return cleaned_data
+
+
 @admin.register(Book)
-class BookAdmin(admin.ModelAdmin):
+class BookAdmin(PrefixAutocompleteMixin, ExportActionsMixin, admin.ModelAdmin):
+    autocomplete_search_field = 'title'
+    export_spec = exports.BOOKS
+    change_list_template = 'admin/web_app/book/change_list.html'
     list_display = [
         'cover_preview_small',
         'title_with_badges',
@@ -929,7 +1112,16 @@ class BookAdmin(admin.ModelAdmin):
         'created_at',
         'updated_at'
     ]
-    filter_horizontal = ['additional_images']
+    autocomplete_fields = [
+        'author',
+        'translator',
+        'genre',
+        'category',
+        'publisher',
+        'printing_house',
+        'additional_images',
+    ]
+    inlines = [PriceScheduleInline]
 
     fieldsets = (
         ('📖 Asosiy ma\'lumotlar', {
@@ -1002,7 +1194,16 @@ class BookAdmin(admin.ModelAdmin):
         }),
     )
 
-    actions = ['mark_as_new', 'mark_as_not_new', 'mark_as_featured', 'activate_books', 'deactivate_books']
+    actions = [
+        'mark_as_new',
+        'mark_as_not_new',
+        'mark_as_featured',
+        'activate_books',
+        'deactivate_books',
+        'reprice_books',
+        'export_as_csv',
+        'export_as_jsonl',
+    ]
 
     def cover_preview_small(self, obj):
         if obj.cover_image:
@@ -1052,15 +1253,15 @@ class BookAdmin(admin.ModelAdmin):
         if obj.discount_price:
             return format_html(
                 '<div style="display: flex; flex-direction: column; gap: 2px;">'
-                '<span style="text-decoration: line-through; color: #999; font-size: 11px;">{:,.0f} so\'m</span>'
-                '<span style="color: #F44336; font-weight: bold; font-size: 13px;">{:,.0f} so\'m</span>'
+                '<span style="text-decoration: line-through; color: #999; font-size: 11px;">{} so\'m</span>'
+                '<span style="color: #F44336; font-weight: bold; font-size: 13px;">{} so\'m</span>'
                 '</div>',
-                obj.price,
-                obj.discount_price
+                f'{obj.price:,.0f}',
+                f'{obj.discount_price:,.0f}'
             )
         return format_html(
-            '<span style="font-weight: bold; font-size: 13px;">{:,.0f} so\'m</span>',
-            obj.price
+            '<span style="font-weight: bold; font-size: 13px;">{} so\'m</span>',
+            f'{obj.price:,.0f}'
         )
 
     price_display.short_description = 'Narx'
@@ -1129,6 +1330,9 @@ class BookAdmin(admin.ModelAdmin):
     conversion_rate_display.short_description = 'Konversiya'
 
     def statistics_card(self, obj):
+        if not obj.pk:
+            return '—'
+
         html = f"""
         <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 20px; border-radius: 12px; color: white; box-shadow: 0 4px 8px rgba(0,0,0,0.2);">
             <h3 style="margin-top: 0; font-size: 18px;">📊 Kitob statistikasi</h3>
@@ -1156,52 +1360,132 @@ class BookAdmin(admin.ModelAdmin):
             </div>
         </div>
         """
-        return format_html(html)
+        return mark_safe(html)
 
     statistics_card.short_description = 'To\'liq statistika'
 
     # Actions
     def mark_as_new(self, request, queryset):
+        book_ids = list(queryset.values_list('pk', flat=True))
         updated = queryset.update(is_new=True)
+        evict_book_details(book_ids)
         self.message_user(request, f'{updated} ta kitob "Yangi" deb belgilandi.')
 
     mark_as_new.short_description = '⭐ Yangi deb belgilash'
 
     def mark_as_not_new(self, request, queryset):
+        book_ids = list(queryset.values_list('pk', flat=True))
         updated = queryset.update(is_new=False)
+        evict_book_details(book_ids)
         self.message_user(request, f'{updated} ta kitob "Yangi"likdan olib tashlandi.')
 
     mark_as_not_new.short_description = '❌ Yangilikdan olib tashlash'
 
     def mark_as_featured(self, request, queryset):
+        book_ids = list(queryset.values_list('pk', flat=True))
         updated = queryset.update(is_featured=True)
+        evict_book_details(book_ids)
         self.message_user(request, f'{updated} ta kitob "Tanlangan" deb belgilandi.')
 
     mark_as_featured.short_description = '⭐ Tanlangan deb belgilash'
 
     def activate_books(self, request, queryset):
+        book_ids = list(queryset.values_list('pk', flat=True))
         updated = queryset.update(is_active=True)
+        evict_book_details(book_ids)
+        invalidate_book_stats()
         self.message_user(request, f'{updated} ta kitob faollashtirildi.')
 
     activate_books.short_description = '✅ Faollashtirish'
 
     def deactivate_books(self, request, queryset):
+        book_ids = list(queryset.values_list('pk', flat=True))
         updated = queryset.update(is_active=False)
+        evict_book_details(book_ids)
+        invalidate_book_stats()
         self.message_user(request, f'{updated} ta kitob o\'chirildi.')
 
     deactivate_books.short_description = '❌ O\'chirish'
 
+    def reprice_books(self, request, queryset):
+        """Narx / chegirmani o'zgartirish - fon vazifasi sifatida navbatga qo'yiladi"""
+        form = PricingJobForm(request.POST if 'apply' in request.POST else None)
+        if form.is_valid():
+            job = pricing.create_job(
+                queryset.values_list('pk', flat=True),
+                user=request.user,
+                **form.cleaned_data,
+            )
+            self.message_user(
+                request,
+                f"{job.total} ta kitob uchun narxlash vazifasi #{job.pk} navbatga qo'yildi.",
+                messages.SUCCESS,
+            )
+            return redirect('admin:web_app_pricingjob_change', job.pk)
+
+        context = {
+            **self.admin_site.each_context(request),
+            'title': "Narxlarni o'zgartirish",
+            'opts': self.model._meta,
+            'form': form,
+            'books_count': queryset.count(),
+            'selected': request.POST.getlist(ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', '0'),
+            'action_checkbox_name': ACTION_CHECKBOX_NAME,
+        }
+        return TemplateResponse(request, 'admin/web_app/book/reprice.html', context)
+
+    reprice_books.short_description = "💸 Narx / chegirmani o'zgartirish"
+
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
         return queryset.select_related('author', 'translator', 'genre', 'category', 'publisher', 'printing_house')
 
+    def get_urls(self):
+        urls = [
+            path(
+                'import/',
+                self.admin_site.admin_view(self.import_view),
+                name='web_app_book_import',
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def import_view(self, request):
+        """Katalogni fayldan yuklash"""
+        if not self.has_add_permission(request):
+            return redirect('admin:web_app_book_changelist')
+
+        form = CatalogImportForm(request.POST or None, request.FILES or None)
+        result = None
+        if request.method == 'POST' and form.is_valid():
+            upload = form.cleaned_data['file']
+            result = importer.import_catalog(upload.file, form.cleaned_data['format'])
+            level = messages.WARNING if result.failed else messages.SUCCESS
+            self.message_user(
+                request,
+                f"{result.created} ta kitob yaratildi, {result.skipped} ta mavjud kitob o'tkazib yuborildi, "
+                f"{result.failed} ta qatorda xato.",
+                level,
+            )
+
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Katalogni yuklash',
+            'opts': self.model._meta,
+            'form': form,
+            'result': result,
+            'columns': importer.REQUIRED_COLUMNS + importer.REQUIRED_RELATED,
+        }
+        return TemplateResponse(request, 'admin/web_app/book/import.html', context)
+
 
 # ============================================================================
 # COLLECTION ADMIN
 # ============================================================================
 
 @admin.register(Collection)
-class CollectionAdmin(admin.ModelAdmin):
+class CollectionAdmin(BookTotalsMixin, admin.ModelAdmin):
     list_display = [
         'cover_preview_small',
         'title_with_order',
@@ -1212,7 +1496,7 @@ class CollectionAdmin(admin.ModelAdmin):
     list_filter = ['is_active', 'created_at']
     search_fields = ['title', 'description']
     prepopulated_fields = {'slug': ('title',)}
-    filter_horizontal = ['books']
+    autocomplete_fields = ['books']
     readonly_fields = ['cover_preview_large', 'statistics', 'created_at', 'updated_at']
 
     fieldsets = (
@@ -1285,48 +1569,28 @@ class CollectionAdmin(admin.ModelAdmin):
     title_with_order.admin_order_field = 'order'
 
     def books_count_display(self, obj):
-        count = obj.books.count()
+        count = obj._books_count
         if count == 0:
             return format_html('<span style="color: #999;">0 ta kitob</span>')
         return format_html(
-            '<a href="{}?collections__id__exact={}" style="background: #E3F2FD; color: #1976D2; padding: 6px 12px; border-radius: 12px; text-decoration: none; font-weight: bold;">📚 {} ta kitob</a>',
-            reverse('admin:books_book_changelist'),
+            '<a href="{}?collections__id__exact={}" title="Faol: {} ta" style="background: #E3F2FD; color: #1976D2; padding: 6px 12px; border-radius: 12px; text-decoration: none; font-weight: bold;">📚 {} ta kitob</a>',
+            reverse('admin:web_app_book_changelist'),
             obj.id,
+            obj._active_books_count,
             count
         )
 
     books_count_display.short_description = 'Kitoblar'
+    books_count_display.admin_order_field = '_books_count'
 
     def statistics(self, obj):
-        books = obj.books.all()
-        total_sales = sum(book.sales_count for book in books)
-        total_views = sum(book.views_count for book in books)
-        avg_price = sum(book.final_price for book in books) / books.count() if books.count() > 0 else 0
-
-        html = f"""
-        <div style="background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%); padding: 20px; border-radius: 12px; color: white;">
-            <h3 style="margin-top: 0;">📊 Tuplam statistikasi</h3>
-            <table style="width: 100%; color: white;">
-                <tr>
-                    <td style="padding: 8px;"><strong>Kitoblar soni:</strong></td>
-                    <td style="padding: 8px; text-align: right; font-size: 18px; font-weight: bold;">{books.count()} ta</td>
-                </tr>
-                <tr>
-                    <td style="padding: 8px;"><strong>Jami sotuvlar:</strong></td>
-                    <td style="padding: 8px; text-align: right; font-size: 18px; font-weight: bold;">🔥 {total_sales} ta</td>
-                </tr>
-                <tr>
-                    <td style="padding: 8px;"><strong>Jami ko'rishlar:</strong></td>
-                    <td style="padding: 8px; text-align: right; font-size: 18px; font-weight: bold;">👁 {total_views} ta</td>
-                </tr>
-                <tr>
-                    <td style="padding: 8px;"><strong>O'rtacha narx:</strong></td>
-                    <td style="padding: 8px; text-align: right; font-size: 18px; font-weight: bold;">💰 {avg_price:,.0f} so'm</td>
-                </tr>
-            </table>
-        </div>
-        """
-        return format_html(html)
+        return render_book_stats(
+            obj,
+            '📊 Tuplam statistikasi',
+            BOOK_STAT_ROWS,
+            panel_style='background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%); padding: 20px; border-radius: 12px; color: white;',
+            title_style='',
+        )
 
     statistics.short_description = 'Statistika'
 
@@ -1342,6 +1606,15 @@ class CollectionAdmin(admin.ModelAdmin):
 
     deactivate_collections.short_description = '❌ O\'chirish'
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        invalidate_book_stats()
+
+    def formfield_for_manytomany(self, db_field, request, **kwargs):
+        if db_field.name == 'books':
+            kwargs['queryset'] = Book.objects.select_related('author')
+        return super().formfield_for_manytomany(db_field, request, **kwargs)
+
 
 # ============================================================================
 # ORDER ADMIN
@@ -1356,8 +1629,8 @@ class OrderItemInline(admin.TabularInline):
 
     def total_price_display(self, obj):
         return format_html(
-            '<strong style="color: #4CAF50; font-size: 14px;">{:,.0f} so\'m</strong>',
-            obj.total_price
+            '<strong style="color: #4CAF50; font-size: 14px;">{} so\'m</strong>',
+            f'{obj.total_price:,.0f}'
         )
 
     total_price_display.short_description = 'Jami'
@@ -1365,9 +1638,52 @@ class OrderItemInline(admin.TabularInline):
     def has_add_permission(self, request, obj=None):
         return False
 
+    def get_queryset(self, request):
+        # str(book) muallif nomini ham ko'rsatadi
+        return super().get_queryset(request).select_related('book__author')
+
+
+class OrderStatusEventInline(admin.TabularInline):
+    """Buyurtma holati tarixi"""
+    model = OrderStatusEvent
+    extra = 0
+    can_delete = False
+    fields = ['created_at', 'from_status', 'to_status', 'changed_by', 'note']
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('changed_by')
+
+
+class OrderAdminForm(forms.ModelForm):
+    class Meta:
+        model = Order
+        fields = '__all__'
+
+    def clean_status(self):
+        """Faqat ruxsat etilgan holat o'tishlari"""
+        status = self.cleaned_data['status']
+        old_status = self.initial.get('status') if self.instance.pk else None
+        if old_status and old_status != status and not order_workflow.can_transition(old_status, status):
+            raise forms.ValidationError(
+                f"\"{self.instance.get_status_display()}\" holatidan "
+                f"\"{dict(Order.STATUS_CHOICES)[status]}\" holatiga o'tib bo'lmaydi."
+            )
+        return status
+
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(EstimatedCountAdminMixin, ExportActionsMixin, admin.ModelAdmin):
+    form = OrderAdminForm
+    export_spec = exports.ORDERS
+    # Holat / sana bo'yicha filtrlanganda umumiy son kerak emas
+    show_full_result_count = False
     list_display = [
         'order_number_display',
         'user_name',
@@ -1378,9 +1694,9 @@ class OrderAdmin(admin.ModelAdmin):
         'created_at'
     ]
     list_filter = ['status', 'created_at']
-    search_fields = ['order_number', 'user_name', 'user_phone', 'user_telegram_id']
+    search_fields = ['order_number', 'user_name', 'user_phone']
     readonly_fields = ['order_number', 'statistics_card', 'created_at', 'updated_at']
-    inlines = [OrderItemInline]
+    inlines = [OrderItemInline, OrderStatusEventInline]
 
     fieldsets = (
         ('📦 Buyurtma ma\'lumoti', {
@@ -1416,7 +1732,15 @@ class OrderAdmin(admin.ModelAdmin):
         }),
     )
 
-    actions = ['confirm_orders', 'ship_orders', 'deliver_orders', 'cancel_orders']
+    actions = [
+        'confirm_orders',
+        'ship_orders',
+        'deliver_orders',
+        'cancel_orders',
+        'export_as_csv',
+        'export_as_jsonl',
+        'export_order_items',
+    ]
 
     def order_number_display(self, obj):
         return format_html(
@@ -1452,27 +1776,48 @@ class OrderAdmin(admin.ModelAdmin):
 
     def total_amount_display(self, obj):
         return format_html(
-            '<strong style="color: #4CAF50; font-size: 14px;">{:,.0f} so\'m</strong>',
-            obj.total_amount
+            '<strong style="color: #4CAF50; font-size: 14px;">{} so\'m</strong>',
+            f'{obj.total_amount:,.0f}'
         )
 
     total_amount_display.short_description = 'Jami summa'
     total_amount_display.admin_order_field = 'total_amount'
 
     def items_count(self, obj):
-        count = obj.items.count()
-        total_qty = sum(item.quantity for item in obj.items.all())
         return format_html(
             '<span style="background: #E3F2FD; color: #1976D2; padding: 4px 10px; border-radius: 12px; font-size: 11px;">📚 {} dona ({} xil)</span>',
-            total_qty,
-            count
+            obj._items_quantity,
+            obj._items_count
         )
 
     items_count.short_description = 'Kitoblar'
+    items_count.admin_order_field = '_items_quantity'
+
+    def get_queryset(self, request):
+        # JOIN + GROUP BY emas, bog'liq subquery lar: eksport amallari (values_list) ularni umuman tanlamaydi
+        items = OrderItem.objects.filter(order=OuterRef('pk')).order_by().values('order')
+        return super().get_queryset(request).annotate(
+            _items_count=Coalesce(Subquery(items.annotate(count=Count('pk')).values('count')), 0),
+            _items_quantity=Coalesce(Subquery(items.annotate(quantity=Sum('quantity')).values('quantity')), 0),
+        )
+
+    def get_search_results(self, request, queryset, search_term):
+        """Telegram ID bo'yicha aniq qidiruv (indeks ishlatiladi)"""
+        searched, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        term = search_term.strip()
+        if term.isdigit():
+            # Filtrlar qo'llangan queryset ichida qidiriladi
+            searched = queryset.filter(Q(pk__in=searched.values('pk')) | Q(user_telegram_id=int(term)))
+        return searched, may_have_duplicates
+
+    def save_model(self, request, obj, form, change):
+        old_status = form.initial.get('status') if change else None
+        super().save_model(request, obj, form, change)
+        order_workflow.record_transition(obj, old_status, user=request.user)
 
     def statistics_card(self, obj):
-        items = obj.items.all()
-        total_books = sum(item.quantity for item in items)
+        if not obj.pk:
+            return '—'
 
         html = f"""
         <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 20px; border-radius: 12px; color: white;">
@@ -1480,11 +1825,11 @@ class OrderAdmin(admin.ModelAdmin):
             <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 15px; margin-top: 15px;">
                 <div style="background: rgba(255,255,255,0.2); padding: 12px; border-radius: 8px;">
                     <div style="font-size: 12px; opacity: 0.9;">Xil kitoblar</div>
-                    <div style="font-size: 24px; font-weight: bold; margin-top: 5px;">📚 {items.count()}</div>
+                    <div style="font-size: 24px; font-weight: bold; margin-top: 5px;">📚 {obj._items_count}</div>
                 </div>
                 <div style="background: rgba(255,255,255,0.2); padding: 12px; border-radius: 8px;">
                     <div style="font-size: 12px; opacity: 0.9;">Jami kitoblar</div>
-                    <div style="font-size: 24px; font-weight: bold; margin-top: 5px;">📦 {total_books}</div>
+                    <div style="font-size: 24px; font-weight: bold; margin-top: 5px;">📦 {obj._items_quantity}</div>
                 </div>
             </div>
             <div style="margin-top: 15px; padding-top: 15px; border-top: 1px solid rgba(255,255,255,0.2);">
@@ -1493,35 +1838,239 @@ class OrderAdmin(admin.ModelAdmin):
             </div>
         </div>
         """
-        return format_html(html)
+        return mark_safe(html)
 
     statistics_card.short_description = 'To\'liq statistika'
 
     # Actions
+    def _transition(self, request, queryset, status, message):
+        result = order_workflow.transition_orders(queryset, status, user=request.user)
+        self.message_user(request, f'{result.updated} ta buyurtma {message}.')
+        if result.skipped_count:
+            self.message_user(
+                request,
+                f'{result.skipped_count} ta buyurtma joriy holati sababli o\'zgartirilmadi.',
+                level=messages.WARNING,
+            )
+
     def confirm_orders(self, request, queryset):
-        updated = queryset.filter(status='pending').update(status='confirmed')
-        self.message_user(request, f'{updated} ta buyurtma tasdiqlandi.')
+        self._transition(request, queryset, 'confirmed', 'tasdiqlandi')
 
     confirm_orders.short_description = '✅ Tasdiqlash'
 
     def ship_orders(self, request, queryset):
-        updated = queryset.filter(status='confirmed').update(status='shipped')
-        self.message_user(request, f'{updated} ta buyurtma jo\'natildi.')
+        self._transition(request, queryset, 'shipped', 'jo\'natildi')
 
     ship_orders.short_description = '🚚 Jo\'natish'
 
     def deliver_orders(self, request, queryset):
-        updated = queryset.filter(status='shipped').update(status='delivered')
-        self.message_user(request, f'{updated} ta buyurtma yetkazildi.')
+        self._transition(request, queryset, 'delivered', 'yetkazildi')
 
     deliver_orders.short_description = '🎉 Yetkazildi'
 
     def cancel_orders(self, request, queryset):
-        updated = queryset.update(status='cancelled')
-        self.message_user(request, f'{updated} ta buyurtma bekor qilindi.')
+        self._transition(request, queryset, 'cancelled', 'bekor qilindi')
 
     cancel_orders.short_description = '❌ Bekor qilish'
 
+    def export_order_items(self, request, queryset):
+        return exports.ORDER_ITEMS.response(OrderItem.objects.filter(order__in=queryset), 'csv')
+
+    export_order_items.short_description = '📥 Buyurtma elementlarini CSV ga eksport qilish'
+
+
+@admin.register(OrderStatusEvent)
+class OrderStatusEventAdmin(admin.ModelAdmin):
+    """Holat tarixi - faqat ko'rish uchun"""
+    list_display = ['order', 'from_status', 'to_status', 'changed_by', 'note', 'created_at']
+    list_filter = ['to_status', 'from_status', 'created_at']
+    search_fields = ['order__order_number', 'note']
+    list_select_related = ['order', 'changed_by']
+    date_hierarchy = 'created_at'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+# ============================================================================
+# ZAXIRA (band qilishlar)
+# ============================================================================
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ['book', 'telegram_id', 'quantity', 'status', 'expires_at', 'created_at']
+    list_filter = ['status', 'expires_at']
+    search_fields = ['=telegram_id', 'book__title']
+    list_select_related = ['book__author']
+    readonly_fields = ['book', 'telegram_id', 'quantity', 'status', 'expires_at', 'created_at', 'updated_at']
+    actions = ['release_reservations']
+
+    def has_add_permission(self, request):
+        return False
+
+    def release_reservations(self, request, queryset):
+        released = reservations.release_queryset(queryset)
+        self.message_user(request, f'{released} ta band qilish bekor qilindi.')
+
+    release_reservations.short_description = '❌ Band qilishni bekor qilish'
+
+
+# ============================================================================
+# NARXLASH VAZIFALARI
+# ============================================================================
+
+@admin.register(PricingJob)
+class PricingJobAdmin(admin.ModelAdmin):
+    """Ommaviy narxlash vazifalari - faqat ko'rish (bajaruvchi: run_pricing_jobs)"""
+    list_display = [
+        'id', 'operation', 'value', 'rounding', 'status', 'progress_display',
+        'updated', 'starts_at', 'ends_at', 'created_at',
+    ]
+    list_filter = ['status', 'operation']
+    fields = [
+        'operation', 'value', 'rounding', 'starts_at', 'ends_at',
+        'status', 'progress_display', 'total', 'processed', 'updated', 'error',
+        'created_by', 'created_at', 'updated_at', 'finished_at',
+    ]
+    readonly_fields = fields
+    actions = ['cancel_jobs']
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_queryset(self, request):
+        # book_ids ro'yxati o'n minglab id bo'lishi mumkin - sahifalarda kerak emas
+        return super().get_queryset(request).defer('book_ids').select_related('created_by')
+
+    def progress_display(self, obj):
+        color = '#F44336' if obj.status == 'failed' else '#4CAF50'
+        return mark_safe(
+            '<div style="width: 120px; background: #e0e0e0; border-radius: 4px;">'
+            f'<div style="width: {obj.progress}%; background: {color}; color: white; font-size: 11px; '
+            f'text-align: center; border-radius: 4px;">{obj.progress}%</div>'
+            '</div>'
+        )
+
+    progress_display.short_description = 'Progress'
+
+    def cancel_jobs(self, request, queryset):
+        cancelled = queryset.filter(status='queued').update(status='failed', error='Bekor qilindi')
+        self.message_user(request, f'{cancelled} ta vazifa bekor qilindi.')
+
+    cancel_jobs.short_description = '❌ Navbatdagi vazifalarni bekor qilish'
+
+
+@admin.register(PriceSchedule)
+class PriceScheduleAdmin(admin.ModelAdmin):
+    """Rejalashtirilgan narxlar (bajaruvchi: run_price_schedules)"""
+    list_display = ['book', 'price', 'discount_price', 'starts_at', 'ends_at', 'status']
+    list_filter = ['status', 'starts_at']
+    search_fields = ['book__title']
+    list_select_related = ['book__author']
+    autocomplete_fields = ['book']
+    readonly_fields = ['status', 'created_at', 'updated_at']
+    actions = ['cancel_schedules']
+
+    def get_readonly_fields(self, request, obj=None):
+        if obj is not None and obj.status != 'pending':
+            return ['book', 'price', 'discount_price', 'starts_at', 'ends_at'] + self.readonly_fields
+        return self.readonly_fields
+
+    def cancel_schedules(self, request, queryset):
+        cancelled = queryset.filter(status='pending').update(status='cancelled')
+        self.message_user(request, f'{cancelled} ta jadval bekor qilindi.')
+
+    cancel_schedules.short_description = '❌ Kutilayotgan jadvallarni bekor qilish'
+
+
+# ============================================================================
+# HISOBOTLAR (rollup jadvallari)
+# ============================================================================
+
+class RollupAdmin(admin.ModelAdmin):
+    """Kunlik hisobot jadvallari - faqat ko'rish uchun"""
+    date_hierarchy = 'date'
+    list_filter = ['date']
+    list_per_page = 50
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def revenue_display(self, obj):
+        return format_html('<strong style="color: #4CAF50;">{} so\'m</strong>', f'{obj.revenue:,.0f}')
+
+    revenue_display.short_description = 'Tushum'
+    revenue_display.admin_order_field = 'revenue'
+
+
+@admin.register(DailyBookSales)
+class DailyBookSalesAdmin(RollupAdmin):
+    list_display = ['date', 'book', 'quantity', 'revenue_display']
+    list_select_related = ['book__author']
+    search_fields = ['book__title']
+
+
+@admin.register(DailyGenreSales)
+class DailyGenreSalesAdmin(RollupAdmin):
+    list_display = ['date', 'genre', 'quantity', 'revenue_display']
+    list_filter = ['date', 'genre']
+    list_select_related = ['genre']
+
+
+@admin.register(DailyCategorySales)
+class DailyCategorySalesAdmin(RollupAdmin):
+    list_display = ['date', 'category', 'quantity', 'revenue_display']
+    list_filter = ['date', 'category']
+    list_select_related = ['category']
+
+
+@admin.register(DailyAuthorSales)
+class DailyAuthorSalesAdmin(RollupAdmin):
+    list_display = ['date', 'author', 'quantity', 'revenue_display']
+    list_select_related = ['author']
+    search_fields = ['author__name']
+
+
+@admin.register(DailyOrderStats)
+class DailyOrderStatsAdmin(RollupAdmin):
+    list_display = ['date', 'status', 'orders_count', 'revenue_display']
+    list_filter = ['date', 'status']
+
+    def changelist_view(self, request, extra_context=None):
+        """Tanlangan davr uchun holatlar bo'yicha jami (rollup jadvalidan)"""
+        response = super().changelist_view(request, extra_context=extra_context)
+        try:
+            queryset = response.context_data['cl'].queryset
+        except (AttributeError, KeyError):
+            return response
+
+        status_labels = dict(Order.STATUS_CHOICES)
+        response.context_data['status_totals'] = [
+            {
+                'status': row['status'],
+                'label': status_labels.get(row['status'], row['status']),
+                'orders': row['orders'],
+                'revenue': row['revenue'],
+            }
+            for row in queryset.order_by().values('status').annotate(
+                orders=Sum('orders_count'),
+                revenue=Sum('revenue'),
+            ).order_by('status')
+        ]
+        return response
+
 
 # ============================================================================
 # ADMIN SITE CUSTOMIZATION
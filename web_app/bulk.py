@@ -0,0 +1,39 @@
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest
+
+
+def bulk_increment(queryset, field, deltas):
+    """
+    Bir nechta qatorga har xil delta qo'shish - bitta UPDATE bilan.
+
+    deltas: {pk: delta}.
+    """
+    return bulk_increment_fields(queryset, {pk: {field: delta} for pk, delta in deltas.items()})
+
+
+def bulk_increment_fields(queryset, deltas):
+    """
+    Bir nechta maydonga qatorma-qator delta qo'shish - bitta UPDATE bilan.
+
+    deltas: {pk: {field: delta}}. Natija manfiy bo'lmasligi uchun 0 bilan
+    chegaralanadi (PositiveIntegerField maydonlari uchun).
+    """
+    deltas = {pk: row for pk, row in deltas.items() if any(row.values())}
+    if not deltas:
+        return 0
+
+    fields = {name for row in deltas.values() for name in row}
+    updates = {}
+    for name in fields:
+        model_field = queryset.model._meta.get_field(name)
+        delta_expr = Case(
+            *[
+                When(pk=pk, then=Value(row[name], output_field=model_field))
+                for pk, row in deltas.items() if row.get(name)
+            ],
+            default=Value(0, output_field=model_field),
+            output_field=model_field,
+        )
+        updates[name] = Greatest(F(name) + delta_expr, Value(0, output_field=model_field))
+
+    return queryset.filter(pk__in=deltas.keys()).update(**updates)
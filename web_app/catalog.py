@@ -0,0 +1,71 @@
+"""
+Katalog API uchun kitob ma'lumotlari.
+
+Kitobning o'zgarmas qismi keshlanadi (core.cache teglari: book:<id>,
+author:<id>, ... - muallif nomi o'zgarsa uning barcha kitoblari eskiradi),
+mavjud zaxira esa har safar band qilishlar hisoblagichidan qo'shiladi.
+"""
+from django.core.cache import cache
+
+from core.cache import get_or_compute, invalidate_tags
+from core.instrumentation import timed
+
+from . import reservations
+from .models import Book
+
+BOOK_DETAIL_CACHE_TIMEOUT = 60 * 5
+
+# Nomi kitob sahifasida ko'rsatiladigan bog'lanishlar
+TAGGED_RELATIONS = ('author', 'translator', 'genre', 'category', 'publisher')
+
+
+def _detail_key(book_id):
+    return f"book:detail:{book_id}"
+
+
+def taxonomy_tag(obj):
+    """Muallif, janr, ... teg nomi: 'author:5'"""
+    return f"{obj._meta.model_name}:{obj.pk}"
+
+
+def _load_detail(book_id):
+    from .serializers import BookDetailSerializer
+
+    book = (
+        Book.objects
+        .select_related('author', 'translator', 'genre', 'category', 'publisher')
+        .filter(pk=book_id, is_active=True)
+        .first()
+    )
+    if book is None:
+        return None
+    related = [getattr(book, name) for name in TAGGED_RELATIONS]
+    tags = [taxonomy_tag(obj) for obj in related if obj is not None]
+    with timed('serializer'):
+        return BookDetailSerializer(book).data, tags
+
+
+def get_book_detail(book_id):
+    """Kitob ma'lumotlari (dict) yoki None"""
+    cached = get_or_compute(
+        _detail_key(book_id),
+        lambda: _load_detail(book_id),
+        BOOK_DETAIL_CACHE_TIMEOUT,
+        tags=lambda value: value[1] if value else [],
+    )
+    if cached is None:
+        return None
+
+    data, _ = cached
+    reserved = reservations.reserved_quantities([book_id])[book_id]
+    available = max(0, data['stock_quantity'] - reserved)
+    return {**data, 'available_stock': available, 'is_available': available > 0}
+
+
+def evict_book_details(book_ids):
+    cache.delete_many([_detail_key(book_id) for book_id in book_ids])
+
+
+def invalidate_taxonomy(obj):
+    """Muallif / janr / ... o'zgarganda uning barcha kitoblari keshini eskirtirish"""
+    invalidate_tags(taxonomy_tag(obj))
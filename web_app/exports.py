@@ -0,0 +1,85 @@
+"""
+Katalog va buyurtmalarni eksport qilish ustunlari.
+
+Kitoblar eksportidagi ustun nomlari importer bilan bir xil, shuning uchun
+eksport qilingan faylni boshqa bazaga qayta yuklash mumkin.
+"""
+from core.exports import Column, ExportSpec, choice_label
+
+from .models import Author, Book, Order, OrderItem
+
+AUTHORS = ExportSpec('authors', [
+    Column('id', 'id'),
+    Column('name', 'name'),
+    Column('slug', 'slug'),
+    Column('bio', 'bio'),
+    Column('created_at', 'created_at'),
+])
+
+BOOKS = ExportSpec('books', [
+    Column('id', 'id'),
+    Column('title', 'title'),
+    Column('slug', 'slug'),
+    Column('author', 'author__name'),
+    Column('translator', 'translator__name'),
+    Column('genre', 'genre__name'),
+    Column('category', 'category__name'),
+    Column('publisher', 'publisher__name'),
+    Column('printing_house', 'printing_house__name'),
+    Column('description', 'description'),
+    Column('age_limit', 'age_limit'),
+    Column('pages', 'pages'),
+    Column('language', 'language'),
+    Column('alphabet', 'alphabet'),
+    Column('cover_type', 'cover_type'),
+    Column('book_format', 'book_format'),
+    Column('height', 'height'),
+    Column('width', 'width'),
+    Column('thickness', 'thickness'),
+    Column('publication_year', 'publication_year'),
+    Column('price', 'price'),
+    Column('discount_price', 'discount_price'),
+    Column('stock_quantity', 'stock_quantity'),
+    Column('cover_image', 'cover_image'),
+    Column('views_count', 'views_count'),
+    Column('sales_count', 'sales_count'),
+    Column('is_active', 'is_active'),
+    Column('is_featured', 'is_featured'),
+    Column('is_new', 'is_new'),
+    Column('created_at', 'created_at'),
+])
+
+ORDERS = ExportSpec('orders', [
+    Column('id', 'id'),
+    Column('order_number', 'order_number'),
+    Column('user_telegram_id', 'user_telegram_id'),
+    Column('user_name', 'user_name'),
+    Column('user_phone', 'user_phone'),
+    Column('status', 'status', choice_label(Order.STATUS_CHOICES)),
+    Column('total_amount', 'total_amount'),
+    Column('delivery_address', 'delivery_address'),
+    Column('notes', 'notes'),
+    Column('created_at', 'created_at'),
+    Column('updated_at', 'updated_at'),
+])
+
+ORDER_ITEMS = ExportSpec('order_items', [
+    Column('id', 'id'),
+    Column('order_number', 'order__order_number'),
+    Column('order_status', 'order__status', choice_label(Order.STATUS_CHOICES)),
+    Column('user_telegram_id', 'order__user_telegram_id'),
+    Column('book_id', 'book_id'),
+    Column('book_title', 'book__title'),
+    Column('author', 'book__author__name'),
+    Column('quantity', 'quantity'),
+    Column('price', 'price'),
+    Column('ordered_at', 'order__created_at'),
+])
+
+# management buyrug'i uchun: nom -> (spec, model)
+EXPORTS = {
+    'authors': (AUTHORS, Author),
+    'books': (BOOKS, Book),
+    'orders': (ORDERS, Order),
+    'order_items': (ORDER_ITEMS, OrderItem),
+}
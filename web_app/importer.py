@@ -0,0 +1,379 @@
+"""
+Katalogni fayldan ommaviy yuklash (CSV / XLSX / JSONL).
+
+Fayl qatorma-qator o'qiladi va CHUNK_SIZE lik partiyalarda bazaga yoziladi,
+shuning uchun xotira fayl hajmiga bog'liq emas. Muallif, tarjimon, janr,
+turkum, nashriyot va bosmaxonalar nomi bo'yicha bir marta yuklangan
+lug'atlardan topiladi (yo'qlari partiya bilan yaratiladi), sluglar ham
+xotiradagi to'plam yordamida har bir qator uchun so'rovsiz ajratiladi.
+
+Buzilgan qator (noto'g'ri qiymat, JSON xatosi) yoki bazaga sig'maydigan
+qiymat butun yuklashni to'xtatmaydi - qator raqami bilan hisobotga yoziladi.
+Partiyani yozishda baza xatosi bo'lsa partiya qatorma-qator qayta yoziladi.
+"""
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from django.db import DatabaseError, transaction
+from django.utils.text import slugify
+
+from .models import Author, Book, Category, Genre, PrintingHouse, Publisher, Translator
+from .stats import invalidate_book_stats
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+FORMATS = ('csv', 'xlsx', 'jsonl')
+
+# ustun -> model (nomi bo'yicha topiladi / yaratiladi)
+RELATED_COLUMNS = {
+    'author': Author,
+    'translator': Translator,
+    'genre': Genre,
+    'category': Category,
+    'publisher': Publisher,
+    'printing_house': PrintingHouse,
+}
+REQUIRED_RELATED = ('author', 'genre', 'category')
+
+REQUIRED_COLUMNS = (
+    'title', 'pages', 'alphabet', 'cover_type', 'book_format',
+    'height', 'width', 'thickness', 'publication_year', 'price',
+)
+INTEGER_COLUMNS = ('pages', 'age_limit', 'publication_year', 'stock_quantity')
+DECIMAL_COLUMNS = ('height', 'width', 'thickness', 'price', 'discount_price')
+CHOICE_COLUMNS = ('language', 'alphabet', 'cover_type', 'book_format')
+BOOLEAN_COLUMNS = ('is_active', 'is_featured', 'is_new')
+TEXT_COLUMNS = ('description', 'cover_image')
+
+TRUE_VALUES = {'1', 'true', 'yes', 'ha', '+'}
+
+
+class RowError(Exception):
+    """Qatorni yuklab bo'lmaydi"""
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    skipped: int = 0
+    failed: int = 0
+    related_created: dict = field(default_factory=dict)
+    errors: list = field(default_factory=list)
+
+    def add_error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+
+# ============================================================================
+# FAYL O'QUVCHILAR
+# ============================================================================
+
+def detect_format(filename):
+    suffix = Path(filename).suffix.lower().lstrip('.')
+    if suffix == 'json':
+        suffix = 'jsonl'
+    if suffix not in FORMATS:
+        raise ValueError(f"Qo'llab-quvvatlanmaydigan format: {suffix or filename}")
+    return suffix
+
+
+def _text_stream(fileobj):
+    if isinstance(fileobj, io.TextIOBase):
+        return fileobj
+    return io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+
+
+def iter_csv(fileobj):
+    reader = csv.DictReader(_text_stream(fileobj))
+    for raw in reader:
+        # Qo'shtirnoq ichida qator ko'chishi bo'lsa ham yozuv boshlangan qator
+        yield reader.line_num - sum(str(value).count('\n') for value in raw.values() if value), raw
+
+
+def iter_jsonl(fileobj):
+    for line_number, line in enumerate(_text_stream(fileobj), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            raw = json.loads(line)
+        except json.JSONDecodeError as exc:
+            raw = RowError(f"JSON xato: {exc.msg} ({exc.colno}-belgi)")
+        else:
+            if not isinstance(raw, dict):
+                raw = RowError("JSON obyekt emas")
+        yield line_number, raw
+
+
+def iter_xlsx(fileobj):
+    # openpyxl faqat XLSX yuklanganda kerak
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else '' for cell in next(rows, ())]
+        for line_number, values in enumerate(rows, start=2):
+            if any(value is not None for value in values):
+                yield line_number, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+# format -> (qator raqami, ustun -> qiymat lug'ati yoki RowError) generatori
+READERS = {
+    'csv': iter_csv,
+    'jsonl': iter_jsonl,
+    'xlsx': iter_xlsx,
+}
+
+
+# ============================================================================
+# LUG'ATLAR VA SLUGLAR
+# ============================================================================
+
+def _key(name):
+    return ' '.join(str(name).split()).casefold()
+
+
+class SlugAllocator:
+    """Mavjud sluglar bir marta yuklanadi, yangilari xotirada band qilinadi"""
+
+    def __init__(self, model, fallback):
+        self.max_length = model._meta.get_field('slug').max_length
+        self.fallback = fallback
+        self.taken = set(model.objects.values_list('slug', flat=True).iterator(chunk_size=10000))
+        self._next_suffix = {}
+
+    def allocate(self, text):
+        base = slugify(text)[:self.max_length] or self.fallback
+        slug = base
+        suffix = self._next_suffix.get(base, 2)
+        while slug in self.taken:
+            tail = f'-{suffix}'
+            slug = f'{base[:self.max_length - len(tail)]}{tail}'
+            suffix += 1
+        self._next_suffix[base] = suffix
+        self.taken.add(slug)
+        return slug
+
+
+class LookupMap:
+    """{nom: id} lug'ati; yo'q nomlar partiya bilan yaratiladi"""
+
+    def __init__(self, model):
+        self.model = model
+        self.ids = {}
+        for pk, name in model.objects.order_by('-pk').values_list('pk', 'name').iterator(chunk_size=10000):
+            self.ids[_key(name)] = pk
+        self.has_slug = any(f.name == 'slug' for f in model._meta.fields)
+        self.slugs = SlugAllocator(model, model._meta.model_name) if self.has_slug else None
+        self.pending = {}
+        self.created = 0
+        self._flushed = []
+
+    def request(self, name):
+        key = _key(name)
+        if key not in self.ids:
+            self.pending.setdefault(key, ' '.join(str(name).split()))
+
+    def flush(self):
+        """Kutilayotgan nomlarni bitta bulk_create bilan yaratish"""
+        if not self.pending:
+            return
+        objects = []
+        for name in self.pending.values():
+            obj = self.model(name=name)
+            if self.has_slug:
+                obj.slug = self.slugs.allocate(name)
+            objects.append(obj)
+        self.pending = {}
+        for obj in self.model.objects.bulk_create(objects, batch_size=CHUNK_SIZE):
+            self.ids[_key(obj.name)] = obj.pk
+            self._flushed.append(_key(obj.name))
+        self.created += len(objects)
+
+    def commit(self):
+        self._flushed = []
+
+    def rollback(self):
+        """Tranzaksiya bekor qilindi - shu partiyada yaratilgan nomlar unutiladi"""
+        for key in self._flushed:
+            self.ids.pop(key, None)
+        self.created -= len(self._flushed)
+        self._flushed = []
+        self.pending = {}
+
+    def get(self, name):
+        return self.ids[_key(name)]
+
+
+# ============================================================================
+# QATORLARNI TEKSHIRISH
+# ============================================================================
+
+def _choice_map(model_field):
+    mapping = {}
+    for value, label in model_field.choices:
+        mapping[_key(value)] = value
+        mapping[_key(label)] = value
+    return mapping
+
+
+CHOICES = {name: _choice_map(Book._meta.get_field(name)) for name in CHOICE_COLUMNS}
+
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def clean_row(raw):
+    """Xom qatordan Book maydonlari lug'ati (bog'liq modellar hali nom ko'rinishida)"""
+    row = {_key(column).replace(' ', '_'): value for column, value in raw.items() if column}
+    data = {}
+
+    missing = [name for name in REQUIRED_COLUMNS + REQUIRED_RELATED if _blank(row.get(name))]
+    if missing:
+        raise RowError(f"Majburiy ustunlar bo'sh: {', '.join(missing)}")
+
+    data['title'] = ' '.join(str(row['title']).split())
+    for name in RELATED_COLUMNS:
+        if not _blank(row.get(name)):
+            data[name] = row[name]
+
+    for name in INTEGER_COLUMNS:
+        if not _blank(row.get(name)):
+            try:
+                data[name] = int(Decimal(str(row[name]).strip()))
+            except (InvalidOperation, ValueError):
+                raise RowError(f"{name}: butun son emas ({row[name]!r})")
+            if data[name] < 0:
+                raise RowError(f"{name}: manfiy bo'lishi mumkin emas")
+
+    for name in DECIMAL_COLUMNS:
+        if not _blank(row.get(name)):
+            try:
+                data[name] = Decimal(str(row[name]).strip().replace(' ', '').replace(',', '.'))
+            except InvalidOperation:
+                raise RowError(f"{name}: son emas ({row[name]!r})")
+
+    for name in CHOICE_COLUMNS:
+        if not _blank(row.get(name)):
+            value = CHOICES[name].get(_key(row[name]))
+            if value is None:
+                raise RowError(f"{name}: noma'lum qiymat ({row[name]!r})")
+            data[name] = value
+
+    for name in BOOLEAN_COLUMNS:
+        if not _blank(row.get(name)):
+            value = row[name]
+            data[name] = value if isinstance(value, bool) else _key(value) in TRUE_VALUES
+
+    for name in TEXT_COLUMNS:
+        if not _blank(row.get(name)):
+            data[name] = str(row[name]).strip()
+
+    if data.get('age_limit') is not None and data['age_limit'] > 18:
+        raise RowError("age_limit: 18 dan katta bo'lishi mumkin emas")
+    return data
+
+
+# ============================================================================
+# YUKLASH
+# ============================================================================
+
+class CatalogImporter:
+    def __init__(self, chunk_size=CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.lookups = {name: LookupMap(model) for name, model in RELATED_COLUMNS.items()}
+        self.slugs = SlugAllocator(Book, 'book')
+        # Takroriy yuklashda mavjud kitoblar (nom + muallif) o'tkazib yuboriladi
+        self.existing = {
+            (_key(title), author_id)
+            for title, author_id in Book.objects.values_list('title', 'author_id').iterator(chunk_size=10000)
+        }
+        self.result = ImportResult()
+
+    def run(self, rows):
+        """rows: (qator raqami, xom qator) juftliklari (READERS)"""
+        chunk = []
+        for line, raw in rows:
+            try:
+                if isinstance(raw, RowError):
+                    raise raw
+                chunk.append((line, clean_row(raw)))
+            except RowError as exc:
+                self.result.add_error(line, str(exc))
+            if len(chunk) >= self.chunk_size:
+                self._write(chunk)
+                chunk = []
+        if chunk:
+            self._write(chunk)
+
+        self.result.related_created = {
+            name: lookup.created for name, lookup in self.lookups.items() if lookup.created
+        }
+        return self.result
+
+    def _write(self, chunk):
+        try:
+            books = self._write_batch(chunk)
+        except (DatabaseError, OverflowError) as exc:
+            if len(chunk) == 1:
+                self.result.add_error(chunk[0][0], f"Bazaga yozib bo'lmadi: {exc}")
+                return
+            # Xato qaysi qatordaligini topish uchun partiya qatorma-qator yoziladi
+            for item in chunk:
+                self._write([item])
+            return
+        if books:
+            invalidate_book_stats()
+
+    def _write_batch(self, chunk):
+        identities = set()
+        try:
+            with transaction.atomic():
+                for _, data in chunk:
+                    for name, lookup in self.lookups.items():
+                        if name in data:
+                            lookup.request(data[name])
+                for lookup in self.lookups.values():
+                    lookup.flush()
+
+                books = []
+                skipped = 0
+                for line, data in chunk:
+                    fields = {name: value for name, value in data.items() if name not in self.lookups}
+                    for name, lookup in self.lookups.items():
+                        if name in data:
+                            fields[f'{name}_id'] = lookup.get(data[name])
+                    identity = (_key(fields['title']), fields['author_id'])
+                    if identity in self.existing or identity in identities:
+                        skipped += 1
+                        continue
+                    identities.add(identity)
+                    books.append(Book(slug=self.slugs.allocate(fields['title']), **fields))
+
+                Book.objects.bulk_create(books, batch_size=self.chunk_size)
+        except BaseException:
+            for lookup in self.lookups.values():
+                lookup.rollback()
+            raise
+
+        for lookup in self.lookups.values():
+            lookup.commit()
+        self.existing.update(identities)
+        self.result.created += len(books)
+        self.result.skipped += skipped
+        return books
+
+
+def import_catalog(fileobj, fmt, chunk_size=CHUNK_SIZE):
+    """Fayldan katalogni yuklash. Qaytaradi: ImportResult"""
+    return CatalogImporter(chunk_size).run(READERS[fmt](fileobj))
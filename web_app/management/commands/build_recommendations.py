@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from web_app import recommendations, similarity
+
+INDEXES = {
+    'also_bought': recommendations,
+    'similar': similarity,
+}
+
+
+class Command(BaseCommand):
+    help = "Tavsiyalarni yangilash (\"buni ham sotib olishadi\" va \"o'xshash kitoblar\")"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Noldan qayta qurish")
+        parser.add_argument('--only', choices=list(INDEXES), help="Faqat bitta indeksni yangilash")
+        parser.add_argument('--top-k', type=int, default=recommendations.TOP_K)
+
+    def handle(self, *args, **options):
+        kinds = [options['only']] if options['only'] else list(INDEXES)
+        for kind in kinds:
+            updated = INDEXES[kind].refresh(full=options['full'], top_k=options['top_k'])
+            self.stdout.write(self.style.SUCCESS(f"{kind}: {updated} ta kitob tavsiyalari yangilandi."))
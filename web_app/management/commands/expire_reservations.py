@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from web_app.reservations import SWEEP_BATCH_SIZE, expire_reservations
+
+
+class Command(BaseCommand):
+    help = "Muddati o'tgan zaxira band qilishlarini yopish"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=SWEEP_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help="To'xtovsiz ishlash (fon jarayoni sifatida)")
+        parser.add_argument('--interval', type=int, default=30, help="Tekshirishlar orasidagi soniyalar")
+
+    def handle(self, *args, **options):
+        while True:
+            expired = expire_reservations(batch_size=options['batch_size'])
+            if expired:
+                self.stdout.write(f"{expired} ta band qilish muddati tugadi.")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,8 @@
+from core.exports import BaseExportCommand
+
+from web_app.exports import EXPORTS
+
+
+class Command(BaseExportCommand):
+    help = "Mualliflar, kitoblar yoki buyurtmalarni CSV / JSONL ga eksport qilish"
+    exports = EXPORTS
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from web_app import importer
+
+
+class Command(BaseCommand):
+    help = "Katalogni CSV / XLSX / JSONL fayldan yuklash"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=importer.FORMATS, help="Fayl kengaytmasidan aniqlanadi")
+        parser.add_argument('--chunk-size', type=int, default=importer.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            fmt = options['format'] or importer.detect_format(path)
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        with open(path, 'rb') as fileobj:
+            result = importer.import_catalog(fileobj, fmt, chunk_size=options['chunk_size'])
+
+        for line, message in result.errors:
+            self.stderr.write(f"{line}-qator: {message}")
+        for name, count in result.related_created.items():
+            self.stdout.write(f"Yangi {name}: {count}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Yaratildi: {result.created}, o'tkazib yuborildi: {result.skipped}, xato: {result.failed}"
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+
+from web_app import rollups
+
+
+class Command(BaseCommand):
+    help = "Kunlik hisobot jadvallarini buyurtmalardan qayta qurish"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=parse_date, help="Boshlanish sanasi (YYYY-MM-DD)")
+        parser.add_argument('--end', type=parse_date, help="Tugash sanasi (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        counts = rollups.rebuild(start=options['start'], end=options['end'])
+        for model, count in counts.items():
+            self.stdout.write(f"{model._meta.verbose_name_plural}: {count} ta qator")
+        self.stdout.write(self.style.SUCCESS("Hisobot jadvallari qayta qurildi."))
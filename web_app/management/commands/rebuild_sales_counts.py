@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from web_app.sales import rebuild_sales_counts
+
+
+class Command(BaseCommand):
+    help = "Book.sales_count ni OrderItem ma'lumotlaridan qayta hisoblash"
+
+    def handle(self, *args, **options):
+        updated = rebuild_sales_counts()
+        self.stdout.write(self.style.SUCCESS(f"{updated} ta kitob sotuvlari qayta hisoblandi."))
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from web_app.price_schedules import next_due, tick
+
+
+class Command(BaseCommand):
+    help = "Rejalashtirilgan narx / chegirma o'zgarishlarini vaqtida boshlash va tugatish"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="To'xtovsiz ishlash (fon jarayoni sifatida)")
+        parser.add_argument('--interval', type=int, default=30, help="Tekshirishlar orasidagi eng ko'p soniyalar")
+
+    def handle(self, *args, **options):
+        while True:
+            started, ended = tick()
+            if started or ended:
+                self.stdout.write(f"Boshlandi: {started} ta kitob, tugadi: {ended} ta kitob.")
+            if not options['loop']:
+                break
+
+            # Keyingi jadval interval ichida bo'lsa - aynan o'sha vaqtda uyg'onish
+            delay = options['interval']
+            due = next_due()
+            if due is not None:
+                delay = max(0, min(delay, (due - timezone.now()).total_seconds()))
+            time.sleep(delay)
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from web_app.pricing import CHUNK_SIZE, run_due_jobs
+
+
+class Command(BaseCommand):
+    help = "Navbatdagi ommaviy narxlash vazifalarini bajarish (vaqti kelgan chegirmalarni boshlash / tugatish)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--loop', action='store_true', help="To'xtovsiz ishlash (fon jarayoni sifatida)")
+        parser.add_argument('--interval', type=int, default=10, help="Tekshirishlar orasidagi soniyalar")
+
+    def handle(self, *args, **options):
+        while True:
+            for job in run_due_jobs(chunk_size=options['chunk_size']):
+                message = f"#{job.pk} {job.get_operation_display()}: {job.updated}/{job.total} ta kitob - {job.get_status_display()}"
+                if job.status == 'failed':
+                    self.stderr.write(self.style.ERROR(f"{message} ({job.error})"))
+                else:
+                    self.stdout.write(message)
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
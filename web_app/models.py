@@ -1,7 +1,11 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from core.indexes import prefix_index
+
 class Author(models.Model):
     """Muallif (Avtor)"""
     name = models.CharField(max_length=255, verbose_name="Muallif ismi")
@@ -16,6 +20,9 @@ class Author(models.Model):
         verbose_name = "Muallif"
         verbose_name_plural = "Mualliflar"
         ordering = ['name']
+        indexes = [
+            prefix_index('name', 'author_name_prefix_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -25,6 +32,9 @@ class Author(models.Model):
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
 
+        from .catalog import invalidate_taxonomy
+        invalidate_taxonomy(self)
+
 
 class Translator(models.Model):
     """Tarjimon"""
@@ -40,6 +50,9 @@ class Translator(models.Model):
         verbose_name = "Tarjimon"
         verbose_name_plural = "Tarjimonlar"
         ordering = ['name']
+        indexes = [
+            prefix_index('name', 'translator_name_prefix_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -49,6 +62,9 @@ class Translator(models.Model):
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
 
+        from .catalog import invalidate_taxonomy
+        invalidate_taxonomy(self)
+
 
 class Genre(models.Model):
     """Janr"""
@@ -64,6 +80,9 @@ class Genre(models.Model):
         verbose_name = "Janr"
         verbose_name_plural = "Janrlar"
         ordering = ['name']
+        indexes = [
+            prefix_index('name', 'genre_name_prefix_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -73,6 +92,9 @@ class Genre(models.Model):
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
 
+        from .catalog import invalidate_taxonomy
+        invalidate_taxonomy(self)
+
 
 class Category(models.Model):
     """Turkum (Kategoriya)"""
@@ -88,6 +110,9 @@ class Category(models.Model):
         verbose_name = "Turkum"
         verbose_name_plural = "Turkumlar"
         ordering = ['name']
+        indexes = [
+            prefix_index('name', 'category_name_prefix_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -97,6 +122,9 @@ class Category(models.Model):
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
 
+        from .catalog import invalidate_taxonomy
+        invalidate_taxonomy(self)
+
 
 class Publisher(models.Model):
     """Nashriyot"""
@@ -112,6 +140,9 @@ class Publisher(models.Model):
         verbose_name = "Nashriyot"
         verbose_name_plural = "Nashriyotlar"
         ordering = ['name']
+        indexes = [
+            prefix_index('name', 'publisher_name_prefix_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -121,6 +152,9 @@ class Publisher(models.Model):
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
 
+        from .catalog import invalidate_taxonomy
+        invalidate_taxonomy(self)
+
 
 class PrintingHouse(models.Model):
     """Bosmaxona"""
@@ -134,6 +168,9 @@ class PrintingHouse(models.Model):
         verbose_name = "Bosmaxona"
         verbose_name_plural = "Bosmaxonalar"
         ordering = ['name']
+        indexes = [
+            prefix_index('name', 'printing_house_name_prefix_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -263,6 +300,7 @@ class Book(models.Model):
             models.Index(fields=['-created_at']),
             models.Index(fields=['is_new']),
             models.Index(fields=['is_featured']),
+            prefix_index('title', 'book_title_prefix_idx'),
         ]
 
     def __str__(self):
@@ -273,6 +311,18 @@ class Book(models.Model):
             self.slug = slugify(self.title)
         super().save(*args, **kwargs)
 
+        from .catalog import evict_book_details
+        from .stats import invalidate_book_stats
+        evict_book_details([self.pk])
+        invalidate_book_stats()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+
+        from .stats import invalidate_book_stats
+        invalidate_book_stats()
+        return result
+
     @property
     def discount_percentage(self):
         """Chegirma foizi"""
@@ -369,6 +419,9 @@ class Order(models.Model):
         verbose_name = "Buyurtma"
         verbose_name_plural = "Buyurtmalar"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user_telegram_id', '-created_at'], name='order_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"Buyurtma #{self.order_number}"
@@ -392,4 +445,350 @@ class OrderItem(models.Model):
 
     @property
     def total_price(self):
-        return self.price * self.quantity
\ No newline at end of file
+        return self.price * self.quantity
+
+
+class OrderStatusEvent(models.Model):
+    """Buyurtma holati o'zgarishlari tarixi (faqat qo'shiladi)"""
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='status_events', verbose_name="Buyurtma")
+    from_status = models.CharField(
+        max_length=20,
+        choices=Order.STATUS_CHOICES,
+        blank=True,
+        null=True,
+        verbose_name="Oldingi holat"
+    )
+    to_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES, verbose_name="Yangi holat")
+    changed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="O'zgartirgan"
+    )
+    note = models.CharField(max_length=255, blank=True, verbose_name="Izoh")
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Sana")
+
+    class Meta:
+        verbose_name = "Buyurtma holati o'zgarishi"
+        verbose_name_plural = "Buyurtma holati tarixi"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['order', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"#{self.order_id}: {self.from_status or '—'} → {self.to_status}"
+
+    def save(self, *args, **kwargs):
+        if self.pk:
+            raise ValueError("Holat tarixi yozuvlarini o'zgartirib bo'lmaydi")
+        super().save(*args, **kwargs)
+
+
+class StockReservation(models.Model):
+    """Savatdagi kitob uchun vaqtincha band qilingan zaxira"""
+
+    STATUS_CHOICES = [
+        ('active', 'Faol'),
+        ('consumed', 'Buyurtmaga aylandi'),
+        ('released', 'Bekor qilindi'),
+        ('expired', 'Muddati tugadi'),
+    ]
+
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='reservations', verbose_name="Kitob")
+    telegram_id = models.BigIntegerField(verbose_name="Telegram ID")
+    quantity = models.PositiveIntegerField(default=1, verbose_name="Miqdor")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active', verbose_name="Holat")
+    expires_at = models.DateTimeField(verbose_name="Amal qilish muddati")
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Yangilangan")
+
+    class Meta:
+        verbose_name = "Zaxira (band qilish)"
+        verbose_name_plural = "Zaxiralar (band qilish)"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+            models.Index(fields=['book', 'status']),
+            models.Index(fields=['telegram_id', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.book_id} x {self.quantity} ({self.telegram_id})"
+
+
+# ============================================================================
+# TAVSIYALAR
+# ============================================================================
+
+class BookNeighbor(models.Model):
+    """Kitob uchun oldindan hisoblangan eng yaqin K ta kitob"""
+
+    KIND_CHOICES = [
+        ('also_bought', 'Birga sotib olinadi'),
+        ('similar', "O'xshash kitoblar"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name="Turi")
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='neighbors', verbose_name="Kitob")
+    neighbor = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='+', verbose_name="Tavsiya")
+    rank = models.PositiveSmallIntegerField(verbose_name="O'rin")
+    score = models.FloatField(verbose_name="Ball")
+
+    class Meta:
+        verbose_name = "Tavsiya"
+        verbose_name_plural = "Tavsiyalar"
+        ordering = ['book', 'kind', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['book', 'kind', 'rank'], name='book_neighbor_rank_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.book_id} → {self.neighbor_id} ({self.kind} #{self.rank})"
+
+
+class NeighborIndexState(models.Model):
+    """Tavsiyalar indeksini oxirgi yangilash holati"""
+    kind = models.CharField(max_length=20, unique=True, verbose_name="Turi")
+    cursor = models.BigIntegerField(default=0, verbose_name="Oxirgi qayta ishlangan ID")
+    watermark = models.DateTimeField(blank=True, null=True, verbose_name="Oxirgi o'zgarish vaqti")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Yangilangan")
+
+    class Meta:
+        verbose_name = "Tavsiyalar indeksi holati"
+        verbose_name_plural = "Tavsiyalar indeksi holati"
+
+    def __str__(self):
+        return self.kind
+
+
+# ============================================================================
+# KUNLIK HISOBOTLAR (rollup jadvallari)
+# ============================================================================
+
+class DailySalesRollup(models.Model):
+    """Kunlik sotuvlar (abstrakt)"""
+    date = models.DateField(verbose_name="Sana")
+    quantity = models.PositiveIntegerField(default=0, verbose_name="Sotilgan soni")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Tushum")
+
+    class Meta:
+        abstract = True
+        ordering = ['-date']
+
+    def __str__(self):
+        return str(self.date)
+
+
+class DailyBookSales(DailySalesRollup):
+    """Kunlik sotuvlar - kitob bo'yicha"""
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='daily_sales', verbose_name="Kitob")
+
+    class Meta(DailySalesRollup.Meta):
+        verbose_name = "Kunlik sotuv (kitob)"
+        verbose_name_plural = "Kunlik sotuvlar (kitoblar)"
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'book'], name='daily_book_sales_uniq'),
+        ]
+
+
+class DailyGenreSales(DailySalesRollup):
+    """Kunlik sotuvlar - janr bo'yicha"""
+    genre = models.ForeignKey(Genre, on_delete=models.CASCADE, related_name='daily_sales', verbose_name="Janr")
+
+    class Meta(DailySalesRollup.Meta):
+        verbose_name = "Kunlik sotuv (janr)"
+        verbose_name_plural = "Kunlik sotuvlar (janrlar)"
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'genre'], name='daily_genre_sales_uniq'),
+        ]
+
+
+class DailyCategorySales(DailySalesRollup):
+    """Kunlik sotuvlar - turkum bo'yicha"""
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='daily_sales', verbose_name="Turkum")
+
+    class Meta(DailySalesRollup.Meta):
+        verbose_name = "Kunlik sotuv (turkum)"
+        verbose_name_plural = "Kunlik sotuvlar (turkumlar)"
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'category'], name='daily_category_sales_uniq'),
+        ]
+
+
+class DailyAuthorSales(DailySalesRollup):
+    """Kunlik sotuvlar - muallif bo'yicha"""
+    author = models.ForeignKey(Author, on_delete=models.CASCADE, related_name='daily_sales', verbose_name="Muallif")
+
+    class Meta(DailySalesRollup.Meta):
+        verbose_name = "Kunlik sotuv (muallif)"
+        verbose_name_plural = "Kunlik sotuvlar (mualliflar)"
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'author'], name='daily_author_sales_uniq'),
+        ]
+
+
+class DailyOrderStats(models.Model):
+    """Kunlik buyurtmalar va tushum - holat bo'yicha"""
+    date = models.DateField(verbose_name="Sana")
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES, verbose_name="Holat")
+    orders_count = models.PositiveIntegerField(default=0, verbose_name="Buyurtmalar soni")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Summa")
+
+    class Meta:
+        verbose_name = "Kunlik buyurtmalar"
+        verbose_name_plural = "Kunlik buyurtmalar"
+        ordering = ['-date', 'status']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'status'], name='daily_order_stats_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.get_status_display()}"
+
+
+# ============================================================================
+# NARXLAR
+# ============================================================================
+
+class PricingJob(models.Model):
+    """Kitoblar narxi/chegirmasini ommaviy o'zgartirish (fon jarayonida bajariladi)"""
+
+    OPERATION_CHOICES = [
+        ('discount_percent', 'Chegirma (%)'),
+        ('discount_amount', "Chegirma (so'm)"),
+        ('clear_discount', 'Chegirmani olib tashlash'),
+        ('price_percent', "Narxni o'zgartirish (%)"),
+        ('price_amount', "Narxni o'zgartirish (so'm)"),
+    ]
+
+    ROUNDING_CHOICES = [
+        ('none', 'Yaxlitlamaslik'),
+        ('100', "100 so'mgacha"),
+        ('1000', "1 000 so'mgacha"),
+        ('900', "...900 bilan tugaydi"),
+    ]
+
+    STATUS_CHOICES = [
+        ('queued', 'Navbatda'),
+        ('running', 'Bajarilmoqda'),
+        ('active', 'Amalda (tugashini kutmoqda)'),
+        ('reverting', 'Bekor qilinmoqda'),
+        ('done', 'Bajarildi'),
+        ('failed', 'Xatolik'),
+    ]
+
+    operation = models.CharField(max_length=20, choices=OPERATION_CHOICES, verbose_name="Amal")
+    value = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name="Qiymat")
+    rounding = models.CharField(max_length=10, choices=ROUNDING_CHOICES, default='none', verbose_name="Yaxlitlash")
+    book_ids = models.JSONField(default=list, verbose_name="Kitoblar")
+    starts_at = models.DateTimeField(blank=True, null=True, verbose_name="Boshlanish vaqti")
+    ends_at = models.DateTimeField(blank=True, null=True, verbose_name="Tugash vaqti")
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued', verbose_name="Holat")
+    total = models.PositiveIntegerField(default=0, verbose_name="Jami kitoblar")
+    processed = models.PositiveIntegerField(default=0, verbose_name="Qayta ishlangan")
+    updated = models.PositiveIntegerField(default=0, verbose_name="O'zgargan")
+    error = models.TextField(blank=True, verbose_name="Xatolik")
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='+',
+        verbose_name="Yaratgan",
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Yangilangan")
+    finished_at = models.DateTimeField(blank=True, null=True, verbose_name="Tugagan")
+
+    class Meta:
+        verbose_name = "Narxlash vazifasi"
+        verbose_name_plural = "Narxlash vazifalari"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'starts_at']),
+            models.Index(fields=['status', 'ends_at']),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.get_operation_display()} ({self.get_status_display()})"
+
+    @property
+    def progress(self):
+        """Bajarilgan qism foizi"""
+        if not self.total:
+            return 100 if self.status in ('active', 'done') else 0
+        return min(100, round(self.processed * 100 / self.total))
+
+
+class PriceSchedule(models.Model):
+    """Kitob narxi / chegirmasining rejalashtirilgan o'zgarishi"""
+
+    STATUS_CHOICES = [
+        ('pending', 'Kutilmoqda'),
+        ('active', 'Amalda'),
+        ('done', 'Tugadi'),
+        ('cancelled', 'Bekor qilindi'),
+    ]
+
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='price_schedules', verbose_name="Kitob")
+    price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        verbose_name="Yangi narx",
+        help_text="Bo'sh - narx o'zgarmaydi",
+    )
+    discount_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        verbose_name="Chegirma narxi",
+        help_text="Bo'sh - shu davrda chegirma yo'q",
+    )
+    starts_at = models.DateTimeField(verbose_name="Boshlanish vaqti")
+    ends_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name="Tugash vaqti",
+        help_text="Bo'sh - o'zgarish doimiy",
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="Holat")
+
+    # Boshlanishda kitobdagi qiymatlar - tugaganda qaytariladi
+    previous_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True, editable=False)
+    previous_discount_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True, editable=False)
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Yangilangan")
+
+    class Meta:
+        verbose_name = "Narx jadvali"
+        verbose_name_plural = "Narx jadvallari"
+        ordering = ['starts_at']
+        indexes = [
+            models.Index(fields=['status', 'starts_at']),
+            models.Index(fields=['status', 'ends_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.book_id}: {self.starts_at:%Y-%m-%d %H:%M}"
+
+    def clean(self):
+        if self.price is None and self.discount_price is None:
+            raise ValidationError("Yangi narx yoki chegirma narxi kiritilishi kerak")
+        if self.ends_at and self.starts_at and self.ends_at <= self.starts_at:
+            raise ValidationError({'ends_at': "Tugash vaqti boshlanishdan keyin bo'lishi kerak"})
+        price = self.price
+        if price is None and self.book_id:
+            price = self.book.price
+        if self.discount_price is not None and price is not None and self.discount_price >= price:
+            raise ValidationError({'discount_price': "Chegirma narxi narxdan kichik bo'lishi kerak"})
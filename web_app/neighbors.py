@@ -0,0 +1,94 @@
+"""
+Oldindan hisoblangan "eng yaqin K ta kitob" jadvali (BookNeighbor) bilan ishlash.
+
+Hisoblash (co-purchase, o'xshashlik) offline bajariladi, so'rov vaqtida esa
+faqat (book, kind, rank) indeksi bo'yicha bitta SELECT ishlatiladi.
+"""
+import numpy as np
+from django.db import transaction
+
+from .models import BookNeighbor
+
+WRITE_BATCH_SIZE = 1000
+
+
+def top_k_rows(matrix, rows, k):
+    """
+    CSR matritsaning berilgan qatorlari uchun eng katta k ta qiymat.
+
+    Qaytaradi: {row: [(col, score), ...]} - ball bo'yicha kamayish tartibida.
+    """
+    result = {}
+    indptr, indices, data = matrix.indptr, matrix.indices, matrix.data
+    for row in rows:
+        start, end = indptr[row], indptr[row + 1]
+        cols = indices[start:end]
+        scores = data[start:end]
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            cols, scores = cols[top], scores[top]
+        order = np.lexsort((cols, -scores))
+        result[int(row)] = [(int(cols[i]), float(scores[i])) for i in order if scores[i] > 0]
+    return result
+
+
+def top_k_dense(scores, k):
+    """
+    Zich (dense) matritsaning har bir qatori uchun eng katta k ta musbat qiymat.
+
+    Qaytaradi: [[(col, score), ...], ...] - qatorlar tartibida.
+    """
+    n_rows, n_cols = scores.shape
+    if not n_cols:
+        return [[] for _ in range(n_rows)]
+    k = min(k, n_cols)
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    result = []
+    for cols, values in zip(top, top_scores):
+        order = np.lexsort((cols, -values))
+        result.append([(int(cols[i]), float(values[i])) for i in order if values[i] > 0])
+    return result
+
+
+def write_neighbors(kind, neighbors):
+    """
+    neighbors: {book_id: [(neighbor_id, score), ...]}.
+
+    Berilgan kitoblarning eski qatorlari o'chirilib, yangilari bulk_create
+    bilan yoziladi. Bo'sh ro'yxat - kitob uchun tavsiyalar o'chiriladi.
+    """
+    book_ids = list(neighbors)
+    with transaction.atomic():
+        for start in range(0, len(book_ids), WRITE_BATCH_SIZE):
+            BookNeighbor.objects.filter(
+                kind=kind,
+                book_id__in=book_ids[start:start + WRITE_BATCH_SIZE],
+            ).delete()
+
+        batch = []
+        for book_id, items in neighbors.items():
+            for rank, (neighbor_id, score) in enumerate(items, start=1):
+                batch.append(BookNeighbor(
+                    kind=kind,
+                    book_id=book_id,
+                    neighbor_id=neighbor_id,
+                    rank=rank,
+                    score=score,
+                ))
+                if len(batch) >= WRITE_BATCH_SIZE:
+                    BookNeighbor.objects.bulk_create(batch)
+                    batch = []
+        if batch:
+            BookNeighbor.objects.bulk_create(batch)
+
+
+def get_neighbors(book_id, kind, limit=10):
+    """Kitob uchun tavsiyalar - bitta indekslangan so'rov"""
+    return [
+        row.neighbor
+        for row in BookNeighbor.objects
+        .filter(book_id=book_id, kind=kind, neighbor__is_active=True)
+        .select_related('neighbor__author')
+        .order_by('rank')[:limit]
+    ]
@@ -0,0 +1,91 @@
+"""
+Telegram foydalanuvchisining buyurtmalar tarixi.
+
+(user_telegram_id, -created_at) indeksi bo'yicha keyset pagination,
+elementlar bitta prefetch so'rovi bilan yuklanadi.
+"""
+import base64
+import binascii
+
+from django.core.cache import cache
+from django.db.models import Prefetch, Q
+from django.utils.dateparse import parse_datetime
+
+from .models import Order, OrderItem
+
+LAST_STATUS_CACHE_TIMEOUT = 60 * 5
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 50
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(order):
+    raw = f"{order.created_at.isoformat()}|{order.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(cursor)
+    if created_at is None:
+        raise InvalidCursor(cursor)
+    return created_at, pk
+
+
+def get_order_history(telegram_id, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Foydalanuvchi buyurtmalari (yangilari birinchi).
+
+    Qaytaradi: (orders, next_cursor). next_cursor=None - boshqa sahifa yo'q.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    items = OrderItem.objects.select_related('book').only(
+        'order_id', 'quantity', 'price', 'book__title', 'book__slug'
+    )
+    queryset = (
+        Order.objects
+        .filter(user_telegram_id=telegram_id)
+        .order_by('-created_at', '-id')
+        .prefetch_related(Prefetch('items', queryset=items))
+    )
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+    orders = list(queryset[:limit + 1])
+    next_cursor = encode_cursor(orders[limit - 1]) if len(orders) > limit else None
+    return orders[:limit], next_cursor
+
+
+def _last_status_key(telegram_id):
+    return f"orders:last_status:{telegram_id}"
+
+
+def get_last_order_status(telegram_id):
+    """Oxirgi buyurtma holati (buyurtma kuzatish tugmasi uchun), keshlangan"""
+    key = _last_status_key(telegram_id)
+    data = cache.get(key)
+    if data is None:
+        order = (
+            Order.objects
+            .filter(user_telegram_id=telegram_id)
+            .order_by('-created_at', '-id')
+            .values('order_number', 'status', 'updated_at')
+            .first()
+        )
+        # Buyurtmasi yo'q foydalanuvchilar ham keshlanadi
+        data = order or {}
+        cache.set(key, data, LAST_STATUS_CACHE_TIMEOUT)
+    return data or None
+
+
+def invalidate_last_order_status(telegram_ids):
+    cache.delete_many([_last_status_key(telegram_id) for telegram_id in set(telegram_ids)])
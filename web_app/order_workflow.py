@@ -0,0 +1,134 @@
+"""
+Buyurtma holatlari mashinasi.
+
+Ruxsat etilgan o'tishlarni tekshiradi, buyurtmalarni ommaviy o'tkazadi
+(har bir eski holat uchun bitta UPDATE) va har bir o'tishni
+OrderStatusEvent jadvaliga bulk_create bilan yozib boradi.
+"""
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import order_history, reservations, rollups, sales
+from .models import Order, OrderItem, OrderStatusEvent
+
+# holat -> unga o'tish mumkin bo'lgan holatlar
+TRANSITIONS = {
+    'pending': {'confirmed', 'cancelled'},
+    'confirmed': {'processing', 'shipped', 'cancelled'},
+    'processing': {'shipped', 'cancelled'},
+    'shipped': {'delivered'},
+    'delivered': set(),
+    'cancelled': set(),
+}
+
+
+class InvalidTransition(Exception):
+    """Ruxsat etilmagan holat o'tishi"""
+
+    def __init__(self, from_status, to_status):
+        self.from_status = from_status
+        self.to_status = to_status
+        super().__init__(f"'{from_status}' holatidan '{to_status}' holatiga o'tib bo'lmaydi")
+
+
+@dataclass
+class TransitionResult:
+    updated: int = 0
+    skipped: dict = field(default_factory=dict)  # eski holat -> o'tkazilmagan buyurtmalar soni
+
+    @property
+    def skipped_count(self):
+        return sum(self.skipped.values())
+
+
+def can_transition(from_status, to_status):
+    return to_status in TRANSITIONS.get(from_status, ())
+
+
+def allowed_sources(to_status):
+    """to_status ga o'tish mumkin bo'lgan holatlar"""
+    return [status for status, targets in TRANSITIONS.items() if to_status in targets]
+
+
+def check_transition(from_status, to_status):
+    if not can_transition(from_status, to_status):
+        raise InvalidTransition(from_status, to_status)
+
+
+def _apply(order_ids, from_status, to_status):
+    """Holat o'zgarishining qo'shimcha ta'sirlari (sotuvlar hisobi, kunlik hisobotlar)"""
+    sales.record_status_change(order_ids, from_status, to_status)
+    rollups.record_status_change(order_ids, from_status, to_status)
+
+
+def transition_orders(queryset, to_status, user=None, note=''):
+    """
+    Buyurtmalarni to_status holatiga ommaviy o'tkazish.
+
+    Ruxsat etilmagan holatdagi buyurtmalar o'tkazilmaydi va natijada
+    skipped sifatida qaytariladi.
+    """
+    result = TransitionResult()
+    with transaction.atomic():
+        rows = list(queryset.select_for_update().values_list('id', 'status', 'user_telegram_id'))
+
+        by_status = {}
+        telegram_ids = set()
+        for order_id, status, telegram_id in rows:
+            by_status.setdefault(status, []).append(order_id)
+            if can_transition(status, to_status):
+                telegram_ids.add(telegram_id)
+
+        now = timezone.now()
+        events = []
+        for from_status, order_ids in by_status.items():
+            if not can_transition(from_status, to_status):
+                result.skipped[from_status] = len(order_ids)
+                continue
+
+            result.updated += Order.objects.filter(pk__in=order_ids, status=from_status).update(
+                status=to_status,
+                updated_at=now,
+            )
+            _apply(order_ids, from_status, to_status)
+            events.extend(
+                OrderStatusEvent(
+                    order_id=order_id,
+                    from_status=from_status,
+                    to_status=to_status,
+                    changed_by=user,
+                    note=note,
+                )
+                for order_id in order_ids
+            )
+
+        OrderStatusEvent.objects.bulk_create(events, batch_size=1000)
+        transaction.on_commit(lambda: order_history.invalidate_last_order_status(telegram_ids))
+    return result
+
+
+def record_transition(order, from_status, user=None, note=''):
+    """
+    Bitta buyurtma saqlangandan keyin (masalan admin formasidan) o'tishni qayd etish.
+
+    from_status=None - yangi yaratilgan buyurtma.
+    """
+    if from_status == order.status:
+        return None
+    _apply([order.pk], from_status, order.status)
+    transaction.on_commit(lambda: order_history.invalidate_last_order_status([order.user_telegram_id]))
+    if from_status is None and order.status != 'cancelled':
+        # Savatdagi band qilishlar buyurtmaga aylanadi. Admin formasida elementlar
+        # buyurtmadan keyin saqlanadi, shuning uchun kitoblar commit da olinadi.
+        transaction.on_commit(lambda: reservations.consume(
+            order.user_telegram_id, OrderItem.objects.filter(order_id=order.pk).values('book_id'),
+        ))
+    return OrderStatusEvent.objects.create(
+        order=order,
+        from_status=from_status,
+        to_status=order.status,
+        changed_by=user,
+        note=note,
+    )
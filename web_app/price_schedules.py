@@ -0,0 +1,144 @@
+"""
+Rejalashtirilgan narx / chegirma o'zgarishlari (PriceSchedule).
+
+Rejalashtiruvchi (`run_price_schedules --loop`) har bir qadamda:
+- vaqti kelgan (starts_at <= now) barcha jadvallar uchun kitoblardagi
+  hozirgi qiymatlarni previous_* ga saqlaydi va yangi qiymatlarni bitta
+  UPDATE ... SET price = (SELECT ...) bilan qo'llaydi;
+- tugagan (ends_at <= now) jadvallarni kitobning faol jadvallari
+  "stekidan" chiqaradi: kitobda hali faol boshqa jadval bo'lsa uning
+  qiymatlari qo'llanadi, bo'lmasa eski qiymatlar qaytariladi (bitta
+  bulk_update). Keyinroq boshlangan jadval tugaganining previous_*
+  qiymatlarini meros oladi, shuning uchun u ham tugaganda tugab bo'lgan
+  jadval qiymatlari qaytib kelmaydi. Oraliqda qo'lda o'zgartirilgan
+  kitoblar tegilmaydi.
+Har ikkala holatda ham kitoblar soni qancha bo'lishidan qat'i nazar
+so'rovlar soni o'zgarmaydi, o'zgargan kitoblarning API keshi tozalanadi.
+"""
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .catalog import evict_book_details
+from .models import Book, PriceSchedule
+from .stats import invalidate_book_stats
+
+
+def _lock_due(queryset):
+    return list(queryset.select_for_update(skip_locked=True).values_list('pk', 'book_id'))
+
+
+def _latest(schedule_ids):
+    # Bir kitobga bir vaqtda bir nechta jadval to'g'ri kelsa - eng oxirgisi
+    return (
+        PriceSchedule.objects
+        .filter(pk__in=schedule_ids, book=OuterRef('pk'))
+        .order_by('-starts_at', '-pk')
+    )
+
+
+def _start(now):
+    rows = _lock_due(PriceSchedule.objects.filter(status='pending', starts_at__lte=now))
+    if not rows:
+        return set()
+    schedule_ids = [pk for pk, _ in rows]
+    book_ids = {book_id for _, book_id in rows}
+
+    schedules = PriceSchedule.objects.filter(pk__in=schedule_ids)
+    book = Book.objects.filter(pk=OuterRef('book_id'))
+    schedules.update(
+        previous_price=Subquery(book.values('price')[:1]),
+        previous_discount_price=Subquery(book.values('discount_price')[:1]),
+    )
+
+    latest = _latest(schedule_ids)
+    Book.objects.filter(pk__in=book_ids).update(
+        price=Coalesce(Subquery(latest.values('price')[:1]), F('price')),
+        discount_price=Subquery(latest.values('discount_price')[:1]),
+    )
+
+    schedules.filter(ends_at__isnull=True).update(status='done', updated_at=now)
+    schedules.filter(ends_at__isnull=False).update(status='active', updated_at=now)
+    return book_ids
+
+
+def _effective(price, discount_price, previous_price):
+    """Jadval kitobga qo'ygan (narx, chegirma narxi) - price bo'sh bo'lsa narx o'zgarmagan"""
+    return (price if price is not None else previous_price, discount_price)
+
+
+def _end(now):
+    rows = _lock_due(PriceSchedule.objects.filter(status='active', ends_at__lte=now))
+    if not rows:
+        return set()
+    ending = {pk for pk, _ in rows}
+
+    # Kitob bo'yicha faol jadvallar boshlanish tartibida; oxirgisi kitobga qiymat qo'ygan
+    stacks = {}
+    for row in (
+        PriceSchedule.objects.select_for_update()
+        .filter(status='active', book_id__in={book_id for _, book_id in rows})
+        .order_by('starts_at', 'pk')
+        .values_list('pk', 'book_id', 'price', 'discount_price', 'previous_price', 'previous_discount_price')
+    ):
+        stacks.setdefault(row[1], []).append(row)
+    current = {
+        pk: (price, discount_price)
+        for pk, price, discount_price in Book.objects.filter(pk__in=stacks.keys()).values_list(
+            'pk', 'price', 'discount_price'
+        )
+    }
+
+    inherited, restored = [], []
+    for book_id, stack in stacks.items():
+        carry = None  # tugayotgan ketma-ket jadvallardan birinchisining previous_* qiymatlari
+        remaining = []
+        for pk, _, price, discount_price, previous_price, previous_discount_price in stack:
+            if pk in ending:
+                if carry is None:
+                    carry = (previous_price, previous_discount_price)
+                continue
+            if carry is not None:
+                previous_price, previous_discount_price = carry
+                inherited.append(PriceSchedule(
+                    pk=pk, previous_price=previous_price, previous_discount_price=previous_discount_price,
+                ))
+                carry = None
+            remaining.append(_effective(price, discount_price, previous_price))
+
+        top = stack[-1]
+        # Kitobdagi qiymat tugamayotgan jadvalniki yoki qo'lda o'zgartirilgan - tegilmaydi
+        if top[0] not in ending or current[book_id] != _effective(top[2], top[3], top[4]):
+            continue
+        price, discount_price = remaining[-1] if remaining else carry
+        restored.append(Book(pk=book_id, price=price, discount_price=discount_price))
+
+    PriceSchedule.objects.bulk_update(inherited, ['previous_price', 'previous_discount_price'])
+    Book.objects.bulk_update(restored, ['price', 'discount_price'])
+    PriceSchedule.objects.filter(pk__in=ending).update(status='done', updated_at=now)
+    return {book.pk for book in restored}
+
+
+def tick(now=None):
+    """Vaqti kelgan jadvallarni boshlash va tugatish: (boshlangan, tugagan) kitoblar soni"""
+    now = now or timezone.now()
+    with transaction.atomic():
+        started = _start(now)
+        ended = _end(now)
+
+    changed = started | ended
+    if changed:
+        evict_book_details(changed)
+        invalidate_book_stats()
+    return len(started), len(ended)
+
+
+def next_due():
+    """Keyingi boshlanish / tugash vaqti (yo'q bo'lsa None)"""
+    times = [
+        PriceSchedule.objects.filter(status='pending').order_by('starts_at').values_list('starts_at', flat=True).first(),
+        PriceSchedule.objects.filter(status='active').order_by('ends_at').values_list('ends_at', flat=True).first(),
+    ]
+    times = [value for value in times if value is not None]
+    return min(times) if times else None
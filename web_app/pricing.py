@@ -0,0 +1,212 @@
+"""
+Kitoblar narxi va chegirmalarini ommaviy o'zgartirish.
+
+Admin yoki API faqat PricingJob yozuvini yaratadi; narxlar fon jarayonida
+(`run_pricing_jobs --loop`) o'zgaradi. Har bir amal bitta UPDATE ... SET
+discount_price = <F() ifoda> bilan bajariladi, kitoblar CHUNK_SIZE lik
+qismlarga bo'linadi: har bir qism va progress hisoblagichi bitta
+tranzaksiyada yoziladi, shuning uchun to'xtab qolgan vazifa keyingi
+ishga tushishda aynan qolgan joyidan davom etadi.
+
+ends_at berilgan chegirma vaqti kelganda bekor qilinadi: discount_price
+faqat hali shu vazifa qo'ygan qiymatda turgan kitoblarda NULL ga
+qaytariladi (oraliqda qo'lda o'zgartirilganlari tegilmaydi).
+"""
+import logging
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Q, Value, When
+from django.db.models.functions import Ceil, Round
+from django.utils import timezone
+
+from .catalog import evict_book_details
+from .models import Book, PricingJob
+from .stats import invalidate_book_stats
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+# Shu vaqt davomida progress yangilanmagan "running" vazifa to'xtab qolgan hisoblanadi
+STALE_AFTER = timedelta(minutes=10)
+
+DISCOUNT_OPERATIONS = ('discount_percent', 'discount_amount')
+
+PRICE_FIELD = DecimalField(max_digits=10, decimal_places=2)
+
+
+class PricingError(ValueError):
+    """Noto'g'ri narxlash parametrlari"""
+
+
+def validate(operation, value, ends_at=None, starts_at=None):
+    if operation not in dict(PricingJob.OPERATION_CHOICES):
+        raise PricingError(f"Noma'lum amal: {operation}")
+    if operation == 'discount_percent' and not 0 < value < 100:
+        raise PricingError("Chegirma foizi 0 dan katta va 100 dan kichik bo'lishi kerak")
+    if operation == 'discount_amount' and value <= 0:
+        raise PricingError("Chegirma summasi musbat bo'lishi kerak")
+    if operation == 'price_percent' and value <= -100:
+        raise PricingError("Narx 100% dan ko'p kamaytirilmaydi")
+    if ends_at is not None:
+        if operation not in DISCOUNT_OPERATIONS:
+            raise PricingError("Tugash vaqti faqat chegirmalar uchun")
+        if starts_at is not None and ends_at <= starts_at:
+            raise PricingError("Tugash vaqti boshlanishdan keyin bo'lishi kerak")
+
+
+def _decimal(value):
+    return Value(Decimal(value), output_field=PRICE_FIELD)
+
+
+def _round(expression, rounding):
+    # SQL da bo'lish yo'q (SQLite butun sonlarni butun bo'ladi) - faqat ko'paytirish
+    if rounding == 'none':
+        return Round(expression, 2, output_field=PRICE_FIELD)
+    if rounding == '900':
+        # 45 120 -> 45 900
+        return Ceil(expression * _decimal('0.001'), output_field=PRICE_FIELD) * Value(1000) - Value(100)
+    step = int(rounding)
+    return Round(expression * _decimal(Decimal(1) / step), output_field=PRICE_FIELD) * Value(step)
+
+
+def new_value_expression(operation, value, rounding):
+    """Amal natijasi - eski `price` ustunidan hisoblanadigan SQL ifoda"""
+    value = Decimal(value)
+    price = F('price')
+    if operation == 'discount_percent':
+        expression = price * _decimal((100 - value) / 100)
+    elif operation == 'discount_amount':
+        expression = price - _decimal(value)
+    elif operation == 'price_percent':
+        expression = price * _decimal((100 + value) / 100)
+    elif operation == 'price_amount':
+        expression = price + _decimal(value)
+    else:
+        return None
+    return _round(expression, rounding)
+
+
+def apply(queryset, operation, value, rounding):
+    """Amalni queryset dagi kitoblarga bitta UPDATE bilan qo'llash. O'zgargan qatorlar soni."""
+    if operation == 'clear_discount':
+        return queryset.filter(discount_price__isnull=False).update(discount_price=None)
+
+    new_value = new_value_expression(operation, value, rounding)
+    queryset = queryset.alias(new_value=new_value).filter(new_value__gt=0)
+    if operation in DISCOUNT_OPERATIONS:
+        # Chegirma narxdan kichik bo'lishi shart
+        return queryset.filter(new_value__lt=F('price')).update(discount_price=new_value)
+
+    # Narx o'zgarganda yangi narxdan katta yoki teng bo'lib qolgan chegirma olib tashlanadi
+    return queryset.update(
+        price=new_value,
+        discount_price=Case(
+            When(discount_price__gte=new_value, then=Value(None)),
+            default=F('discount_price'),
+            output_field=PRICE_FIELD,
+        ),
+    )
+
+
+def revert(queryset, operation, value, rounding):
+    """Chegirmani bekor qilish - faqat discount_price hali shu amal natijasiga teng bo'lsa"""
+    new_value = new_value_expression(operation, value, rounding)
+    return (
+        queryset
+        .alias(new_value=new_value)
+        .filter(discount_price=F('new_value'))
+        .update(discount_price=None)
+    )
+
+
+def create_job(book_ids, operation, value=0, rounding='none', starts_at=None, ends_at=None, user=None):
+    """Navbatga yangi vazifa qo'yish (kitoblar shu paytdagi ro'yxat bo'yicha)"""
+    value = Decimal(value)
+    validate(operation, value, ends_at=ends_at, starts_at=starts_at)
+    book_ids = sorted(set(book_ids))
+    return PricingJob.objects.create(
+        operation=operation,
+        value=value,
+        rounding=rounding,
+        book_ids=book_ids,
+        starts_at=starts_at,
+        ends_at=ends_at,
+        total=len(book_ids),
+        created_by=user,
+    )
+
+
+def _claim(now):
+    """Vaqti kelgan bitta vazifani band qilish: (job, phase) yoki (None, None)"""
+    due = (
+        Q(status='queued') & (Q(starts_at__isnull=True) | Q(starts_at__lte=now))
+        | Q(status='active', ends_at__lte=now)
+        | Q(status__in=['running', 'reverting'], updated_at__lt=now - STALE_AFTER)
+    )
+    with transaction.atomic():
+        job = (
+            PricingJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(due)
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None, None
+
+        if job.status == 'queued':
+            job.status, job.processed, job.updated = 'running', 0, 0
+        elif job.status == 'active':
+            job.status, job.processed = 'reverting', 0
+        # running / reverting - to'xtab qolgan vazifa, processed dan davom etadi
+        job.save(update_fields=['status', 'processed', 'updated', 'updated_at'])
+    return job, job.status
+
+
+def _process(job, phase, chunk_size):
+    step = revert if phase == 'reverting' else apply
+    ids = job.book_ids
+    for start in range(job.processed, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        with transaction.atomic():
+            changed = step(Book.objects.filter(pk__in=chunk), job.operation, job.value, job.rounding)
+            job.processed = start + len(chunk)
+            if phase == 'running':
+                job.updated += changed
+            PricingJob.objects.filter(pk=job.pk).update(
+                processed=job.processed,
+                updated=job.updated,
+                updated_at=timezone.now(),
+            )
+        evict_book_details(chunk)
+
+
+def run_job(job, phase, chunk_size=CHUNK_SIZE):
+    """Band qilingan vazifani oxirigacha bajarish (xatolikda - status='failed')"""
+    try:
+        _process(job, phase, chunk_size)
+    except Exception as exc:
+        logger.exception("Narxlash vazifasi #%s bajarilmadi", job.pk)
+        job.status, job.error, job.finished_at = 'failed', str(exc), timezone.now()
+    else:
+        if phase == 'running' and job.ends_at is not None:
+            job.status = 'active'
+        else:
+            job.status, job.finished_at = 'done', timezone.now()
+    finally:
+        invalidate_book_stats()
+
+    job.save(update_fields=['status', 'error', 'finished_at', 'updated_at'])
+    return job
+
+
+def run_due_jobs(chunk_size=CHUNK_SIZE, now=None):
+    """Vaqti kelgan barcha vazifalarni bajarish. Bajarilganlar ro'yxati."""
+    finished = []
+    while True:
+        job, phase = _claim(now or timezone.now())
+        if job is None:
+            return finished
+        finished.append(run_job(job, phase, chunk_size))
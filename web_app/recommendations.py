@@ -0,0 +1,192 @@
+"""
+"Buni ham sotib olishadi" - birga sotib olish (co-purchase) tavsiyalari.
+
+OrderItem lardan buyurtma x kitob siyrak matritsasi (X) quriladi, kitob x
+kitob birga uchrash matritsasi C = X.T @ X. Ball - kosinus o'xshashligi:
+C[a, b] / sqrt(n[a] * n[b]), bu yerda n - kitob qatnashgan buyurtmalar soni.
+
+C va n fayl (.npz) sifatida saqlanadi, keyingi ishga tushirishda faqat oxirgi
+holat o'zgarishlari (OrderStatusEvent) qo'shiladi/ayiriladi va faqat
+o'zgargan kitoblarning top-K ro'yxati qayta yoziladi.
+
+Fayl o'zi qaysi OrderStatusEvent gacha qo'shilganini (cursor) saqlaydi va
+tranzaksiya ichida, tavsiyalar va NeighborIndexState yozilgandan keyin
+almashtiriladi: ular commit bo'lmay qolsa fayl va bazadagi cursor farq
+qiladi va keyingi ishga tushirish to'liq qayta quradi - delta ikki marta
+qo'shilmaydi.
+"""
+import os
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from scipy import sparse
+
+from .models import Book, BookNeighbor, NeighborIndexState, OrderItem, OrderStatusEvent
+from .neighbors import top_k_rows, write_neighbors
+from .sales import COUNTED_STATUSES, sales_sign
+
+KIND = 'also_bought'
+TOP_K = 20
+FETCH_CHUNK_SIZE = 10000
+
+
+def _matrix_path():
+    directory = Path(getattr(settings, 'RECOMMENDATIONS_DIR', settings.BASE_DIR / 'var' / 'recommendations'))
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / 'also_bought.npz'
+
+
+def _order_book_pairs(queryset):
+    """(order_ids, book_ids) massivlari"""
+    pairs = np.fromiter(
+        (value for row in queryset.values_list('order_id', 'book_id').iterator(chunk_size=FETCH_CHUNK_SIZE)
+         for value in row),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def cooccurrence(order_ids, book_ids, n_books):
+    """
+    Birga uchrash matritsasi va har bir kitob uchun buyurtmalar soni.
+
+    Qaytaradi: (C - n_books x n_books CSR, diagonal 0; counts - n_books uzunlikdagi massiv)
+    """
+    if not len(order_ids):
+        return sparse.csr_matrix((n_books, n_books), dtype=np.int32), np.zeros(n_books, dtype=np.int32)
+
+    _, order_index = np.unique(order_ids, return_inverse=True)
+    x = sparse.csr_matrix(
+        (np.ones(len(book_ids), dtype=np.int32), (order_index, book_ids)),
+        shape=(order_index.max() + 1, n_books),
+    )
+    # Bir buyurtmada bitta kitob ikki qatorda bo'lsa ham bir marta sanaladi
+    x.data[:] = 1
+
+    c = (x.T @ x).tocsr()
+    counts = c.diagonal().astype(np.int32)
+    c.setdiag(0)
+    c.eliminate_zeros()
+    return c, counts
+
+
+def _resize(matrix, counts, n_books):
+    if matrix.shape[0] < n_books:
+        matrix = matrix.tolil()
+        matrix.resize((n_books, n_books))
+        matrix = matrix.tocsr()
+        counts = np.concatenate([counts, np.zeros(n_books - len(counts), dtype=counts.dtype)])
+    return matrix, counts
+
+
+def _scores(c, counts, rows):
+    """Berilgan qatorlar uchun kosinus ballari (CSR)"""
+    sub = c[rows].tocoo()
+    norm = np.sqrt(counts[np.asarray(rows)[sub.row]].astype(np.float64) * counts[sub.col])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = np.where(norm > 0, sub.data / norm, 0.0)
+    return sparse.csr_matrix((values, (sub.row, sub.col)), shape=(len(rows), c.shape[1]))
+
+
+def _load():
+    path = _matrix_path()
+    if not path.exists():
+        return None
+    with np.load(path) as data:
+        matrix = sparse.csr_matrix((data['data'], data['indices'], data['indptr']), shape=tuple(data['shape']))
+        cursor = int(data['cursor']) if 'cursor' in data.files else None
+        return matrix, data['counts'], cursor
+
+
+def _save(matrix, counts, cursor):
+    path = _matrix_path()
+    tmp_path = path.with_suffix('.tmp.npz')
+    np.savez_compressed(
+        tmp_path,
+        data=matrix.data,
+        indices=matrix.indices,
+        indptr=matrix.indptr,
+        shape=np.array(matrix.shape),
+        counts=counts,
+        cursor=np.array(cursor, dtype=np.int64),
+    )
+    os.replace(tmp_path, path)
+
+
+def _incremental_delta(cursor, last_event_id, n_books):
+    """Oxirgi ishga tushirishdan keyingi holat o'zgarishlaridan delta matritsa"""
+    signs = {}
+    events = (
+        OrderStatusEvent.objects
+        .filter(id__gt=cursor, id__lte=last_event_id)
+        .order_by('id')
+        .values_list('order_id', 'from_status', 'to_status')
+    )
+    for order_id, from_status, to_status in events.iterator(chunk_size=FETCH_CHUNK_SIZE):
+        signs[order_id] = signs.get(order_id, 0) + sales_sign(from_status, to_status)
+
+    pairs = {}
+    for sign in (1, -1):
+        order_ids = [order_id for order_id, value in signs.items() if value == sign]
+        if order_ids:
+            pairs[sign] = _order_book_pairs(OrderItem.objects.filter(order_id__in=order_ids))
+    # n_books hisoblangandan keyin yaratilgan kitob bo'lsa matritsa kengaytiriladi
+    for _, book_ids in pairs.values():
+        if len(book_ids):
+            n_books = max(n_books, int(book_ids.max()) + 1)
+
+    delta_c = sparse.csr_matrix((n_books, n_books), dtype=np.int32)
+    delta_counts = np.zeros(n_books, dtype=np.int32)
+    for sign, (order_ids, book_ids) in pairs.items():
+        c, counts = cooccurrence(order_ids, book_ids, n_books)
+        delta_c = delta_c + sign * c
+        delta_counts = delta_counts + sign * counts
+    return delta_c.tocsr(), delta_counts
+
+
+def refresh(full=False, top_k=TOP_K):
+    """
+    Tavsiyalarni yangilash. Qaytaradi: qayta yozilgan kitoblar soni.
+
+    full=True yoki saqlangan matritsa bo'lmasa - barcha buyurtmalardan qayta quriladi.
+    """
+    state, _ = NeighborIndexState.objects.get_or_create(kind=KIND)
+    n_books = (Book.objects.aggregate(max_id=Max('id'))['max_id'] or 0) + 1
+    last_event_id = OrderStatusEvent.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+
+    stored = None if full else _load()
+    if stored is not None and stored[2] != state.cursor:
+        # Oldingi ishga tushirish fayl almashtirilgach commit bo'lmagan (yoki eski format)
+        stored = None
+    if stored is None:
+        items = OrderItem.objects.filter(order__status__in=COUNTED_STATUSES, book_id__lt=n_books)
+        c, counts = cooccurrence(*_order_book_pairs(items), n_books)
+        touched = np.flatnonzero(np.diff(c.indptr))
+        # Avval tavsiyasi bo'lgan, endi bo'lmaganlar ham tozalanadi
+        stale = BookNeighbor.objects.filter(kind=KIND).values_list('book_id', flat=True).distinct()
+        touched = sorted(set(touched.tolist()) | set(stale))
+    else:
+        delta_c, delta_counts = _incremental_delta(state.cursor, last_event_id, n_books)
+        c, counts = _resize(stored[0], stored[1], delta_c.shape[0])
+        c = (c + delta_c).tocsr()
+        c.data[c.data < 0] = 0
+        c.eliminate_zeros()
+        counts = np.maximum(counts + delta_counts, 0)
+        # Eslatma: faqat delta tegib o'tgan kitoblar qayta yoziladi; ularning qo'shnilari
+        # ballari (normalizatsiya sababli) keyingi to'liq qayta qurishgacha biroz eskiradi
+        touched = np.flatnonzero((np.diff(delta_c.indptr) != 0) | (delta_counts != 0)).tolist()
+
+    with transaction.atomic():
+        for start in range(0, len(touched), 1000):
+            rows = touched[start:start + 1000]
+            scores = _scores(c, counts, rows)
+            top = top_k_rows(scores, range(len(rows)), top_k)
+            write_neighbors(KIND, {rows[i]: items for i, items in top.items()})
+
+        state.cursor = last_event_id
+        state.save()
+        _save(c, counts, last_event_id)
+    return len(touched)
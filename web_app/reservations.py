@@ -0,0 +1,177 @@
+"""
+Savat uchun zaxirani vaqtincha band qilish.
+
+Mavjud zaxira = stock_quantity - faol band qilishlar. Band qilingan miqdor
+har bir kitob uchun keshdagi hisoblagichda saqlanadi, shuning uchun kitob
+sahifasi har safar band qilishlar bo'yicha aggregate bajarmaydi.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Book, StockReservation
+
+RESERVATION_TTL = getattr(settings, 'STOCK_RESERVATION_TTL', 15 * 60)
+COUNTER_TIMEOUT = 5 * 60
+SWEEP_BATCH_SIZE = 500
+
+
+class InsufficientStock(Exception):
+    """Omborda yetarli kitob yo'q"""
+
+    def __init__(self, book_id, available):
+        self.book_id = book_id
+        self.available = available
+        super().__init__(f"Kitob #{book_id}: faqat {available} ta mavjud")
+
+
+def _counter_key(book_id):
+    return f"stock:reserved:{book_id}"
+
+
+def _active(queryset, now=None):
+    return queryset.filter(status='active', expires_at__gt=now or timezone.now())
+
+
+def _reserved_from_db(book_ids):
+    # Hisoblagich "active" holatdagi barcha qatorlarni sanaydi - muddati o'tganlarini
+    # expire_reservations yopganda ayiradi
+    rows = (
+        StockReservation.objects
+        .filter(book_id__in=book_ids, status='active')
+        .values('book_id')
+        .annotate(total=Sum('quantity'))
+        .values_list('book_id', 'total')
+    )
+    reserved = dict.fromkeys(book_ids, 0)
+    reserved.update(rows)
+    return reserved
+
+
+def reserved_quantities(book_ids):
+    """{book_id: band qilingan miqdor} - keshdan, yo'q bo'lsa bazadan"""
+    book_ids = list(book_ids)
+    keys = {_counter_key(book_id): book_id for book_id in book_ids}
+    cached = cache.get_many(keys)
+    reserved = {keys[key]: value for key, value in cached.items()}
+
+    missing = [book_id for book_id in book_ids if book_id not in reserved]
+    if missing:
+        from_db = _reserved_from_db(missing)
+        cache.set_many({_counter_key(book_id): value for book_id, value in from_db.items()}, COUNTER_TIMEOUT)
+        reserved.update(from_db)
+    return reserved
+
+
+def available_stock(book):
+    """Sotib olish mumkin bo'lgan miqdor"""
+    reserved = reserved_quantities([book.pk])[book.pk]
+    return max(0, book.stock_quantity - reserved)
+
+
+def _adjust_counters(deltas):
+    """Hisoblagichlarni yangilash; keshda yo'q bo'lsa keyingi o'qishda bazadan olinadi"""
+    for book_id, delta in deltas.items():
+        if not delta:
+            continue
+        try:
+            cache.incr(_counter_key(book_id), delta)
+        except ValueError:
+            pass
+
+
+def reserve(book_id, telegram_id, quantity, ttl=None):
+    """
+    Kitobni savat uchun band qilish (yoki mavjud band qilish miqdorini o'zgartirish).
+
+    Zaxira yetmasa InsufficientStock ko'tariladi.
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=ttl or RESERVATION_TTL)
+
+    with transaction.atomic():
+        book = Book.objects.select_for_update().only('id', 'stock_quantity').get(pk=book_id, is_active=True)
+        reservations = _active(StockReservation.objects.filter(book_id=book_id), now)
+        reserved_by_others = reservations.exclude(telegram_id=telegram_id).aggregate(
+            total=Sum('quantity')
+        )['total'] or 0
+        available = max(0, book.stock_quantity - reserved_by_others)
+        if quantity > available:
+            raise InsufficientStock(book_id, available)
+
+        reservation = reservations.filter(telegram_id=telegram_id).first()
+        if reservation:
+            delta = quantity - reservation.quantity
+            reservation.quantity = quantity
+            reservation.expires_at = expires_at
+            reservation.save(update_fields=['quantity', 'expires_at', 'updated_at'])
+        else:
+            delta = quantity
+            reservation = StockReservation.objects.create(
+                book_id=book_id,
+                telegram_id=telegram_id,
+                quantity=quantity,
+                expires_at=expires_at,
+            )
+        transaction.on_commit(lambda: _adjust_counters({book_id: delta}))
+    return reservation
+
+
+def _close(queryset, status):
+    """Faol band qilishlarni yopish va hisoblagichlarni kamaytirish"""
+    with transaction.atomic():
+        rows = list(queryset.filter(status='active').select_for_update().values_list('id', 'book_id', 'quantity'))
+        if not rows:
+            return 0
+        StockReservation.objects.filter(pk__in=[row[0] for row in rows], status='active').update(
+            status=status,
+            updated_at=timezone.now(),
+        )
+        deltas = {}
+        for _, book_id, quantity in rows:
+            deltas[book_id] = deltas.get(book_id, 0) - quantity
+        transaction.on_commit(lambda: _adjust_counters(deltas))
+    return len(rows)
+
+
+def release(telegram_id, book_id=None):
+    """Foydalanuvchi savatdan olib tashlaganda"""
+    queryset = StockReservation.objects.filter(telegram_id=telegram_id)
+    if book_id is not None:
+        queryset = queryset.filter(book_id=book_id)
+    return _close(queryset, 'released')
+
+
+def release_queryset(queryset):
+    """Admin uchun: tanlangan band qilishlarni bekor qilish"""
+    return _close(queryset, 'released')
+
+
+def consume(telegram_id, book_ids=None):
+    """Buyurtma rasmiylashtirilganda band qilishlarni yopish (order_workflow.record_transition)"""
+    queryset = StockReservation.objects.filter(telegram_id=telegram_id)
+    if book_ids is not None:
+        queryset = queryset.filter(book_id__in=book_ids)
+    return _close(queryset, 'consumed')
+
+
+def expire_reservations(batch_size=SWEEP_BATCH_SIZE):
+    """Muddati o'tgan band qilishlarni partiyalab yopish. Yopilganlar sonini qaytaradi."""
+    total = 0
+    while True:
+        batch = list(
+            StockReservation.objects
+            .filter(status='active', expires_at__lte=timezone.now())
+            .order_by('expires_at')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not batch:
+            break
+        total += _close(StockReservation.objects.filter(pk__in=batch), 'expired')
+        if len(batch) < batch_size:
+            break
+    return total
@@ -0,0 +1,204 @@
+"""
+Kunlik hisobot jadvallari (rollup).
+
+Buyurtma holati o'zgarganda jadvallar delta bilan yangilanadi, to'liq
+qayta hisoblash esa rebuild_rollups buyrug'i orqali bajariladi. Sana -
+buyurtma yaratilgan kun (mahalliy vaqt bo'yicha).
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .bulk import bulk_increment_fields
+from .models import (
+    DailyAuthorSales, DailyBookSales, DailyCategorySales, DailyGenreSales,
+    DailyOrderStats, Order, OrderItem,
+)
+from .sales import COUNTED_STATUSES, sales_sign
+
+# rollup modeli -> (o'lcham maydoni, OrderItem dan yo'l)
+SALES_ROLLUPS = {
+    DailyBookSales: ('book_id', 'book_id'),
+    DailyGenreSales: ('genre_id', 'book__genre_id'),
+    DailyCategorySales: ('category_id', 'book__category_id'),
+    DailyAuthorSales: ('author_id', 'book__author_id'),
+}
+
+BATCH_SIZE = 1000
+
+
+def _increment(model, key_field, deltas):
+    """
+    deltas: {(date, key): {field: delta}}.
+
+    Yetishmayotgan qatorlar avval 0 qiymat bilan yaratiladi, keyin barcha
+    deltalar bitta UPDATE bilan qo'shiladi.
+    """
+    if not deltas:
+        return
+    model.objects.bulk_create(
+        [model(date=date, **{key_field: key}) for date, key in deltas],
+        ignore_conflicts=True,
+        batch_size=BATCH_SIZE,
+    )
+    dates = {date for date, _ in deltas}
+    keys = {key for _, key in deltas}
+    pks = {
+        (date, key): pk
+        for pk, date, key in model.objects
+        .filter(date__in=dates, **{f'{key_field}__in': keys})
+        .values_list('pk', 'date', key_field)
+    }
+    bulk_increment_fields(
+        model.objects.all(),
+        {pks[row_key]: fields for row_key, fields in deltas.items()},
+    )
+
+
+def record_status_change(order_ids, old_status, new_status):
+    """Buyurtmalar holati o'zgarganda barcha rollup jadvallarini yangilash"""
+    order_ids = list(order_ids)
+    if not order_ids or old_status == new_status:
+        return
+
+    orders = Order.objects.filter(pk__in=order_ids).values_list('pk', 'created_at', 'total_amount')
+    order_days = {}
+    status_deltas = defaultdict(lambda: {'orders_count': 0, 'revenue': Decimal(0)})
+    for pk, created_at, total_amount in orders:
+        day = timezone.localdate(created_at)
+        order_days[pk] = day
+        if old_status:
+            status_deltas[(day, old_status)]['orders_count'] -= 1
+            status_deltas[(day, old_status)]['revenue'] -= total_amount
+        status_deltas[(day, new_status)]['orders_count'] += 1
+        status_deltas[(day, new_status)]['revenue'] += total_amount
+
+    _increment(DailyOrderStats, 'status', status_deltas)
+
+    sign = sales_sign(old_status, new_status)
+    if not sign:
+        return
+
+    paths = [path for _, path in SALES_ROLLUPS.values()]
+    items = OrderItem.objects.filter(order_id__in=order_ids).values_list('order_id', 'quantity', 'price', *paths)
+
+    sales_deltas = {model: defaultdict(lambda: {'quantity': 0, 'revenue': Decimal(0)}) for model in SALES_ROLLUPS}
+    for order_id, quantity, price, *keys in items:
+        day = order_days[order_id]
+        for model, key in zip(SALES_ROLLUPS, keys):
+            row = sales_deltas[model][(day, key)]
+            row['quantity'] += sign * quantity
+            row['revenue'] += sign * price * quantity
+
+    for model, (key_field, _) in SALES_ROLLUPS.items():
+        _increment(model, key_field, sales_deltas[model])
+
+
+def rebuild(start=None, end=None):
+    """
+    Rollup jadvallarini Order/OrderItem dan qayta qurish.
+
+    start/end (date) berilsa faqat shu oraliq qayta hisoblanadi.
+    """
+    def in_range(queryset, field):
+        if start:
+            queryset = queryset.filter(**{f'{field}__gte': start})
+        if end:
+            queryset = queryset.filter(**{f'{field}__lte': end})
+        return queryset
+
+    counts = {}
+    with transaction.atomic():
+        items = in_range(
+            OrderItem.objects
+            .filter(order__status__in=COUNTED_STATUSES)
+            .annotate(day=TruncDate('order__created_at')),
+            'day',
+        )
+        for model, (key_field, path) in SALES_ROLLUPS.items():
+            in_range(model.objects.all(), 'date').delete()
+            rows = (
+                items
+                .values('day', path)
+                .annotate(total_quantity=Sum('quantity'), total_revenue=Sum(F('price') * F('quantity')))
+                .order_by()
+            )
+            counts[model] = _bulk_insert(model, (
+                model(
+                    date=row['day'],
+                    quantity=row['total_quantity'],
+                    revenue=row['total_revenue'],
+                    **{key_field: row[path]}
+                )
+                for row in rows.iterator()
+            ))
+
+        in_range(DailyOrderStats.objects.all(), 'date').delete()
+        rows = (
+            in_range(Order.objects.annotate(day=TruncDate('created_at')), 'day')
+            .values('day', 'status')
+            .annotate(total_orders=Count('id'), total_revenue=Sum('total_amount'))
+            .order_by()
+        )
+        counts[DailyOrderStats] = _bulk_insert(DailyOrderStats, (
+            DailyOrderStats(
+                date=row['day'],
+                status=row['status'],
+                orders_count=row['total_orders'],
+                revenue=row['total_revenue'],
+            )
+            for row in rows.iterator()
+        ))
+    return counts
+
+
+def _bulk_insert(model, objects):
+    total = 0
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_create(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+        total += len(batch)
+    return total
+
+
+# ============================================================================
+# HISOBOTLAR (faqat rollup jadvallaridan o'qiladi)
+# ============================================================================
+
+SALES_DIMENSIONS = {
+    'book': (DailyBookSales, 'book_id', 'book__title'),
+    'genre': (DailyGenreSales, 'genre_id', 'genre__name'),
+    'category': (DailyCategorySales, 'category_id', 'category__name'),
+    'author': (DailyAuthorSales, 'author_id', 'author__name'),
+}
+
+
+def sales_report(dimension, start, end):
+    """Kunlik sotuvlar: [{date, dimension_id, name, quantity, revenue}, ...]"""
+    model, key_field, name_field = SALES_DIMENSIONS[dimension]
+    return list(
+        model.objects
+        .filter(date__gte=start, date__lte=end)
+        .order_by('date', key_field)
+        .values('date', 'quantity', 'revenue', dimension_id=F(key_field), name=F(name_field))
+    )
+
+
+def orders_report(start, end):
+    """Kunlik buyurtmalar: [{date, status, orders_count, revenue}, ...]"""
+    return list(
+        DailyOrderStats.objects
+        .filter(date__gte=start, date__lte=end)
+        .order_by('date', 'status')
+        .values('date', 'status', 'orders_count', 'revenue')
+    )
@@ -0,0 +1,66 @@
+"""
+Sotuvlar hisobi: Book.sales_count ni buyurtma holatlariga qarab yuritish.
+
+Buyurtma "sanaladigan" holatga o'tganda uning kitoblari sotilgan hisoblanadi,
+chiqib ketganda (masalan bekor qilinganda) - qaytarib ayiriladi.
+"""
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .bulk import bulk_increment
+from .models import Book, OrderItem
+
+# Sotuv sifatida hisoblanadigan buyurtma holatlari
+COUNTED_STATUSES = ('confirmed', 'processing', 'shipped', 'delivered')
+
+
+def is_counted(status):
+    return status in COUNTED_STATUSES
+
+
+def sales_sign(old_status, new_status):
+    """+1 - sotuvga qo'shiladi, -1 - sotuvdan chiqariladi, 0 - o'zgarmaydi"""
+    return int(is_counted(new_status)) - int(is_counted(old_status))
+
+
+def book_quantities(order_ids):
+    """Buyurtmalar bo'yicha har bir kitobdan nechta sotilgani: {book_id: quantity}"""
+    rows = (
+        OrderItem.objects
+        .filter(order_id__in=order_ids)
+        .values('book_id')
+        .annotate(quantity=Sum('quantity'))
+        .values_list('book_id', 'quantity')
+    )
+    return dict(rows)
+
+
+def record_status_change(order_ids, old_status, new_status):
+    """
+    Buyurtmalar old_status -> new_status ga o'tganda sales_count ni yangilash.
+
+    Barcha kitoblar uchun bitta guruhlangan UPDATE ishlatiladi.
+    """
+    sign = sales_sign(old_status, new_status)
+    order_ids = list(order_ids)
+    if not sign or not order_ids:
+        return {}
+
+    deltas = {
+        book_id: sign * quantity
+        for book_id, quantity in book_quantities(order_ids).items()
+    }
+    bulk_increment(Book.objects.all(), 'sales_count', deltas)
+    return deltas
+
+
+def rebuild_sales_counts():
+    """Barcha kitoblar sales_count ini OrderItem dan qayta hisoblash (bitta so'rov)"""
+    sold = (
+        OrderItem.objects
+        .filter(book=OuterRef('pk'), order__status__in=COUNTED_STATUSES)
+        .values('book')
+        .annotate(total=Sum('quantity'))
+        .values('total')
+    )
+    return Book.objects.update(sales_count=Coalesce(Subquery(sold), Value(0)))
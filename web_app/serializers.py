@@ -0,0 +1,187 @@
+# serializers.py
+import pytz
+from rest_framework import serializers
+
+from . import pricing
+from .models import Book, Order, OrderItem, PricingJob
+
+
+class OrderItemSummarySerializer(serializers.ModelSerializer):
+    """Buyurtma elementi (qisqa)"""
+
+    title = serializers.CharField(source='book.title', read_only=True)
+    slug = serializers.CharField(source='book.slug', read_only=True)
+
+    class Meta:
+        model = OrderItem
+        fields = ['title', 'slug', 'quantity', 'price']
+
+
+class OrderHistorySerializer(serializers.ModelSerializer):
+    """Buyurtmalar tarixi uchun"""
+
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    created_date = serializers.SerializerMethodField()
+    items = OrderItemSummarySerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = [
+            'order_number',
+            'status',
+            'status_display',
+            'total_amount',
+            'created_at',
+            'created_date',
+            'items',
+        ]
+
+    def get_created_date(self, obj):
+        tashkent_tz = pytz.timezone('Asia/Tashkent')
+        local_time = obj.created_at.astimezone(tashkent_tz)
+        return local_time.strftime('%d.%m.%Y %H:%M')
+
+
+class BookDetailSerializer(serializers.ModelSerializer):
+    """Kitob sahifasi uchun"""
+
+    author = serializers.CharField(source='author.name', read_only=True)
+    translator = serializers.CharField(source='translator.name', read_only=True, default=None)
+    genre = serializers.CharField(source='genre.name', read_only=True)
+    category = serializers.CharField(source='category.name', read_only=True)
+    publisher = serializers.CharField(source='publisher.name', read_only=True, default=None)
+    language = serializers.CharField(source='get_language_display', read_only=True)
+    alphabet = serializers.CharField(source='get_alphabet_display', read_only=True)
+    cover_type = serializers.CharField(source='get_cover_type_display', read_only=True)
+
+    class Meta:
+        model = Book
+        fields = [
+            'id',
+            'slug',
+            'title',
+            'author',
+            'translator',
+            'genre',
+            'category',
+            'publisher',
+            'description',
+            'age_limit',
+            'pages',
+            'language',
+            'alphabet',
+            'cover_type',
+            'book_format',
+            'publication_year',
+            'price',
+            'discount_price',
+            'final_price',
+            'discount_percentage',
+            'stock_quantity',
+            'cover_image',
+            'is_new',
+            'is_featured',
+        ]
+
+
+class BookCardSerializer(serializers.ModelSerializer):
+    """Kitob kartochkasi (tavsiyalar bloklari uchun)"""
+
+    author = serializers.CharField(source='author.name', read_only=True)
+
+    class Meta:
+        model = Book
+        fields = [
+            'id',
+            'slug',
+            'title',
+            'author',
+            'price',
+            'discount_price',
+            'final_price',
+            'cover_image',
+        ]
+
+
+class StockReservationSerializer(serializers.Serializer):
+    """Savatga qo'shish (band qilish)"""
+
+    telegram_id = serializers.IntegerField()
+    book_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, max_value=100, default=1)
+
+
+class StockReleaseSerializer(serializers.Serializer):
+    """Savatdan olib tashlash"""
+
+    telegram_id = serializers.IntegerField()
+    book_id = serializers.IntegerField(required=False)
+
+
+class PricingJobCreateSerializer(serializers.Serializer):
+    """Ommaviy narxlash vazifasi: kitoblar ro'yxati va/yoki filtrlar bo'yicha"""
+
+    SCOPE_FIELDS = ['book_ids', 'author', 'genre', 'category', 'publisher']
+
+    book_ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    author = serializers.IntegerField(required=False)
+    genre = serializers.IntegerField(required=False)
+    category = serializers.IntegerField(required=False)
+    publisher = serializers.IntegerField(required=False)
+
+    operation = serializers.ChoiceField(choices=PricingJob.OPERATION_CHOICES)
+    value = serializers.DecimalField(max_digits=10, decimal_places=2, default=0)
+    rounding = serializers.ChoiceField(choices=PricingJob.ROUNDING_CHOICES, default='none')
+    starts_at = serializers.DateTimeField(required=False, allow_null=True)
+    ends_at = serializers.DateTimeField(required=False, allow_null=True)
+
+    def validate(self, attrs):
+        if not any(field in attrs for field in self.SCOPE_FIELDS):
+            raise serializers.ValidationError("book_ids yoki kamida bitta filtr (author, genre, category, publisher) kerak")
+        try:
+            pricing.validate(
+                attrs['operation'],
+                attrs['value'],
+                ends_at=attrs.get('ends_at'),
+                starts_at=attrs.get('starts_at'),
+            )
+        except pricing.PricingError as exc:
+            raise serializers.ValidationError(str(exc))
+        return attrs
+
+    def get_books(self):
+        data = self.validated_data
+        books = Book.objects.all()
+        if 'book_ids' in data:
+            books = books.filter(pk__in=data['book_ids'])
+        for field in ['author', 'genre', 'category', 'publisher']:
+            if field in data:
+                books = books.filter(**{f'{field}_id': data[field]})
+        return books
+
+    def create_job(self, user):
+        data = {key: value for key, value in self.validated_data.items() if key not in self.SCOPE_FIELDS}
+        return pricing.create_job(self.get_books().values_list('pk', flat=True), user=user, **data)
+
+
+class PricingJobSerializer(serializers.ModelSerializer):
+    """Narxlash vazifasi holati"""
+
+    class Meta:
+        model = PricingJob
+        fields = [
+            'id',
+            'operation',
+            'value',
+            'rounding',
+            'starts_at',
+            'ends_at',
+            'status',
+            'total',
+            'processed',
+            'updated',
+            'progress',
+            'error',
+            'created_at',
+            'finished_at',
+        ]
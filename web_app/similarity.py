@@ -0,0 +1,201 @@
+"""
+"O'xshash kitoblar" - tavsif, janr, turkum, muallif, til va alifbo bo'yicha.
+
+Har bir kitob vektori: tavsifning TF-IDF vektori + janr/turkum/muallif/til/
+alifbo one-hot belgilari (har bir blok alohida normallashtirilib, vazn bilan
+birlashtiriladi). Ball - kosinus o'xshashligi, natija BookNeighbor jadvaliga
+top-K sifatida yoziladi; so'rov vaqtida hech qanday vektor hisoblanmaydi.
+
+Keyingi ishga tushirishlarda faqat updated_at o'zgargan kitoblar va ularga
+ta'sir qiladigan (ro'yxatida o'zgargan kitob bor yoki o'zgargan kitob endi
+top-K ga kiradigan) kitoblar qayta hisoblanadi.
+"""
+import re
+from collections import Counter
+
+import numpy as np
+from django.db.models import Count, Max, Min
+from django.utils.html import strip_tags
+from scipy import sparse
+
+from .models import Book, BookNeighbor, NeighborIndexState
+from .neighbors import top_k_dense, write_neighbors
+
+KIND = 'similar'
+TOP_K = 20
+
+# Blok vaznlari - tavsif asosiy, qolganlari qo'shimcha signal
+FEATURE_WEIGHTS = {
+    'description': 1.0,
+    'genre_id': 0.6,
+    'author_id': 0.5,
+    'category_id': 0.4,
+    'language': 0.3,
+    'alphabet': 0.2,
+}
+
+TOKEN_RE = re.compile(r"[^\W\d_]+(?:['‘’ʻʼ`][^\W\d_]+)*")
+MIN_TOKEN_LENGTH = 3
+MIN_DF = 2
+MAX_DF = 0.8
+
+# Bir partiyadagi ballar matritsasi hajmi (qator x ustun elementlari)
+SCORE_CHUNK_CELLS = 2_000_000
+FETCH_CHUNK_SIZE = 2000
+
+
+def _tokens(text):
+    return [
+        token for token in TOKEN_RE.findall(strip_tags(text).lower())
+        if len(token) >= MIN_TOKEN_LENGTH
+    ]
+
+
+def _normalize(matrix):
+    """Qatorlarni L2 bo'yicha normallashtirish (nol qatorlar o'zgarmaydi)"""
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return (sparse.diags(1.0 / norms) @ matrix).tocsr()
+
+
+def tfidf(documents):
+    """Hujjatlar ro'yxatidan TF-IDF matritsa (sublinear tf, silliqlangan idf)"""
+    vocabulary = {}
+    rows, cols, data = [], [], []
+    for row, text in enumerate(documents):
+        for token, count in Counter(_tokens(text or '')).items():
+            rows.append(row)
+            cols.append(vocabulary.setdefault(token, len(vocabulary)))
+            data.append(count)
+
+    n_docs = len(documents)
+    tf = sparse.csr_matrix(
+        (np.log1p(np.asarray(data, dtype=np.float64)), (rows, cols)),
+        shape=(n_docs, len(vocabulary)),
+    )
+    df = np.bincount(tf.indices, minlength=tf.shape[1])
+    keep = (df >= MIN_DF) & (df <= MAX_DF * n_docs)
+    idf = np.where(keep, np.log((1 + n_docs) / (1 + df)) + 1, 0.0)
+    matrix = (tf @ sparse.diags(idf)).tocsr()
+    matrix.eliminate_zeros()
+    return _normalize(matrix)
+
+
+def one_hot(values):
+    """Kategorik qiymatlar ro'yxatidan one-hot matritsa (None - bo'sh qator)"""
+    values = np.asarray(values, dtype=object)
+    present = np.flatnonzero(values != None)  # noqa: E711 - element bo'yicha taqqoslash
+    _, codes = np.unique(values[present].astype(str), return_inverse=True)
+    return sparse.csr_matrix(
+        (np.ones(len(present)), (present, codes)),
+        shape=(len(values), codes.max() + 1 if len(codes) else 0),
+    )
+
+
+def build_vectors():
+    """
+    Barcha faol kitoblar uchun normallashtirilgan belgi vektorlari.
+
+    Qaytaradi: (ids - kitob ID massivi, vectors - CSR, har bir qator L2 = 1)
+    """
+    fields = list(FEATURE_WEIGHTS)
+    rows = list(
+        Book.objects
+        .filter(is_active=True)
+        .order_by('id')
+        .values_list('id', *fields)
+        .iterator(chunk_size=FETCH_CHUNK_SIZE)
+    )
+    ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    columns = list(zip(*rows))[1:] if rows else [[] for _ in fields]
+
+    blocks = []
+    for field, values in zip(fields, columns):
+        block = tfidf(values) if field == 'description' else one_hot(values)
+        blocks.append(FEATURE_WEIGHTS[field] * block)
+    vectors = sparse.hstack(blocks, format='csr') if rows else sparse.csr_matrix((0, 0))
+    return ids, _normalize(vectors)
+
+
+def _similar(ids, vectors, rows, k):
+    """
+    Berilgan qatorlar uchun top-K qo'shnilar.
+
+    Qaytaradi: ({book_id: [(neighbor_id, score), ...]}, col_max) - col_max har
+    bir kitob uchun shu qatorlardan olgan eng yuqori ball.
+    """
+    neighbors = {}
+    col_max = np.zeros(len(ids))
+    rows = np.asarray(rows, dtype=np.int64)
+    chunk_size = max(1, SCORE_CHUNK_CELLS // max(1, len(ids)))
+    vectors_t = vectors.T.tocsc()
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        scores = (vectors[chunk] @ vectors_t).toarray()
+        # Kitob o'ziga o'xshash emas
+        scores[np.arange(len(chunk)), chunk] = 0.0
+        np.maximum(col_max, scores.max(axis=0), out=col_max)
+        for row, items in zip(chunk, top_k_dense(scores, k)):
+            neighbors[int(ids[row])] = [(int(ids[col]), score) for col, score in items]
+    return neighbors, col_max
+
+
+def _affected_rows(ids, position, changed, col_max, k):
+    """O'zgargan kitoblar sabab ro'yxati eskirgan boshqa kitoblarning qatorlari"""
+    # Eng past (K-chi) ball; ro'yxati to'lmagan kitoblar uchun 0
+    threshold = np.zeros(len(ids))
+    lists = (
+        BookNeighbor.objects
+        .filter(kind=KIND)
+        .values('book_id')
+        .annotate(lowest=Min('score'), size=Count('id'))
+        .filter(size__gte=k)
+        .values_list('book_id', 'lowest')
+    )
+    for book_id, lowest in lists.iterator(chunk_size=FETCH_CHUNK_SIZE):
+        if book_id in position:
+            threshold[position[book_id]] = lowest
+    rows = set(np.flatnonzero(col_max > threshold).tolist())
+
+    referencing = (
+        BookNeighbor.objects
+        .filter(kind=KIND, neighbor_id__in=changed)
+        .values_list('book_id', flat=True)
+        .distinct()
+    )
+    rows.update(position[book_id] for book_id in referencing if book_id in position)
+    return rows
+
+
+def refresh(full=False, top_k=TOP_K):
+    """
+    O'xshash kitoblarni yangilash. Qaytaradi: qayta yozilgan kitoblar soni.
+
+    full=True yoki avval hisoblanmagan bo'lsa - barcha kitoblar qayta hisoblanadi.
+    """
+    state, _ = NeighborIndexState.objects.get_or_create(kind=KIND)
+    watermark = Book.objects.aggregate(latest=Max('updated_at'))['latest']
+
+    ids, vectors = build_vectors()
+    position = {int(book_id): row for row, book_id in enumerate(ids)}
+
+    if full or state.watermark is None:
+        neighbors, _ = _similar(ids, vectors, range(len(ids)), top_k)
+        stale = BookNeighbor.objects.filter(kind=KIND).values_list('book_id', flat=True).distinct()
+        neighbors.update({book_id: [] for book_id in stale if book_id not in position})
+    else:
+        changed = list(Book.objects.filter(updated_at__gt=state.watermark).values_list('id', flat=True))
+        changed_rows = [position[book_id] for book_id in changed if book_id in position]
+        # Faolsizlantirilgan kitoblarning ro'yxati o'chiriladi
+        neighbors = {book_id: [] for book_id in changed if book_id not in position}
+        if changed:
+            changed_neighbors, col_max = _similar(ids, vectors, changed_rows, top_k)
+            neighbors.update(changed_neighbors)
+            affected = _affected_rows(ids, position, changed, col_max, top_k) - set(changed_rows)
+            neighbors.update(_similar(ids, vectors, sorted(affected), top_k)[0])
+
+    write_neighbors(KIND, neighbors)
+
+    state.watermark = watermark
+    state.save()
+    return len(neighbors)
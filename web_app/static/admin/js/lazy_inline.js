@@ -0,0 +1,30 @@
+// LazyBookInline: "Yana yuklash" tugmasi keyingi sahifani JSON endpointdan oladi
+document.addEventListener('click', function (event) {
+    var button = event.target.closest('[data-lazy-more]');
+    if (!button) {
+        return;
+    }
+    event.preventDefault();
+    button.disabled = true;
+
+    var url = button.dataset.lazyMore + '?after=' + encodeURIComponent(button.dataset.after);
+    fetch(url, {credentials: 'same-origin', headers: {'X-Requested-With': 'XMLHttpRequest'}})
+        .then(function (response) {
+            if (!response.ok) {
+                throw new Error(response.status);
+            }
+            return response.json();
+        })
+        .then(function (page) {
+            document.getElementById(button.dataset.target).insertAdjacentHTML('beforeend', page.html);
+            if (page.next === null) {
+                button.remove();
+            } else {
+                button.dataset.after = page.next;
+                button.disabled = false;
+            }
+        })
+        .catch(function () {
+            button.disabled = false;
+        });
+});
@@ -0,0 +1,63 @@
+"""
+Admin tahrirlash sahifalaridagi statistika panellari.
+
+Har bir obyekt (muallif, janr, tuplam, ...) uchun barcha ko'rsatkichlar
+bitta aggregate() so'rovi bilan hisoblanadi va qisqa muddat keshlanadi.
+Barcha panellar 'books' tegi bilan saqlanadi - kitob o'zgarganda teg
+versiyasi oshiriladi va ular bir vaqtda eskiradi.
+"""
+from django.db.models import Avg, Count, F, Max, Min, Q, Sum
+from django.db.models.functions import Coalesce
+
+from core.cache import get_or_compute, invalidate_tags
+
+from .models import Author, Book, Category, Collection, Genre, PrintingHouse, Publisher, Translator
+
+STATS_CACHE_TIMEOUT = 60
+STATS_TAG = 'books'
+
+# model -> Book dan shu obyektga filtr
+BOOK_LOOKUPS = {
+    Author: 'author',
+    Translator: 'translator',
+    Genre: 'genre',
+    Category: 'category',
+    Publisher: 'publisher',
+    PrintingHouse: 'printing_house',
+    Collection: 'collections',
+}
+
+
+def invalidate_book_stats():
+    """Kitoblar o'zgarganda barcha panellar keshini eskirtirish"""
+    invalidate_tags(STATS_TAG)
+
+
+def _aggregate(queryset):
+    final_price = Coalesce('discount_price', 'price')
+    stats = queryset.aggregate(
+        books=Count('id'),
+        active=Count('id', filter=Q(is_active=True)),
+        discounted=Count('id', filter=Q(discount_price__isnull=False)),
+        total_sales=Coalesce(Sum('sales_count'), 0),
+        total_views=Coalesce(Sum('views_count'), 0),
+        total_stock=Coalesce(Sum('stock_quantity'), 0),
+        avg_price=Avg(final_price),
+        min_price=Min(final_price),
+        max_price=Max(final_price),
+        years=Count('publication_year', distinct=True),
+        stock_value=Sum(F('stock_quantity') * final_price),
+    )
+    stats['discount_share'] = round(stats['discounted'] * 100 / stats['books']) if stats['books'] else 0
+    return stats
+
+
+def book_stats(obj):
+    """Obyektga tegishli kitoblar statistikasi (dict)"""
+    lookup = BOOK_LOOKUPS[type(obj)]
+    return get_or_compute(
+        f"stats:{obj._meta.label_lower}:{obj.pk}",
+        lambda: _aggregate(Book.objects.filter(**{lookup: obj})),
+        STATS_CACHE_TIMEOUT,
+        tags=[STATS_TAG],
+    )
@@ -1,3 +1,908 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib import admin
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.tests import TEST_CACHES
+
+from . import (
+    catalog, importer, order_workflow, price_schedules, pricing, recommendations, reservations, rollups, sales,
+    similarity, stats, thumbnails,
+)
+from .models import (
+    Author, Book, BookNeighbor, Category, Collection, DailyBookSales, DailyGenreSales, DailyOrderStats, Genre,
+    Order, OrderItem, OrderStatusEvent, PriceSchedule, PricingJob, StockReservation,
+)
+from .neighbors import get_neighbors
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CatalogTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = Author.objects.create(name='Muallif')
+        self.genre = Genre.objects.create(name='Janr')
+        self.category = Category.objects.create(name='Turkum')
+
+    def create_book(self, title='Kitob', **kwargs):
+        fields = {
+            'author': self.author,
+            'genre': self.genre,
+            'category': self.category,
+            'pages': 100,
+            'alphabet': 'lotin',
+            'cover_type': 'soft',
+            'book_format': 'A5',
+            'height': 20,
+            'width': 13,
+            'thickness': 2,
+            'publication_year': 2020,
+            'price': Decimal('10000'),
+            'cover_image': 'books/covers/test.jpg',
+        }
+        fields.update(kwargs)
+        return Book.objects.create(title=title, **fields)
+
+    def create_order(self, books, status='confirmed', telegram_id=1, quantity=1):
+        """Buyurtma admin formasidagidek: elementlar, keyin holat o'tishi qayd etiladi"""
+        order = Order.objects.create(
+            order_number=f'T-{Order.objects.count() + 1}',
+            user_telegram_id=telegram_id,
+            user_name='Foydalanuvchi',
+            user_phone='+998901234567',
+            status=status,
+            total_amount=sum(book.price * quantity for book in books),
+            delivery_address='Toshkent',
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, book=book, quantity=quantity, price=book.price) for book in books
+        )
+        order_workflow.record_transition(order, None)
+        return order
+
+
+class SalesTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.book = self.create_book()
+        self.other = self.create_book('Boshqa kitob')
+
+    def sales_count(self, book):
+        book.refresh_from_db()
+        return book.sales_count
+
+    def transition(self, order, to_status):
+        return order_workflow.transition_orders(Order.objects.filter(pk=order.pk), to_status)
+
+    def test_confirm_and_cancel(self):
+        order = self.create_order([self.book, self.other], status='pending', quantity=2)
+        self.assertEqual(self.sales_count(self.book), 0)
+
+        self.transition(order, 'confirmed')
+        self.assertEqual(self.sales_count(self.book), 2)
+        self.assertEqual(self.sales_count(self.other), 2)
+
+        # Sanaladigan holatlar orasidagi o'tish sotuvni o'zgartirmaydi
+        self.transition(order, 'shipped')
+        self.assertEqual(self.sales_count(self.book), 2)
+
+        order = self.create_order([self.book], status='pending')
+        self.transition(order, 'confirmed')
+        self.transition(order, 'cancelled')
+        self.assertEqual(self.sales_count(self.book), 2)
+
+    def test_disallowed_transition_is_skipped(self):
+        order = self.create_order([self.book], status='pending')
+        result = self.transition(order, 'delivered')
+        self.assertEqual((result.updated, result.skipped), (0, {'pending': 1}))
+        self.assertEqual(self.sales_count(self.book), 0)
+
+    def test_rebuild_matches_incremental(self):
+        self.create_order([self.book], quantity=3)
+        order = self.create_order([self.book, self.other], status='pending')
+        self.transition(order, 'confirmed')
+        Book.objects.update(sales_count=0)
+
+        sales.rebuild_sales_counts()
+        self.assertEqual(self.sales_count(self.book), 4)
+        self.assertEqual(self.sales_count(self.other), 1)
+
+
+class OrderHistoryTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        book = self.create_book()
+        self.orders = [self.create_order([book], telegram_id=1) for _ in range(7)]
+        self.create_order([book], telegram_id=2)
+        # Bir xil vaqt - tartib id bo'yicha davom etadi
+        Order.objects.filter(pk__in=[order.pk for order in self.orders[2:5]]).update(
+            created_at=self.orders[2].created_at,
+        )
+
+    def history(self, telegram_id, **params):
+        return self.client.get(f'/web_app/api/orders/{telegram_id}/', params)
+
+    def test_pages_cover_own_orders_newest_first(self):
+        numbers, cursor = [], None
+        while True:
+            response = self.history(1, limit=3, **({'cursor': cursor} if cursor else {}))
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertLessEqual(len(data['results']), 3)
+            numbers += [order['order_number'] for order in data['results']]
+            cursor = data['next_cursor']
+            if cursor is None:
+                break
+
+        expected = Order.objects.filter(user_telegram_id=1).order_by('-created_at', '-id')
+        self.assertEqual(numbers, [order.order_number for order in expected])
+        self.assertEqual(len(numbers), 7)
+
+    def test_items_are_prefetched(self):
+        with self.assertNumQueries(2):
+            data = self.history(1, limit=5).json()
+        self.assertEqual(len(data['results'][0]['items']), 1)
+
+    def test_other_users_orders_are_not_visible(self):
+        data = self.history(2).json()
+        self.assertEqual(len(data['results']), 1)
+        self.assertIsNone(data['next_cursor'])
+        self.assertEqual(self.history(3).json()['results'], [])
+
+    def test_bad_cursor_or_limit(self):
+        for params in ({'cursor': 'abc'}, {'cursor': 'eHl6'}, {'limit': 'x'}):
+            with self.subTest(params=params), self.assertLogs('django.request', 'WARNING'):
+                self.assertEqual(self.history(1, **params).status_code, 400)
+
+    def test_last_status_is_invalidated_on_transition(self):
+        self.assertEqual(self.client.get('/web_app/api/orders/2/last-status/').json()['status'], 'confirmed')
+        with self.captureOnCommitCallbacks(execute=True):
+            order_workflow.transition_orders(Order.objects.filter(user_telegram_id=2), 'cancelled')
+        self.assertEqual(self.client.get('/web_app/api/orders/2/last-status/').json()['status'], 'cancelled')
+
+
+class RollupTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.book = self.create_book(price=Decimal('10000'))
+        self.today = timezone.localdate()
+
+    def snapshot(self):
+        return (
+            list(DailyBookSales.objects.order_by('book_id').values_list('book_id', 'quantity', 'revenue')),
+            list(DailyGenreSales.objects.order_by('genre_id').values_list('genre_id', 'quantity', 'revenue')),
+            list(
+                DailyOrderStats.objects.filter(orders_count__gt=0)
+                .order_by('status').values_list('status', 'orders_count', 'revenue')
+            ),
+        )
+
+    def test_status_changes_update_rollups(self):
+        self.create_order([self.book], quantity=2)
+        order = self.create_order([self.book], status='pending')
+
+        books, genres, orders = self.snapshot()
+        self.assertEqual(books, [(self.book.pk, 2, Decimal('20000'))])
+        self.assertEqual(genres, [(self.genre.pk, 2, Decimal('20000'))])
+        self.assertEqual(orders, [('confirmed', 1, Decimal('20000')), ('pending', 1, Decimal('10000'))])
+
+        order_workflow.transition_orders(Order.objects.filter(pk=order.pk), 'cancelled')
+        books, _, orders = self.snapshot()
+        self.assertEqual(books, [(self.book.pk, 2, Decimal('20000'))])
+        self.assertEqual(orders, [('cancelled', 1, Decimal('10000')), ('confirmed', 1, Decimal('20000'))])
+
+    def test_rebuild_matches_incremental(self):
+        other = self.create_book('Boshqa kitob', price=Decimal('5000'))
+        self.create_order([self.book, other], quantity=2)
+        order = self.create_order([other])
+        order_workflow.transition_orders(Order.objects.filter(pk=order.pk), 'cancelled')
+        incremental = self.snapshot()
+
+        rollups.rebuild()
+        self.assertEqual(self.snapshot(), incremental)
+        self.assertEqual(
+            rollups.sales_report('book', self.today, self.today),
+            [
+                {'date': self.today, 'quantity': 2, 'revenue': Decimal('20000'),
+                 'dimension_id': self.book.pk, 'name': self.book.title},
+                {'date': self.today, 'quantity': 2, 'revenue': Decimal('10000'),
+                 'dimension_id': other.pk, 'name': other.title},
+            ],
+        )
+
+
+class ReservationTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.book = self.create_book(stock_quantity=3)
+
+    def test_reserve_past_available_stock(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            reservations.reserve(self.book.pk, telegram_id=1, quantity=2)
+        with self.assertRaises(reservations.InsufficientStock) as raised:
+            reservations.reserve(self.book.pk, telegram_id=2, quantity=2)
+        self.assertEqual(raised.exception.available, 1)
+
+        # O'z band qilishini o'zgartirishda foydalanuvchining eski miqdori hisobga olinmaydi
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation = reservations.reserve(self.book.pk, telegram_id=1, quantity=3)
+        self.assertEqual(reservation.quantity, 3)
+        self.assertEqual(StockReservation.objects.filter(status='active').count(), 1)
+        self.assertEqual(reservations.available_stock(self.book), 0)
+
+    def test_counters_follow_reservations(self):
+        self.assertEqual(reservations.reserved_quantities([self.book.pk]), {self.book.pk: 0})
+        with self.captureOnCommitCallbacks(execute=True):
+            reservations.reserve(self.book.pk, telegram_id=1, quantity=2)
+            reservations.reserve(self.book.pk, telegram_id=2, quantity=1)
+        with self.assertNumQueries(0):
+            self.assertEqual(reservations.reserved_quantities([self.book.pk]), {self.book.pk: 3})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(reservations.release(telegram_id=1), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(reservations.available_stock(self.book), 2)
+
+    def test_expired_reservation_frees_stock(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation = reservations.reserve(self.book.pk, telegram_id=1, quantity=3)
+        self.assertEqual(reservations.available_stock(self.book), 0)
+
+        # Muddati o'tgan, lekin hali yopilmagan band qilish boshqalarga xalaqit bermaydi
+        StockReservation.objects.filter(pk=reservation.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        with self.captureOnCommitCallbacks(execute=True):
+            reservations.reserve(self.book.pk, telegram_id=2, quantity=3)
+            self.assertEqual(reservations.expire_reservations(batch_size=1), 1)
+        reservation.refresh_from_db()
+        self.assertEqual(reservation.status, 'expired')
+        self.assertEqual(reservations.available_stock(self.book), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(reservations.release(telegram_id=2, book_id=self.book.pk), 1)
+        self.assertEqual(reservations.available_stock(self.book), 3)
+        self.assertEqual(reservations.expire_reservations(), 0)
+
+    def test_new_order_consumes_reservations(self):
+        other = self.create_book('Boshqa kitob', stock_quantity=3)
+        with self.captureOnCommitCallbacks(execute=True):
+            reservations.reserve(self.book.pk, telegram_id=1, quantity=1)
+            reservations.reserve(other.pk, telegram_id=1, quantity=1)
+            self.create_order([self.book], telegram_id=1)
+        self.assertEqual(
+            dict(StockReservation.objects.values_list('book_id', 'status')),
+            {self.book.pk: 'consumed', other.pk: 'active'},
+        )
+        self.assertEqual(reservations.reserved_quantities([self.book.pk, other.pk]), {self.book.pk: 0, other.pk: 1})
+
+
+class PricingJobTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+        self.books = [self.create_book(f'Kitob {i}', price=Decimal('45120')) for i in range(5)]
+        self.book_ids = [book.pk for book in self.books]
+
+    def prices(self):
+        return list(Book.objects.order_by('pk').values_list('price', 'discount_price'))
+
+    def test_discount_applies_and_reverts(self):
+        job = pricing.create_job(
+            self.book_ids, 'discount_percent', 10, rounding='1000', ends_at=self.now + timedelta(hours=1),
+        )
+        pricing.run_due_jobs(chunk_size=2, now=self.now)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed, job.updated), ('active', 5, 5))
+        self.assertEqual(self.prices(), [(Decimal('45120'), Decimal('41000'))] * 5)
+
+        # Qo'lda o'zgartirilgan chegirma bekor qilishda tegilmaydi
+        Book.objects.filter(pk=self.book_ids[0]).update(discount_price=Decimal('30000'))
+        pricing.run_due_jobs(chunk_size=2, now=self.now + timedelta(hours=1))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(
+            self.prices(),
+            [(Decimal('45120'), Decimal('30000'))] + [(Decimal('45120'), None)] * 4,
+        )
+
+    def test_price_change_drops_larger_discount(self):
+        Book.objects.filter(pk=self.book_ids[0]).update(discount_price=Decimal('40000'))
+        pricing.create_job(self.book_ids[:2], 'price_percent', -20, rounding='900')
+        pricing.run_due_jobs(now=self.now)
+        self.assertEqual(self.prices()[:2], [(Decimal('36900'), None)] * 2)
+
+    def test_stale_job_resumes_from_processed(self):
+        job = pricing.create_job(self.book_ids, 'discount_amount', 5120)
+        PricingJob.objects.filter(pk=job.pk).update(status='running', processed=3, updated=3)
+        PricingJob.objects.filter(pk=job.pk).update(updated_at=self.now - pricing.STALE_AFTER * 2)
+
+        pricing.run_due_jobs(now=self.now)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed, job.updated), ('done', 5, 5))
+        discounts = [discount for _, discount in self.prices()]
+        self.assertEqual(discounts, [None] * 3 + [Decimal('40000')] * 2)
+
+    def test_future_job_waits(self):
+        job = pricing.create_job(self.book_ids, 'discount_percent', 10, starts_at=self.now + timedelta(hours=1))
+        self.assertEqual(pricing.run_due_jobs(now=self.now), [])
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'queued')
+
+    def test_validation(self):
+        with self.assertRaises(pricing.PricingError):
+            pricing.create_job(self.book_ids, 'discount_percent', 100)
+        with self.assertRaises(pricing.PricingError):
+            pricing.create_job(self.book_ids, 'price_amount', 1000, ends_at=self.now)
+        self.assertFalse(PricingJob.objects.exists())
+
+
+def catalog_row(title, **fields):
+    row = {
+        'title': title, 'author': 'Abdulla Qodiriy', 'genre': 'Roman', 'category': 'Badiiy',
+        'pages': 300, 'alphabet': 'lotin', 'cover_type': 'soft', 'book_format': 'A5',
+        'height': '20', 'width': '13', 'thickness': '2.5', 'publication_year': 2020, 'price': '45000',
+    }
+    row.update(fields)
+    return row
+
+
+def jsonl(*lines):
+    return io.BytesIO('\n'.join(json.dumps(line) if isinstance(line, dict) else line for line in lines).encode())
+
+
+class ImporterTests(CatalogTestCase):
+
+    def test_jsonl_errors_are_reported_per_line(self):
+        result = importer.import_catalog(jsonl(
+            catalog_row("O'tgan kunlar"),
+            '{"title": ',
+            '',
+            '[1, 2]',
+            catalog_row('Mehrobdan chayon', price='abc'),
+            catalog_row("O'tgan kunlar"),
+        ), 'jsonl')
+
+        self.assertEqual((result.created, result.skipped, result.failed), (1, 1, 3))
+        self.assertEqual([line for line, _ in result.errors], [2, 4, 5])
+        self.assertIn('JSON', result.errors[0][1])
+        self.assertEqual(result.related_created, {'author': 1, 'genre': 1, 'category': 1})
+
+    def test_database_error_fails_only_its_row(self):
+        result = importer.import_catalog(jsonl(
+            catalog_row('Birinchi'),
+            catalog_row('Katta', pages=10 ** 30, author='Yangi muallif'),
+            catalog_row('Uchinchi'),
+        ), 'jsonl', chunk_size=10)
+
+        self.assertEqual((result.created, result.failed), (2, 1))
+        self.assertEqual(result.errors[0][0], 2)
+        self.assertEqual(result.related_created, {'author': 1, 'genre': 1, 'category': 1})
+        self.assertFalse(Author.objects.filter(name='Yangi muallif').exists())
+        self.assertEqual(
+            sorted(Book.objects.values_list('title', flat=True)), ['Birinchi', 'Uchinchi'],
+        )
+
+    def test_csv_line_numbers(self):
+        rows = [catalog_row('Birinchi', description='Ikki\nqatorli'), catalog_row('Ikkinchi', pages='x')]
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+        result = importer.import_catalog(io.BytesIO(output.getvalue().encode()), 'csv')
+        self.assertEqual(result.created, 1)
+        self.assertEqual([line for line, _ in result.errors], [4])
+
+
+class BookStatsTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.book = self.create_book(price=Decimal('10000'), stock_quantity=2, sales_count=3)
+        self.create_book(
+            'Ikkinchi', price=Decimal('30000'), discount_price=Decimal('20000'), stock_quantity=1, is_active=False,
+        )
+
+    def test_single_aggregate(self):
+        with self.assertNumQueries(1):
+            book_stats = stats.book_stats(self.author)
+        self.assertEqual(
+            {key: book_stats[key] for key in ('books', 'active', 'discounted', 'total_sales', 'total_stock')},
+            {'books': 2, 'active': 1, 'discounted': 1, 'total_sales': 3, 'total_stock': 3},
+        )
+        self.assertEqual(book_stats['avg_price'], Decimal('15000'))
+        self.assertEqual((book_stats['min_price'], book_stats['max_price']), (Decimal('10000'), Decimal('20000')))
+        self.assertEqual((book_stats['stock_value'], book_stats['discount_share']), (Decimal('40000'), 50))
+
+    def test_cached_until_books_change(self):
+        stats.book_stats(self.author)
+        stats.book_stats(self.genre)
+        # update() signal yubormaydi - panellar TTL gacha eski qoladi
+        Book.objects.filter(pk=self.book.pk).update(sales_count=10)
+        with self.assertNumQueries(0):
+            self.assertEqual(stats.book_stats(self.author)['total_sales'], 3)
+
+        # Kitob saqlanganda barcha panellar ('books' tegi) eskiradi
+        self.book.refresh_from_db()
+        self.book.save()
+        self.assertEqual(stats.book_stats(self.author)['total_sales'], 10)
+        self.assertEqual(stats.book_stats(self.genre)['total_sales'], 10)
+
+
+class RecommendationsTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings_override = override_settings(RECOMMENDATIONS_DIR=directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.books = [self.create_book(f'Kitob {i}') for i in range(3)]
+
+    def stored_matrix(self):
+        matrix, counts, _ = recommendations._load()
+        return matrix.toarray(), counts
+
+    def test_incremental_matches_full_rebuild(self):
+        a, b, c = self.books
+        self.create_order([a, b])
+        recommendations.refresh()
+        self.create_order([a, b, c])
+        recommendations.refresh()
+        incremental = self.stored_matrix()
+
+        recommendations.refresh(full=True)
+        full = self.stored_matrix()
+        self.assertEqual(incremental[0].tolist(), full[0].tolist())
+        self.assertEqual(incremental[1].tolist(), full[1].tolist())
+        self.assertEqual(incremental[0][a.pk][b.pk], 2)
+
+    def test_book_created_after_full_build(self):
+        a, b, _ = self.books
+        self.create_order([a, b])
+        recommendations.refresh()
+
+        new_book = self.create_book('Yangi kitob')
+        self.create_order([a, new_book])
+        recommendations.refresh()
+
+        matrix, counts = self.stored_matrix()
+        self.assertEqual(matrix[a.pk][new_book.pk], 1)
+        self.assertEqual(counts[a.pk], 2)
+        self.assertEqual(get_neighbors(new_book.pk, recommendations.KIND), [a])
+
+    def test_failed_refresh_does_not_double_count(self):
+        a, b, _ = self.books
+        self.create_order([a, b])
+        recommendations.refresh()
+
+        self.create_order([a, b])
+        with mock.patch.object(recommendations, 'write_neighbors', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                recommendations.refresh()
+        recommendations.refresh()
+
+        matrix, counts = self.stored_matrix()
+        self.assertEqual(matrix[a.pk][b.pk], 2)
+        self.assertEqual(counts[a.pk], 2)
+
+    def test_uncommitted_cursor_triggers_full_rebuild(self):
+        a, b, _ = self.books
+        self.create_order([a, b])
+        recommendations.refresh()
+        # Fayl almashtirilgan, lekin NeighborIndexState commit bo'lmagan holat
+        self.create_order([a, b])
+        matrix, counts, _ = recommendations._load()
+        recommendations._save(matrix * 2, counts * 2, OrderStatusEvent.objects.latest('id').pk)
+
+        recommendations.refresh()
+        matrix, counts = self.stored_matrix()
+        self.assertEqual(matrix[a.pk][b.pk], 2)
+        self.assertEqual(counts[a.pk], 2)
+
+
+class SimilarityTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        descriptions = [
+            "Sevgi va urush haqida tarixiy roman, qahramonlar taqdiri",
+            "Sevgi haqida tarixiy roman",
+            "Kosmos kemalari va robotlar haqida ilmiy fantastika",
+            "Kosmos va robotlar: ilmiy fantastika hikoyalari",
+            "Bolalar uchun ertaklar to'plami",
+        ]
+        self.books = [
+            self.create_book(f'Kitob {i}', description=description) for i, description in enumerate(descriptions)
+        ]
+
+    def neighbor_ids(self, book):
+        return list(
+            BookNeighbor.objects.filter(book=book, kind=similarity.KIND)
+            .order_by('rank').values_list('neighbor_id', flat=True)
+        )
+
+    def snapshot(self):
+        return sorted(
+            (book_id, neighbor_id, rank, round(score, 6))
+            for book_id, neighbor_id, rank, score in BookNeighbor.objects.filter(kind=similarity.KIND)
+            .values_list('book_id', 'neighbor_id', 'rank', 'score')
+        )
+
+    def test_build_ranks_closest_descriptions_first(self):
+        self.assertEqual(similarity.refresh(top_k=2), 5)
+        romance, romance_2, space, space_2, _ = self.books
+        self.assertEqual(self.neighbor_ids(romance)[0], romance_2.pk)
+        self.assertEqual(self.neighbor_ids(space)[0], space_2.pk)
+        self.assertEqual(len(self.neighbor_ids(romance)), 2)
+        self.assertEqual(
+            [book.pk for book in get_neighbors(space_2.pk, similarity.KIND, limit=1)], [space.pk],
+        )
+
+    def test_incremental_matches_full_rebuild(self):
+        similarity.refresh(top_k=2)
+        # Watermark dan keyin o'zgarmagan bo'lsa hech narsa qayta yozilmaydi
+        self.assertEqual(similarity.refresh(top_k=2), 0)
+
+        fairy_tales = self.books[4]
+        fairy_tales.description = "Kosmos robotlari haqida bolalar uchun fantastika"
+        fairy_tales.save()
+        self.books[1].is_active = False
+        self.books[1].save()
+
+        self.assertGreater(similarity.refresh(top_k=2), 0)
+        incremental = self.snapshot()
+        self.assertEqual(self.neighbor_ids(self.books[1]), [])
+        self.assertNotIn(self.books[1].pk, [row[1] for row in incremental])
+
+        similarity.refresh(full=True, top_k=2)
+        self.assertEqual(incremental, self.snapshot())
+
+
+class PriceScheduleTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+        self.book = self.create_book(price=Decimal('10000'))
+
+    def schedule(self, starts, ends, price=None, discount_price=None):
+        return PriceSchedule.objects.create(
+            book=self.book,
+            price=price,
+            discount_price=discount_price,
+            starts_at=self.now + timedelta(hours=starts),
+            ends_at=self.now + timedelta(hours=ends) if ends is not None else None,
+        )
+
+    def tick(self, hours):
+        return price_schedules.tick(self.now + timedelta(hours=hours))
+
+    def assertPrices(self, price, discount_price):
+        self.book.refresh_from_db()
+        self.assertEqual((self.book.price, self.book.discount_price), (price, discount_price))
+
+    def test_schedule_applies_and_restores(self):
+        self.schedule(1, 2, price=Decimal('8000'), discount_price=Decimal('7000'))
+        self.assertEqual(self.tick(1), (1, 0))
+        self.assertPrices(Decimal('8000'), Decimal('7000'))
+        self.assertEqual(self.tick(2), (0, 1))
+        self.assertPrices(Decimal('10000'), None)
+
+    def test_earlier_schedule_ending_keeps_later_one(self):
+        self.schedule(1, 3, discount_price=Decimal('9000'))
+        self.schedule(2, 4, discount_price=Decimal('8000'))
+        self.tick(1)
+        self.tick(2)
+        self.assertPrices(Decimal('10000'), Decimal('8000'))
+
+        self.tick(3)
+        self.assertPrices(Decimal('10000'), Decimal('8000'))
+        # Keyingi jadval tugaganda birinchisining qiymati emas, asl qiymat qaytadi
+        self.tick(4)
+        self.assertPrices(Decimal('10000'), None)
+
+    def test_later_schedule_ending_restores_earlier_one(self):
+        self.schedule(1, 4, price=Decimal('9000'))
+        self.schedule(2, 3, discount_price=Decimal('8000'))
+        self.tick(1)
+        self.tick(2)
+        self.assertPrices(Decimal('9000'), Decimal('8000'))
+
+        self.tick(3)
+        self.assertPrices(Decimal('9000'), None)
+        self.tick(4)
+        self.assertPrices(Decimal('10000'), None)
+
+    def test_manual_change_is_kept(self):
+        schedule = self.schedule(1, 2, discount_price=Decimal('9000'))
+        self.tick(1)
+        Book.objects.filter(pk=self.book.pk).update(discount_price=Decimal('5000'))
+        self.tick(2)
+        self.assertPrices(Decimal('10000'), Decimal('5000'))
+        schedule.refresh_from_db()
+        self.assertEqual(schedule.status, 'done')
+
+
+class AdminTestCase(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.admin)
+
+    def assertChangelistQueriesConstant(self, model, page_sizes=(5, 25)):
+        """Changelist sahifasidagi SQL so'rovlar soni sahifa hajmiga bog'liq emas"""
+        model_admin = admin.site._registry[model]
+        url = reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+        expected = None
+        for size in page_sizes:
+            with mock.patch.object(model_admin, 'list_per_page', size):
+                # Birinchi so'rov keshlarni isitadi
+                self.client.get(url)
+                if expected is None:
+                    with CaptureQueriesContext(connection) as queries:
+                        response = self.client.get(url)
+                    expected = len(queries)
+                else:
+                    with self.assertNumQueries(expected):
+                        response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.context['cl'].result_list), size)
+
+
+class ChangelistQueryTests(AdminTestCase):
+    rows = 30
+
+    def setUp(self):
+        super().setUp()
+        authors = Author.objects.bulk_create(
+            Author(name=f'Muallif {i}', slug=f'author-{i}') for i in range(self.rows)
+        )
+        genres = Genre.objects.bulk_create(Genre(name=f'Janr {i}', slug=f'genre-{i}') for i in range(self.rows))
+        categories = Category.objects.bulk_create(
+            Category(name=f'Turkum {i}', slug=f'category-{i}') for i in range(self.rows)
+        )
+        books = [
+            self.create_book(f'Kitob {i}', author=authors[i], genre=genres[i], category=categories[i])
+            for i in range(self.rows)
+        ]
+        for i in range(self.rows):
+            self.create_order(books[i:i + 1 + i % 3], telegram_id=i)
+        expires_at = timezone.now() + timedelta(hours=1)
+        StockReservation.objects.bulk_create(
+            StockReservation(book=books[i], telegram_id=i, quantity=1, expires_at=expires_at)
+            for i in range(self.rows)
+        )
+
+    def test_order_changelist(self):
+        self.assertChangelistQueriesConstant(Order)
+
+    def test_order_status_event_changelist(self):
+        self.assertChangelistQueriesConstant(OrderStatusEvent)
+
+    def test_stock_reservation_changelist(self):
+        self.assertChangelistQueriesConstant(StockReservation)
+
+    def test_book_changelist(self):
+        self.assertChangelistQueriesConstant(Book)
+
+    def test_taxonomy_changelists(self):
+        for model in (Author, Genre, Category):
+            with self.subTest(model=model._meta.label):
+                self.assertChangelistQueriesConstant(model)
+
+
+class BookTotalsTests(AdminTestCase):
+
+    def totals(self, model):
+        request = RequestFactory().get('/')
+        request.user = self.admin
+        queryset = admin.site._registry[model].get_queryset(request).order_by('pk')
+        return list(queryset.values_list('_books_count', '_active_books_count', '_total_sales', '_total_views'))
+
+    def test_totals_are_annotated(self):
+        other = Author.objects.create(name='Boshqa muallif')
+        self.create_book(sales_count=3, views_count=10)
+        self.create_book('Ikkinchi', sales_count=4, is_active=False)
+        collection = Collection.objects.create(title='Tuplam', slug='tuplam')
+        collection.books.set(Book.objects.filter(is_active=True))
+
+        self.assertEqual(self.totals(Author), [(2, 1, 7, 10), (0, 0, 0, 0)])
+        self.assertEqual(self.totals(Collection), [(1, 1, 3, 10)])
+        response = self.client.get('/admin/web_app/author/', {'o': '3'})
+        self.assertEqual([author.pk for author in response.context['cl'].result_list], [other.pk, self.author.pk])
+
+    def test_export_skips_book_totals(self):
+        self.create_book()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/admin/web_app/author/', {
+                'action': 'export_authors',
+                'index': '0',
+                ACTION_CHECKBOX_NAME: [self.author.pk],
+            })
+            content = b''.join(response.streaming_content).decode()
+        self.assertIn(self.author.name, content)
+        export_sql = [query['sql'] for query in queries if 'web_app_author' in query['sql']][-1]
+        self.assertNotIn('web_app_book', export_sql)
+        self.assertNotIn('GROUP BY', export_sql)
+
+
+class AutocompleteTests(AdminTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.prefix = Author.objects.create(name='Abdulla Qodiriy')
+        self.inner = Author.objects.create(name='Said Abdullayev')
+        self.in_bio = Author.objects.create(name='Cho\'lpon', bio='Abdulla Qodiriy bilan')
+
+    def autocomplete(self, term, model_name='book', field_name='author'):
+        return self.client.get('/admin/autocomplete/', {
+            'app_label': 'web_app', 'model_name': model_name, 'field_name': field_name, 'term': term,
+        })
+
+    def test_autocomplete_matches_name_prefix(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.autocomplete('abdulla')
+        ids = [int(result['id']) for result in response.json()['results']]
+        self.assertEqual(ids, [self.prefix.pk])
+        # BookTotalsMixin annotatsiyalari autocomplete da kerak emas
+        author_sql = [query['sql'] for query in queries if 'web_app_author' in query['sql']]
+        self.assertTrue(author_sql)
+        for sql in author_sql:
+            self.assertNotIn('web_app_book', sql)
+
+    def test_autocomplete_uses_autocomplete_search_field(self):
+        book = self.create_book('Mehrobdan chayon', description='Abdulla Qodiriy romani')
+        self.create_book('Kecha va kunduz')
+        response = self.autocomplete('mehrob', model_name='collection', field_name='books')
+        self.assertEqual([int(result['id']) for result in response.json()['results']], [book.pk])
+        self.assertEqual(self.autocomplete('abdulla', model_name='collection', field_name='books').json()['results'], [])
+
+    def test_changelist_search_uses_search_fields(self):
+        response = self.client.get('/admin/web_app/author/', {'q': 'abdulla'})
+        self.assertEqual(
+            {author.pk for author in response.context['cl'].result_list},
+            {self.prefix.pk, self.inner.pk, self.in_bio.pk},
+        )
+
+
+class LazyBookInlineTests(AdminTestCase):
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings_override = override_settings(MEDIA_ROOT=directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.books = [self.create_book(f'Kitob {i}') for i in range(25)]
+        self.url = reverse('admin:web_app_author_books', args=[self.author.pk])
+
+    def book_ids(self, page):
+        return [
+            book.pk for book in self.books
+            if reverse('admin:web_app_book_change', args=[book.pk]) in page['html']
+        ]
+
+    def test_pages_follow_after_cursor(self):
+        first = self.client.get(self.url).json()
+        newest = [book.pk for book in reversed(self.books)]
+        self.assertEqual((first['count'], first['next'], first['url']), (20, newest[19], self.url))
+        self.assertEqual(sorted(self.book_ids(first)), sorted(newest[:20]))
+
+        last = self.client.get(self.url, {'after': first['next']}).json()
+        self.assertEqual((last['count'], last['next']), (5, None))
+        self.assertEqual(sorted(self.book_ids(last)), sorted(newest[20:]))
+
+    def test_bad_after_is_rejected(self):
+        with self.assertLogs('django.request', 'WARNING'):
+            self.assertEqual(self.client.get(self.url, {'after': 'abc'}).status_code, 400)
+
+    def test_requires_view_permission(self):
+        user = User.objects.create_user('staff', password='password', is_staff=True)
+        self.client.force_login(user)
+        with self.assertLogs('django.request', 'WARNING'):
+            self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        # Kitoblarni ko'rish huquqisiz inline yo'q
+        user.user_permissions.add(Permission.objects.get(codename='view_author'))
+        with self.assertLogs('django.request', 'WARNING'):
+            self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        user.user_permissions.add(Permission.objects.get(codename='view_book'))
+        self.assertEqual(self.client.get(self.url).json()['count'], 20)
+
+    def test_broken_cover_fallback_is_cached(self):
+        cover = self.books[0].cover_image
+        with mock.patch.object(thumbnails, '_render', side_effect=OSError) as render:
+            self.assertEqual(thumbnails.thumbnail_url(cover), cover.url)
+            self.assertEqual(thumbnails.thumbnail_url(cover), cover.url)
+        render.assert_called_once()
+
+
+class OrderAdminTests(AdminTestCase):
+
+    def test_export_skips_changelist_annotations(self):
+        order = self.create_order([self.create_book()])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/admin/web_app/order/', {
+                'action': 'export_as_csv',
+                'select_across': '1',
+                'index': '0',
+                ACTION_CHECKBOX_NAME: [order.pk],
+            })
+            content = b''.join(response.streaming_content).decode()
+        self.assertIn(order.order_number, content)
+        export_sql = [query['sql'] for query in queries if 'web_app_order' in query['sql']][-1]
+        self.assertNotIn('web_app_orderitem', export_sql)
+        self.assertNotIn('GROUP BY', export_sql)
+
+    def test_changelist_orders_by_items_quantity(self):
+        book = self.create_book()
+        order = self.create_order([book])
+        OrderItem.objects.create(order=order, book=self.create_book('Ikkinchi'), quantity=2, price=book.price)
+        response = self.client.get('/admin/web_app/order/', {'o': '-6'})
+        self.assertContains(response, '3 dona (2 xil)')
+
+    def test_telegram_id_search_keeps_filters(self):
+        book = self.create_book()
+        pending = self.create_order([book], status='pending', telegram_id=777)
+        self.create_order([book], status='confirmed', telegram_id=777)
+        self.create_order([book], status='pending', telegram_id=5)
+        response = self.client.get('/admin/web_app/order/', {'status__exact': 'pending', 'q': '777'})
+        self.assertEqual(list(response.context['cl'].result_list), [pending])
+
+
+class BookAdminActionTests(AdminTestCase):
+
+    def run_action(self, action, book):
+        return self.client.post('/admin/web_app/book/', {
+            'action': action,
+            'index': '0',
+            ACTION_CHECKBOX_NAME: [book.pk],
+        })
+
+    def test_bulk_actions_evict_cached_details(self):
+        book = self.create_book()
+        self.assertFalse(catalog.get_book_detail(book.pk)['is_featured'])
+
+        self.run_action('mark_as_featured', book)
+        self.assertTrue(catalog.get_book_detail(book.pk)['is_featured'])
+
+        self.run_action('deactivate_books', book)
+        self.assertIsNone(catalog.get_book_detail(book.pk))
+
+        self.run_action('activate_books', book)
+        self.assertIsNotNone(catalog.get_book_detail(book.pk))
+
+
+class BookImportViewTests(AdminTestCase):
+
+    def test_database_error_is_reported(self):
+        content = jsonl(catalog_row('Katta', pages=10 ** 30)).getvalue()
+        response = self.client.post('/admin/web_app/book/import/', {
+            'file': SimpleUploadedFile('catalog.jsonl', content),
+        }, follow=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Book.objects.exists())
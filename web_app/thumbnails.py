@@ -0,0 +1,61 @@
+"""
+Muqova rasmlarining kichik nusxalari (admin inline'lari uchun).
+
+Asl rasm o'rniga `thumbs/<W>x<H>/<asl nom>.jpg` nusxasi ishlatiladi. Nusxa
+birinchi so'ralganda Pillow bilan yaratilib, asl fayl turgan storage ga
+saqlanadi; mavjudligi keshda eslab qolinadi, shuning uchun keyingi
+sahifalarda storage ga murojaat ham bo'lmaydi. Asl fayl almashtirilsa nomi
+o'zgaradi - nusxa ham yangidan yaratiladi.
+"""
+import os
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# 40x50 px preview, retina ekranlar uchun 2x
+THUMB_SIZE = (80, 100)
+THUMB_QUALITY = 80
+CACHE_TIMEOUT = 60 * 60 * 24
+# Nusxa yaratib bo'lmaganda asl URL qisqaroq muddat eslab qolinadi
+FALLBACK_CACHE_TIMEOUT = 60 * 60
+
+
+def thumbnail_name(name, size=THUMB_SIZE):
+    base, _ = os.path.splitext(name)
+    return f"thumbs/{size[0]}x{size[1]}/{base}.jpg"
+
+
+def _render(field_file, size):
+    with field_file.open('rb') as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image = ImageOps.fit(image.convert('RGB'), size, Image.Resampling.LANCZOS)
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality=THUMB_QUALITY, optimize=True)
+    return ContentFile(buffer.getvalue())
+
+
+def thumbnail_url(field_file, size=THUMB_SIZE):
+    """Kichik nusxa URL i (yaratib bo'lmasa - asl rasm URL i, rasm yo'q bo'lsa - None)"""
+    if not field_file:
+        return None
+    storage = field_file.storage
+    name = thumbnail_name(field_file.name, size)
+    key = f"thumb:{name}"
+
+    url = cache.get(key)
+    if url is not None:
+        return url
+    if not storage.exists(name):
+        try:
+            name = storage.save(name, _render(field_file, size))
+        except (OSError, UnidentifiedImageError, ValueError):
+            # Buzilgan yoki topilmagan fayl - sahifa baribir ochilsin, Pillow esa
+            # har bir inline chizilganda qayta ishga tushmasin
+            url = field_file.url
+            cache.set(key, url, FALLBACK_CACHE_TIMEOUT)
+            return url
+    url = storage.url(name)
+    cache.set(key, url, CACHE_TIMEOUT)
+    return url
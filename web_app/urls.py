@@ -0,0 +1,40 @@
+# urls.py
+from django.urls import path
+from .views import (
+    OrderHistoryView,
+    LastOrderStatusView,
+    SalesReportView,
+    OrdersReportView,
+    BookDetailView,
+    AlsoBoughtView,
+    SimilarBooksView,
+    ReserveStockView,
+    ReleaseStockView,
+    PricingJobCreateView,
+    PricingJobDetailView,
+)
+
+urlpatterns = [
+    # Buyurtmalar tarixi
+    path('api/orders/<int:telegram_id>/', OrderHistoryView.as_view(), name='order_history'),
+
+    # Oxirgi buyurtma holati
+    path('api/orders/<int:telegram_id>/last-status/', LastOrderStatusView.as_view(), name='last_order_status'),
+
+    # Hisobotlar (kunlik rollup jadvallaridan)
+    path('api/reports/sales/', SalesReportView.as_view(), name='sales_report'),
+    path('api/reports/orders/', OrdersReportView.as_view(), name='orders_report'),
+
+    # Katalog
+    path('api/books/<int:book_id>/', BookDetailView.as_view(), name='book_detail'),
+    path('api/books/<int:book_id>/also-bought/', AlsoBoughtView.as_view(), name='book_also_bought'),
+    path('api/books/<int:book_id>/similar/', SimilarBooksView.as_view(), name='book_similar'),
+
+    # Savat - zaxirani band qilish
+    path('api/cart/reserve/', ReserveStockView.as_view(), name='cart_reserve'),
+    path('api/cart/release/', ReleaseStockView.as_view(), name='cart_release'),
+
+    # Ommaviy narxlash (fon vazifalari)
+    path('api/pricing/jobs/', PricingJobCreateView.as_view(), name='pricing_job_create'),
+    path('api/pricing/jobs/<int:job_id>/', PricingJobDetailView.as_view(), name='pricing_job_detail'),
+]
@@ -1,3 +1,277 @@
-from django.shortcuts import render
+# views.py
+from datetime import timedelta
 
-# Create your views here.
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import status
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .order_history import (
+    DEFAULT_PAGE_SIZE,
+    InvalidCursor,
+    get_last_order_status,
+    get_order_history,
+)
+from . import catalog, recommendations, reservations, rollups, similarity
+from .models import Book, Order, PricingJob
+from .neighbors import get_neighbors
+from .serializers import (
+    BookCardSerializer,
+    OrderHistorySerializer,
+    PricingJobCreateSerializer,
+    PricingJobSerializer,
+    StockReleaseSerializer,
+    StockReservationSerializer,
+)
+
+
+class OrderHistoryView(APIView):
+    """
+    Foydalanuvchi buyurtmalari tarixi (keyset pagination)
+    GET /api/orders/<telegram_id>/?cursor=<cursor>&limit=10
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, telegram_id):
+        try:
+            limit = int(request.query_params.get('limit', DEFAULT_PAGE_SIZE))
+            orders, next_cursor = get_order_history(
+                telegram_id,
+                cursor=request.query_params.get('cursor'),
+                limit=limit,
+            )
+        except (ValueError, InvalidCursor):
+            return Response({
+                'error': "Noto'g'ri cursor yoki limit"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'telegram_id': telegram_id,
+            'results': OrderHistorySerializer(orders, many=True).data,
+            'next_cursor': next_cursor,
+        }, status=status.HTTP_200_OK)
+
+
+class LastOrderStatusView(APIView):
+    """
+    Oxirgi buyurtma holati (bot "buyurtmam qayerda" tugmasi uchun)
+    GET /api/orders/<telegram_id>/last-status/
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, telegram_id):
+        order = get_last_order_status(telegram_id)
+        if order is None:
+            return Response({
+                'exists': False,
+                'telegram_id': telegram_id
+            }, status=status.HTTP_200_OK)
+
+        return Response({
+            'exists': True,
+            'telegram_id': telegram_id,
+            'order_number': order['order_number'],
+            'status': order['status'],
+            'status_display': dict(Order.STATUS_CHOICES).get(order['status'], order['status']),
+            'updated_at': order['updated_at'],
+        }, status=status.HTTP_200_OK)
+
+
+class ReportRangeMixin:
+    """?start=YYYY-MM-DD&end=YYYY-MM-DD (standart - oxirgi 30 kun)"""
+    max_days = 366
+
+    def get_range(self, request):
+        end = parse_date(request.query_params.get('end', '')) or timezone.localdate()
+        start = parse_date(request.query_params.get('start', '')) or end - timedelta(days=29)
+        if start > end or (end - start).days >= self.max_days:
+            raise ValueError
+        return start, end
+
+
+class SalesReportView(ReportRangeMixin, APIView):
+    """
+    Kunlik sotuvlar hisoboti
+    GET /api/reports/sales/?dimension=book|genre|category|author&start=&end=
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        dimension = request.query_params.get('dimension', 'category')
+        if dimension not in rollups.SALES_DIMENSIONS:
+            return Response({
+                'error': "Noto'g'ri dimension",
+                'allowed': list(rollups.SALES_DIMENSIONS),
+            }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            start, end = self.get_range(request)
+        except ValueError:
+            return Response({'error': "Noto'g'ri sana oralig'i"}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'dimension': dimension,
+            'start': start,
+            'end': end,
+            'results': rollups.sales_report(dimension, start, end),
+        }, status=status.HTTP_200_OK)
+
+
+class OrdersReportView(ReportRangeMixin, APIView):
+    """
+    Kunlik buyurtmalar va tushum hisoboti (holat bo'yicha)
+    GET /api/reports/orders/?start=&end=
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            start, end = self.get_range(request)
+        except ValueError:
+            return Response({'error': "Noto'g'ri sana oralig'i"}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'start': start,
+            'end': end,
+            'results': rollups.orders_report(start, end),
+        }, status=status.HTTP_200_OK)
+
+
+class BookDetailView(APIView):
+    """
+    Kitob ma'lumotlari (mavjud zaxira bilan)
+    GET /api/books/<book_id>/
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, book_id):
+        data = catalog.get_book_detail(book_id)
+        if data is None:
+            return Response({
+                'error': 'Kitob topilmadi',
+                'book_id': book_id
+            }, status=status.HTTP_404_NOT_FOUND)
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class NeighborListView(APIView):
+    """Oldindan hisoblangan tavsiyalar ro'yxati (?limit=10)"""
+    permission_classes = [AllowAny]
+    index = None
+
+    def get(self, request, book_id):
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 10)), self.index.TOP_K))
+        except ValueError:
+            return Response({'error': "Noto'g'ri limit"}, status=status.HTTP_400_BAD_REQUEST)
+
+        books = get_neighbors(book_id, self.index.KIND, limit)
+        return Response({
+            'book_id': book_id,
+            'results': BookCardSerializer(books, many=True).data,
+        }, status=status.HTTP_200_OK)
+
+
+class AlsoBoughtView(NeighborListView):
+    """
+    "Buni ham sotib olishadi" bloki
+    GET /api/books/<book_id>/also-bought/?limit=10
+    """
+    index = recommendations
+
+
+class SimilarBooksView(NeighborListView):
+    """
+    "O'xshash kitoblar" bloki
+    GET /api/books/<book_id>/similar/?limit=10
+    """
+    index = similarity
+
+
+class ReserveStockView(APIView):
+    """
+    Kitobni savat uchun band qilish
+    POST /api/cart/reserve/
+    Body: {"telegram_id": 123456789, "book_id": 1, "quantity": 2}
+    """
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        serializer = StockReservationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        try:
+            reservation = reservations.reserve(data['book_id'], data['telegram_id'], data['quantity'])
+        except Book.DoesNotExist:
+            return Response({
+                'error': 'Kitob topilmadi',
+                'book_id': data['book_id']
+            }, status=status.HTTP_404_NOT_FOUND)
+        except reservations.InsufficientStock as e:
+            return Response({
+                'error': 'Omborda yetarli kitob yo\'q',
+                'book_id': e.book_id,
+                'available': e.available,
+            }, status=status.HTTP_409_CONFLICT)
+
+        return Response({
+            'success': True,
+            'book_id': reservation.book_id,
+            'quantity': reservation.quantity,
+            'expires_at': reservation.expires_at,
+        }, status=status.HTTP_200_OK)
+
+
+class ReleaseStockView(APIView):
+    """
+    Band qilishni bekor qilish (savatdan olib tashlash)
+    POST /api/cart/release/
+    Body: {"telegram_id": 123456789, "book_id": 1}
+    """
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        serializer = StockReleaseSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        released = reservations.release(data['telegram_id'], data.get('book_id'))
+        return Response({
+            'success': True,
+            'released': released,
+        }, status=status.HTTP_200_OK)
+
+
+class PricingJobCreateView(APIView):
+    """
+    Ommaviy narx / chegirma o'zgartirish - fon vazifasi navbatga qo'yiladi
+    POST /api/pricing/jobs/
+    Body: {"category": 3, "operation": "discount_percent", "value": 20,
+           "rounding": "1000", "starts_at": "...", "ends_at": "..."}
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        serializer = PricingJobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = serializer.create_job(request.user)
+        return Response(PricingJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class PricingJobDetailView(APIView):
+    """
+    Narxlash vazifasi holati va progressi
+    GET /api/pricing/jobs/<job_id>/
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, job_id):
+        job = PricingJob.objects.defer('book_ids').filter(pk=job_id).first()
+        if job is None:
+            return Response({
+                'error': 'Vazifa topilmadi',
+                'job_id': job_id
+            }, status=status.HTTP_404_NOT_FOUND)
+        return Response(PricingJobSerializer(job).data, status=status.HTTP_200_OK)